@@ -0,0 +1,181 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_ID = re.compile(r'^\[(\d+)\] (FEATURE|QUICK)', re.M)
+
+WORDS = (
+    "touchdown", "blowout", "waiver", "wire", "monster", "game", "cooking", "bodied",
+    "torched", "clinic", "therapy", "starter", "bench", "nail-biter", "comeback", "league"
+)
+
+
+class FakeAzureOpenAI:
+    """
+    Local stand-in for the Azure OpenAI chat-completions endpoint.
+
+    Point AzureOpenAI(azure_endpoint=server.endpoint) at it. Every request
+    sleeps `latency` +/- `jitter` seconds, then fails with a 500 at
+    `error_rate` or a 429 (with Retry-After) at `rate_limit_rate`, otherwise
+    answers with Matt & Jose shaped text, a JSON batch for JSON-mode
+    requests, or an SSE stream for stream=True. At `stream_error_rate` a
+    stream sends half its text and then an error event, as Azure does when a
+    stream fails part way. Every call is recorded for the benchmark report.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.05, error_rate=0.0, rate_limit_rate=0.0, retry_after=0.2,
+                 tokens_per_second=0.0, seed=11, port=0, stream_error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.stream_error_rate = stream_error_rate
+        self.retry_after = retry_after
+        self.tokens_per_second = tokens_per_second
+        self.calls = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls = []
+
+    def _roll(self):
+        with self._lock:
+            return self._rng.random(), self._rng.uniform(-self.jitter, self.jitter)
+
+    def _record(self, **call):
+        with self._lock:
+            self.calls.append(call)
+
+    def _completion_text(self, request):
+        prompt = request['messages'][-1]['content']
+        if (request.get('response_format') or {}).get('type') == 'json_object':
+            entries = []
+            for matchup_id, kind in BATCH_ID.findall(prompt):
+                if kind == 'FEATURE':
+                    entries.append({
+                        'id': matchup_id,
+                        'transition': f"[MATT]: Next up, matchup {matchup_id}. [JOSE]: Let's go!",
+                        'banter': f"[MATT]: {self._words(25)}\n[JOSE]: {self._words(15)}"
+                    })
+                else:
+                    entries.append({'id': matchup_id, 'banter': f"[JOSE]: {self._words(12)}"})
+            return json.dumps({'matchups': entries})
+
+        budget = max(8, min(request.get('max_tokens') or 250, 400) // 2)
+        if request['messages'][0]['role'] == 'system':
+            return f"[MATT]: {self._words(budget // 2)} [JOSE]: {self._words(budget // 2)}"
+        return self._words(budget)
+
+    def _words(self, count):
+        with self._lock:
+            return " ".join(self._rng.choice(WORDS) for _ in range(count))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                started = time.monotonic()
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                stream = bool(request.get('stream'))
+                prompt_tokens = sum(len(m.get('content') or '') for m in request.get('messages', [])) // 4
+
+                roll, jitter = server._roll()
+                time.sleep(max(0.0, server.latency + jitter))
+
+                if roll < server.error_rate:
+                    server._record(status=500, latency=time.monotonic() - started, prompt_tokens=0, completion_tokens=0, stream=stream)
+                    self._send_json(500, {'error': {'code': 'InternalServerError', 'message': 'Simulated failure'}})
+                    return
+                if roll < server.error_rate + server.rate_limit_rate:
+                    server._record(status=429, latency=time.monotonic() - started, prompt_tokens=0, completion_tokens=0, stream=stream)
+                    self._send_json(429, {'error': {'code': '429', 'message': 'Simulated rate limit'}},
+                                    headers={'Retry-After': str(server.retry_after)})
+                    return
+
+                text = server._completion_text(request)
+                completion_tokens = len(text) // 4
+                if server.tokens_per_second:
+                    time.sleep(completion_tokens / server.tokens_per_second)
+
+                status = 200
+                if stream:
+                    if not self._stream(text, request):
+                        status = 'stream_error'
+                else:
+                    self._send_json(200, {
+                        'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+                        'model': request.get('model', 'fake'),
+                        'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': text}}],
+                        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                                  'total_tokens': prompt_tokens + completion_tokens}
+                    })
+                server._record(status=status, latency=time.monotonic() - started, prompt_tokens=prompt_tokens,
+                               completion_tokens=completion_tokens, stream=stream)
+
+            def _stream(self, text, request):
+                """Writes `text` as SSE chunks. Returns False if the stream was cut off with an error event."""
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                base = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                        'model': request.get('model', 'fake')}
+                # Azure's first chunk carries prompt filter results and no choices
+                self.wfile.write(f"data: {json.dumps(dict(base, choices=[]))}\n\n".encode('utf-8'))
+                pieces = re.findall(r'\S+\s*', text)
+                cut_at = len(pieces) // 2 if server._roll()[0] < server.stream_error_rate else None
+                for i, piece in enumerate(pieces):
+                    if i == cut_at:
+                        error = {'error': {'code': 'server_error', 'message': 'Simulated stream failure'}}
+                        self.wfile.write(f"data: {json.dumps(error)}\n\n".encode('utf-8'))
+                        self.wfile.flush()
+                        return False
+                    chunk = dict(base, choices=[{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                chunk = dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                return True
+
+        return Handler
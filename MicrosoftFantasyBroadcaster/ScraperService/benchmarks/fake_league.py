@@ -0,0 +1,102 @@
+import random
+
+POSITIONS = ('QB', 'RB', 'RB', 'WR', 'WR', 'TE', 'RB/WR/TE', 'K', 'D/ST')
+
+
+class FakeTeam:
+    def __init__(self, team_id, team_name):
+        self.team_id = team_id
+        self.team_name = team_name
+
+
+class FakeBoxPlayer:
+    """Shaped like espn_api.football.BoxPlayer for the fields the scraper reads."""
+
+    def __init__(self, name, position, slot_position, points, stats, week):
+        self.name = name
+        self.position = position
+        self.slot_position = slot_position
+        self.lineupSlot = slot_position
+        self.points = points
+        self.stats = {week: stats}
+
+
+class FakeBoxScore:
+    def __init__(self, home_team, away_team, home_lineup, away_lineup):
+        self.home_team = home_team
+        self.away_team = away_team
+        self.home_lineup = home_lineup
+        self.away_lineup = away_lineup
+        self.home_score = round(sum(p.points for p in home_lineup if p.slot_position != 'BE'), 2)
+        self.away_score = round(sum(p.points for p in away_lineup if p.slot_position != 'BE'), 2)
+
+
+def _stats_for(rng, position):
+    stats = {}
+    if position == 'QB':
+        stats['passingYards'] = rng.randint(120, 420)
+        stats['passingTouchdowns'] = rng.randint(0, 5)
+        stats['rushingYards'] = rng.randint(0, 50)
+    elif position == 'RB':
+        stats['rushingYards'] = rng.randint(10, 160)
+        stats['rushingTouchdowns'] = rng.randint(0, 3)
+        stats['receivingYards'] = rng.randint(0, 60)
+        stats['receivingTouchdowns'] = rng.randint(0, 1)
+    elif position in ('WR', 'TE'):
+        stats['receivingYards'] = rng.randint(5, 170)
+        stats['receivingTouchdowns'] = rng.randint(0, 3)
+    return stats
+
+
+def _points_for(stats, rng):
+    points = (
+        stats.get('passingYards', 0) * 0.04 + stats.get('passingTouchdowns', 0) * 4 +
+        stats.get('rushingYards', 0) * 0.1 + stats.get('rushingTouchdowns', 0) * 6 +
+        stats.get('receivingYards', 0) * 0.1 + stats.get('receivingTouchdowns', 0) * 6
+    )
+    return round(points or rng.uniform(0, 15), 2)
+
+
+class FakeLeague:
+    """
+    Synthetic espn_api.football.League: `current_week` and `box_scores(week)`
+    with configurable team count, season length and lineup size. Data is
+    generated deterministically from `seed`. `fetch_latency` simulates ESPN
+    round-trips.
+    """
+
+    def __init__(self, teams=10, weeks=4, starters=9, bench=6, seed=7, fetch_latency=0.0):
+        import time
+        self._sleep = time.sleep
+        self.current_week = weeks
+        self.fetch_latency = fetch_latency
+        self.teams = [FakeTeam(i + 1, f"Team {i + 1}") for i in range(teams)]
+        self._weeks = {}
+        for week in range(1, weeks + 1):
+            rng = random.Random(seed * 1000 + week)
+            order = list(self.teams)
+            rng.shuffle(order)
+            games = []
+            for home, away in zip(order[0::2], order[1::2]):
+                games.append(FakeBoxScore(
+                    home, away,
+                    self._lineup(rng, home, week, starters, bench),
+                    self._lineup(rng, away, week, starters, bench)
+                ))
+            self._weeks[week] = games
+
+    def _lineup(self, rng, team, week, starters, bench):
+        lineup = []
+        for i in range(starters + bench):
+            position = POSITIONS[i % len(POSITIONS)]
+            if position == 'RB/WR/TE':
+                position = rng.choice(('RB', 'WR', 'TE'))
+            slot = position if i < starters else 'BE'
+            stats = _stats_for(rng, position)
+            lineup.append(FakeBoxPlayer(f"{team.team_name} {position}{i}", position, slot, _points_for(stats, rng), stats, week))
+        return lineup
+
+    def box_scores(self, week):
+        if self.fetch_latency:
+            self._sleep(self.fetch_latency)
+        return self._weeks[week]
@@ -0,0 +1,254 @@
+"""
+End-to-end scraper benchmark against a fake ESPN league, a local fake Azure
+OpenAI server and an in-process (or local) RabbitMQ.
+
+Run from the ScraperService folder:
+
+    python -m benchmarks.run_benchmark --weeks 4 --latency 0.3
+    LLM_MAX_CONCURRENCY=1 python -m benchmarks.run_benchmark --label serial
+
+Pipeline settings (LLM_MAX_CONCURRENCY, WEEK_CONCURRENCY, LLM_BATCH_MODE, ...)
+are read from the environment exactly as in a real run. Each run is saved to
+benchmarks/results/ and compared against the previous one.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fake_azure_openai import FakeAzureOpenAI
+from benchmarks.fake_league import FakeLeague
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else 0.0,
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'max': max(values) if values else 0.0
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+
+class TimedLeague:
+    def __init__(self, league, timer):
+        self.current_week = league.current_week
+        self.box_scores = timer.wrap('espn_fetch', league.box_scores)
+
+
+class TimedPublisher:
+    """Records when each week's messages were handed to the publisher."""
+
+    def __init__(self, publisher, timer, started):
+        self._publisher = publisher
+        self._timer = timer
+        self._started = started
+        self.week_published_at = {}
+
+    def publish(self, message, **kwargs):
+        t = time.perf_counter()
+        self._publisher.publish(message, **kwargs)
+        self._timer.add('publish', time.perf_counter() - t)
+        self.week_published_at[message.get('week')] = time.perf_counter() - self._started
+
+    def __getattr__(self, name):
+        return getattr(self._publisher, name)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(__file__)).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def previous_result(label):
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, f"*_{label}.json")))
+    if not paths:
+        return None
+    with open(paths[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraper pipeline end to end with fake services.")
+    parser.add_argument('--teams', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--starters', type=int, default=9)
+    parser.add_argument('--bench', type=int, default=6)
+    parser.add_argument('--fetch-latency', type=float, default=0.1, help="Simulated ESPN box score fetch time (s)")
+    parser.add_argument('--latency', type=float, default=0.3, help="Fake Azure OpenAI mean latency per call (s)")
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of LLM calls that fail with a 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of LLM calls that fail with a 429")
+    parser.add_argument('--stream-error-rate', type=float, default=0.0, help="Fraction of streamed LLM calls that fail part way")
+    parser.add_argument('--stream', action='store_true', help="Benchmark the streaming publish mode")
+    parser.add_argument('--cache', action='store_true', help="Leave the LLM response cache enabled")
+    parser.add_argument('--rabbitmq-host', help="Publish to a real local broker instead of the in-process fake")
+    parser.add_argument('--label', default='default', help="Name for this configuration; runs are compared per label")
+    parser.add_argument('--no-save', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    server = FakeAzureOpenAI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             rate_limit_rate=args.rate_limit_rate, stream_error_rate=args.stream_error_rate).start()
+    workdir = tempfile.mkdtemp(prefix="scraper-bench-")
+    os.environ.update({
+        'AZURE_OPENAI_ENDPOINT': server.endpoint,
+        'AZURE_OPENAI_API_KEY': 'benchmark',
+        'AZURE_DEPLOYMENT_NAME': 'benchmark',
+        'SNAPSHOTS_ENABLED': 'false',
+        'STORYLINE_ARCHIVE_ENABLED': 'false',
+        'TELEMETRY_ENABLED': 'true',
+        'LLM_CACHE_PATH': os.path.join(workdir, 'llm_cache.sqlite')
+    })
+    if not args.cache:
+        os.environ['LLM_CACHE_ENABLED'] = 'false'
+
+    # Imported after the environment is set: the scraper reads its config at import time
+    import scraper
+    from storyline_generator import StorylineGenerator
+    from publisher import RabbitPublisher, pika_connection_factory
+    from fake_rabbitmq import FakeBroker
+    from telemetry import telemetry
+    from llm_gateway import get_shared_client
+
+    timer = StageTimer()
+    scraper.generate_week = timer.wrap('week_script', scraper.generate_week)
+    scraper.stream_week_script = timer.wrap('week_script', scraper.stream_week_script)
+
+    league = TimedLeague(FakeLeague(teams=args.teams, weeks=args.weeks, starters=args.starters, bench=args.bench,
+                                    fetch_latency=args.fetch_latency), timer)
+    if args.rabbitmq_host:
+        connection_factory = pika_connection_factory(args.rabbitmq_host)
+    else:
+        connection_factory = FakeBroker().connect
+
+    director = scraper.BroadcastDirector()
+    story_gen = StorylineGenerator()
+    rabbit = RabbitPublisher(connection_factory, scraper.QUEUE_NAME, confirm_window=scraper.RABBITMQ_CONFIRM_WINDOW,
+                             outbox_path=os.path.join(workdir, 'outbox.jsonl'))
+    rabbit.connect()
+
+    # Cold start (imports, client construction) is measured by benchmarks.startup_benchmark
+    get_shared_client()
+
+    weeks = list(range(1, args.weeks + 1))
+    started = time.perf_counter()
+    publisher = TimedPublisher(rabbit, timer, started)
+    if args.stream:
+        scraper.run_streaming(league, weeks, director, story_gen, publisher)
+    else:
+        scraper.run_backfill(league, weeks, director, story_gen, publisher)
+    rabbit.close()
+    wall_clock = time.perf_counter() - started
+    server.stop()
+
+    calls = server.calls
+    ok_calls = [c for c in calls if c['status'] == 200]
+    tokens = sum(c['prompt_tokens'] + c['completion_tokens'] for c in ok_calls)
+    status_counts = {}
+    for c in calls:
+        status_counts[str(c['status'])] = status_counts.get(str(c['status']), 0) + 1
+
+    stages = {name: summarize(values) for name, values in timer.samples.items()}
+    stages['llm_call'] = summarize([c['latency'] for c in calls])
+
+    result = {
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'commit': git_commit(),
+        'label': args.label,
+        'config': dict(vars(args), **{k: os.getenv(k) for k in (
+            'LLM_MAX_CONCURRENCY', 'ESPN_FETCH_CONCURRENCY', 'WEEK_CONCURRENCY', 'LLM_BATCH_MODE',
+            'AZURE_OPENAI_RPM', 'AZURE_OPENAI_TPM') if os.getenv(k) is not None}),
+        'totals': {
+            'wall_clock': wall_clock,
+            'weeks': len(weeks),
+            'wall_clock_per_week': wall_clock / len(weeks),
+            'llm_calls': len(calls),
+            'llm_calls_per_week': len(calls) / len(weeks),
+            'tokens': tokens,
+            'tokens_per_week': tokens / len(weeks),
+            'llm_status': status_counts,
+            'published': rabbit.stats()['published']
+        },
+        'stages': stages,
+        'weeks': [{'week': w, 'published_at': publisher.week_published_at.get(w)} for w in weeks],
+        # The scraper's own span/counter view of the same run
+        'telemetry': telemetry.report()
+    }
+
+    print_report(result, previous_result(args.label))
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(RESULTS_DIR, f"{stamp}_{result['commit']}_{args.label}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Saved {path}")
+    return result
+
+
+def print_report(result, previous=None):
+    totals = result['totals']
+    print("\n📊 BENCHMARK RESULTS" + (f" (vs {previous['commit']} @ {previous['timestamp']})" if previous else ""))
+
+    def delta(now, before):
+        if before in (None, 0):
+            return ""
+        return f"  ({(now - before) / before * 100:+.1f}%)"
+
+    prev_totals = previous['totals'] if previous else {}
+    for key in ('wall_clock', 'wall_clock_per_week', 'llm_calls_per_week', 'tokens_per_week'):
+        print(f"  {key:<22} {totals[key]:>10.2f}{delta(totals[key], prev_totals.get(key))}")
+    print(f"  {'llm_status':<22} {totals['llm_status']}")
+
+    print(f"\n  {'stage':<14} {'count':>6} {'p50 (s)':>9} {'p95 (s)':>9} {'max (s)':>9}")
+    prev_stages = previous['stages'] if previous else {}
+    for name, s in sorted(result['stages'].items()):
+        p95_before = prev_stages.get(name, {}).get('p95')
+        print(f"  {name:<14} {s['count']:>6} {s['p50']:>9.3f} {s['p95']:>9.3f} {s['max']:>9.3f}{delta(s['p95'], p95_before)}")
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,142 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to get the scraper
+ready to work, measured in new subprocesses so nothing is already imported.
+
+Run from the ScraperService folder:
+
+    python -m benchmarks.startup_benchmark --runs 10
+    python -m benchmarks.startup_benchmark --importtime 15
+
+Phases (cumulative, each in its own process):
+  import  - `import scraper`
+  startup - import + parse_args + BroadcastDirector() + StorylineGenerator()
+  client  - startup + the first Azure OpenAI client being built
+
+Results are saved to benchmarks/results/ and compared with the previous run
+that has the same --label.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.run_benchmark import RESULTS_DIR, git_commit, previous_result, summarize
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = {
+    'import': "import scraper\n",
+    'startup': (
+        "import scraper\n"
+        "from storyline_generator import StorylineGenerator\n"
+        "scraper.parse_args([])\n"
+        "scraper.BroadcastDirector()\n"
+        "StorylineGenerator()\n"
+    ),
+    'client': (
+        "import scraper\n"
+        "from storyline_generator import StorylineGenerator\n"
+        "scraper.parse_args([])\n"
+        "scraper.BroadcastDirector().client\n"
+        "StorylineGenerator().client\n"
+    ),
+}
+
+TIMED = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "{code}"
+    "print('ELAPSED', time.perf_counter() - started)\n"
+)
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault('AZURE_OPENAI_ENDPOINT', 'http://127.0.0.1:9')
+    env.setdefault('AZURE_OPENAI_API_KEY', 'benchmark')
+    env.setdefault('AZURE_DEPLOYMENT_NAME', 'benchmark')
+    env['LLM_CACHE_ENABLED'] = 'false'
+    return env
+
+
+def time_phase(code):
+    output = subprocess.check_output([sys.executable, '-c', TIMED.format(code=code)], cwd=SERVICE_DIR,
+                                     env=_env(), stderr=subprocess.DEVNULL).decode()
+    for line in output.splitlines():
+        if line.startswith('ELAPSED '):
+            return float(line.split()[1])
+    raise RuntimeError("Phase did not report its timing")
+
+
+def import_profile(top):
+    """Slowest direct imports of scraper.py (cumulative), from python -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import scraper'], cwd=SERVICE_DIR,
+                            env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    rows = []
+    for line in result.stderr.decode().splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Each nesting level is indented two more spaces; keep what scraper itself imports
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure scraper cold-start time in fresh interpreters.")
+    parser.add_argument('--runs', type=int, default=10, help="Fresh processes per phase")
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help="Also list the N slowest modules imported by scraper.py")
+    parser.add_argument('--label', default='startup', help="Name for this configuration; runs are compared per label")
+    parser.add_argument('--no-save', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    phases = {}
+    for name, code in PHASES.items():
+        phases[name] = summarize([time_phase(code) for _ in range(args.runs)])
+
+    result = {
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'commit': git_commit(),
+        'label': args.label,
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'phases': phases
+    }
+    if args.importtime:
+        result['imports'] = [{'module': name, 'cumulative': us / 1e6} for us, name in import_profile(args.importtime)]
+
+    print_report(result, previous_result(args.label))
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(RESULTS_DIR, f"{stamp}_{result['commit']}_{args.label}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Saved {path}")
+    return result
+
+
+def print_report(result, previous=None):
+    print("\n🚀 STARTUP RESULTS" + (f" (vs {previous['commit']} @ {previous['timestamp']})" if previous else ""))
+    prev_phases = previous.get('phases', {}) if previous else {}
+    print(f"  {'phase':<10} {'runs':>5} {'p50 (s)':>9} {'p95 (s)':>9} {'max (s)':>9}")
+    for name, s in result['phases'].items():
+        before = prev_phases.get(name, {}).get('p50')
+        delta = f"  ({(s['p50'] - before) / before * 100:+.1f}%)" if before else ""
+        print(f"  {name:<10} {s['count']:>5} {s['p50']:>9.3f} {s['p95']:>9.3f} {s['max']:>9.3f}{delta}")
+    for row in result.get('imports', []):
+        print(f"    {row['cumulative']:>7.3f}s  {row['module']}")
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), "data", "checkpoints.json")
+LEAGUE_CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "data", "checkpoints")
+
+
+def box_score_fingerprint(box_scores):
+    """
+    Hashes the parts of a week's box scores that end up in the script: team
+    names and scores plus every active lineup slot's player, slot and points.
+    Stat corrections change the fingerprint; re-fetching identical data doesn't.
+    """
+    games = []
+    for game in box_scores:
+        if isinstance(game.home_team, int) or isinstance(game.away_team, int): continue
+        lineups = []
+        for lineup in (getattr(game, 'home_lineup', []), getattr(game, 'away_lineup', [])):
+            lineups.append([[p.name, p.slot_position, p.points] for p in lineup if p.slot_position != 'BE'])
+        games.append([
+            game.home_team.team_name, game.home_score,
+            game.away_team.team_name, game.away_score,
+            lineups
+        ])
+    raw = json.dumps(games, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """
+    JSON manifest of the weeks already published for a league/season, with the
+    box score fingerprint each one was generated from.
+    """
+
+    def __init__(self, league_id, year, path=DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self.scope = f"{league_id}:{year}"
+        self.league_id = league_id
+        self.year = year
+        self._lock = threading.Lock()
+        self._manifest = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._manifest = json.load(f)
+
+    def _weeks(self):
+        return self._manifest.setdefault(self.scope, {})
+
+    @classmethod
+    def for_league(cls, league_id, year, directory=LEAGUE_CHECKPOINT_DIR):
+        """
+        A store in its own file (data/checkpoints/<league>_<year>.json), for
+        multi-league runs where several processes publish at once. The first
+        time, it starts from whatever the shared single-league manifest
+        already recorded for this league.
+        """
+        path = os.path.join(directory, f"{league_id}_{year}.json")
+        store = cls(league_id, year, path=path)
+        if not os.path.exists(path):
+            shared = cls(league_id, year)
+            if shared._weeks():
+                with store._lock:
+                    store._weeks().update(shared._weeks())
+                    store._save()
+        return store
+
+    def idempotency_key(self, week, fingerprint):
+        return f"{self.league_id}-{self.year}-week{week}-{fingerprint[:16]}"
+
+    def is_current(self, week, fingerprint):
+        """True if `week` was already published from exactly this box score data."""
+        with self._lock:
+            entry = self._weeks().get(str(week))
+            return bool(entry) and entry.get('fingerprint') == fingerprint
+
+    def mark_published(self, week, fingerprint):
+        with self._lock:
+            self._weeks()[str(week)] = {
+                'fingerprint': fingerprint,
+                'idempotency_key': self.idempotency_key(week, fingerprint),
+                'published_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,135 @@
+"""
+Scraper configuration. The .env file is loaded once, here, and every module
+takes its settings from this one place.
+"""
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+# --- 1. ROBUST ENV LOADING ---
+env_path = Path(__file__).parent / '.env'
+load_dotenv(dotenv_path=env_path)
+
+
+def env_flag(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+# --- 2. CONFIGURATION ---
+RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
+LEAGUE_ID = int(os.getenv('ESPN_LEAGUE_ID', '0'))
+YEAR = int(os.getenv('ESPN_YEAR', '2025'))
+ESPN_S2 = os.getenv('ESPN_S2')
+SWID = os.getenv('ESPN_SWID')
+QUEUE_NAME = 'game_stats_queue'
+
+# Publisher reliability/encoding. RABBITMQ_DURABLE_QUEUE must match how the
+# BroadcasterService consumer declares the queue. Up to RABBITMQ_CONFIRM_WINDOW
+# messages are confirmed per broker round trip; a week is always confirmed before
+# it is checkpointed, and streamed segments still go out one at a time. Compact
+# encodings (json+gzip, msgpack) need a consumer that honours content_encoding/content_type.
+RABBITMQ_DURABLE_QUEUE = env_flag('RABBITMQ_DURABLE_QUEUE', 'false')
+RABBITMQ_PERSISTENT = env_flag('RABBITMQ_PERSISTENT', 'true')
+RABBITMQ_CONFIRM_WINDOW = max(1, int(os.getenv('RABBITMQ_CONFIRM_WINDOW', '16')))
+RABBITMQ_ENCODING = os.getenv('RABBITMQ_ENCODING', 'json')
+
+# 'compact' leaves out the empty placeholder fields (the "Recap" teams, zero
+# scores, empty rosters) that GameStatMessage defaults anyway; 'legacy' still sends them
+QUEUE_MESSAGE_SCHEMA = os.getenv('QUEUE_MESSAGE_SCHEMA', 'compact')
+
+# Azure Config
+AZURE_ENDPOINT = os.getenv('AZURE_OPENAI_ENDPOINT')
+AZURE_KEY = os.getenv('AZURE_OPENAI_API_KEY')
+AZURE_DEPLOYMENT = os.getenv('AZURE_DEPLOYMENT_NAME')
+AZURE_API_VERSION = os.getenv('AZURE_OPENAI_API_VERSION', '2024-05-01-preview')
+
+# Connection pool of the one AzureOpenAI client shared by the director and the
+# storyline generator. Keep max connections at or above LLM_MAX_CONCURRENCY.
+LLM_HTTP_MAX_CONNECTIONS = max(1, int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '16')))
+LLM_HTTP_KEEPALIVE = max(0, int(os.getenv('LLM_HTTP_KEEPALIVE', '8')))
+LLM_HTTP_TIMEOUT = float(os.getenv('LLM_HTTP_TIMEOUT', '60'))
+
+# Storyline prompt compiler: a token budget per prompt (0 = no limit; notable
+# performances and storylines are trimmed to fit), the recap's output cap, and
+# 'inline' (original prompt) or 'static_first' (instructions as a shared system
+# message ahead of the matchup facts).
+LLM_PROMPT_TOKEN_BUDGET = max(0, int(os.getenv('LLM_PROMPT_TOKEN_BUDGET', '1500')))
+LLM_RECAP_MAX_TOKENS = max(1, int(os.getenv('LLM_RECAP_MAX_TOKENS', '700')))
+LLM_PROMPT_LAYOUT = os.getenv('LLM_PROMPT_LAYOUT', 'inline')
+# tiktoken encoding used to count prompt tokens (when tiktoken is installed)
+LLM_TOKENIZER = os.getenv('LLM_TOKENIZER', 'o200k_base')
+
+# Shared request scheduler in front of every Azure OpenAI call: requests/min and
+# tokens/min budgets (0 = unlimited; split evenly across --manifest worker processes)
+# and retries for 429/5xx/connection errors.
+AZURE_OPENAI_RPM = max(0, int(os.getenv('AZURE_OPENAI_RPM', '0')))
+AZURE_OPENAI_TPM = max(0, int(os.getenv('AZURE_OPENAI_TPM', '0')))
+LLM_MAX_RETRIES = max(0, int(os.getenv('LLM_MAX_RETRIES', '5')))
+
+# LLM response cache (data/llm_cache.sqlite unless LLM_CACHE_PATH is set).
+# LLM_FORCE_REGENERATE skips lookups but still stores the fresh responses.
+LLM_CACHE_ENABLED = env_flag('LLM_CACHE_ENABLED', 'true')
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH')
+LLM_CACHE_MAX_ENTRIES = max(1, int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000')))
+LLM_CACHE_TTL_SECONDS = max(0, int(os.getenv('LLM_CACHE_TTL_SECONDS', '0')))
+LLM_FORCE_REGENERATE = env_flag('LLM_FORCE_REGENERATE', 'false')
+
+# Max number of Azure OpenAI calls in flight at once while building a week's script.
+# Set to 1 to get the old one-call-at-a-time behaviour.
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv('LLM_MAX_CONCURRENCY', '4')))
+
+# Backfill pipeline stage limits: ESPN box score fetches in flight and weeks being
+# scripted at once. Publishing stays on the main thread (the RabbitPublisher's pika
+# channel is not thread-safe), so it always runs one message at a time, in week order.
+ESPN_FETCH_CONCURRENCY = max(1, int(os.getenv('ESPN_FETCH_CONCURRENCY', '2')))
+WEEK_CONCURRENCY = max(1, int(os.getenv('WEEK_CONCURRENCY', '2')))
+
+# Batched mode: pack several matchups into one structured LLM request instead of
+# three calls per feature game. Quick games get a line of banter too.
+LLM_BATCH_MODE = env_flag('LLM_BATCH_MODE', 'false')
+LLM_BATCH_SIZE = max(1, int(os.getenv('LLM_BATCH_SIZE', '6')))
+
+# Streaming mode: publish each finished [MATT]:/[JOSE]: segment as its own message
+# while the script is still being generated, instead of one message per week.
+STREAM_SEGMENTS = env_flag('STREAM_SEGMENTS', 'false')
+
+# Segmented mode: publish each finished week as a manifest plus one message per
+# validated speaker segment (at most SEGMENT_MAX_SECONDS of estimated audio each),
+# so several TTS workers can synthesize a show in parallel.
+SEGMENTED_OUTPUT = env_flag('SEGMENTED_OUTPUT', 'false')
+SEGMENT_MAX_SECONDS = max(1.0, float(os.getenv('SEGMENT_MAX_SECONDS', '20')))
+
+# Save every fetched week to data/snapshots so it can be replayed offline with --replay
+SNAPSHOTS_ENABLED = env_flag('SNAPSHOTS_ENABLED', 'true')
+
+# Storyline archive (data/storyline_archive): every generated feature game storyline
+# is archived, keyed by its prompt's hash, with records buffered per append to the
+# league/season's archive file
+STORYLINE_ARCHIVE_ENABLED = env_flag('STORYLINE_ARCHIVE_ENABLED', 'true')
+STORYLINE_ARCHIVE_BATCH_SIZE = max(1, int(os.getenv('STORYLINE_ARCHIVE_BATCH_SIZE', '50')))
+
+# Live in-game mode (--live): polls every LIVE_POLL_MIN_SECONDS..LIVE_POLL_MAX_SECONDS,
+# faster the closer and later the games are. Games within LIVE_CLOSE_MARGIN points
+# count as close; a starter gaining LIVE_PLAYER_SWING points between polls is
+# reported with the next update.
+LIVE_POLL_MIN_SECONDS = max(1, int(os.getenv('LIVE_POLL_MIN_SECONDS', '30')))
+LIVE_POLL_MAX_SECONDS = max(LIVE_POLL_MIN_SECONDS, int(os.getenv('LIVE_POLL_MAX_SECONDS', '300')))
+LIVE_CLOSE_MARGIN = max(1.0, float(os.getenv('LIVE_CLOSE_MARGIN', '15')))
+LIVE_PLAYER_SWING = max(0.0, float(os.getenv('LIVE_PLAYER_SWING', '6')))
+
+# Multi-league mode (--manifest): worker processes the leagues are sharded across
+MULTI_LEAGUE_PROCESSES = max(1, int(os.getenv('MULTI_LEAGUE_PROCESSES', '2')))
+# Seconds a worker waits for another one's write to the shared LLM cache or records
+# database before giving up with 'database is locked'
+SQLITE_BUSY_TIMEOUT_SECONDS = max(0.0, float(os.getenv('SQLITE_BUSY_TIMEOUT_SECONDS', '30')))
+
+# League records engine (data/records.sqlite): feeds broken records into the
+# storyline prompts once the league has RECORDS_MIN_HISTORY_WEEKS weeks of history
+RECORDS_ENABLED = env_flag('RECORDS_ENABLED', 'true')
+RECORDS_MIN_HISTORY_WEEKS = max(0, int(os.getenv('RECORDS_MIN_HISTORY_WEEKS', '3')))
+
+# Telemetry (stage timings, counters): off unless one of these is set
+METRICS_FILE = os.getenv('METRICS_FILE')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+RUN_REPORT_FILE = os.getenv('RUN_REPORT_FILE')
+TELEMETRY_ENABLED = bool(METRICS_FILE or METRICS_PORT or RUN_REPORT_FILE or env_flag('TELEMETRY_ENABLED', 'false'))
@@ -0,0 +1,114 @@
+import threading
+from types import SimpleNamespace
+
+
+class FakeBroker:
+    """
+    In-process stand-in for a RabbitMQ broker, speaking the subset of pika's
+    BlockingConnection/BlockingChannel API the scraper uses. Use it to test
+    RabbitPublisher and to run benchmarks without a real broker.
+
+    `fail_every` makes every Nth publish drop the connection, to exercise
+    reconnects and the outbox. `nack_every` makes the broker nack every Nth
+    publish made under windowed confirms.
+    """
+
+    def __init__(self, fail_every=0, nack_every=0):
+        self.queues = {}
+        self.fail_every = fail_every
+        self.nack_every = nack_every
+        self.publish_count = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            self.connections += 1
+        return FakeConnection(self)
+
+    def messages(self, queue):
+        """The (body, properties) pairs delivered to `queue`, in order."""
+        return list(self.queues.get(queue, []))
+
+
+class FakeConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+        self._events = []
+
+    def channel(self):
+        return FakeChannel(self)
+
+    def process_data_events(self, time_limit=0):
+        if not self.is_open:
+            raise ConnectionError("Connection closed")
+        events, self._events = self._events, []
+        for callback, frame in events:
+            callback(frame)
+
+    def sleep(self, duration):
+        self.process_data_events()
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeChannel:
+    """BlockingChannel look-alike; `_impl` is the async channel windowed confirms are published on."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.durable = {}
+        self._impl = FakeAsyncChannel(self)
+
+    def _check_open(self):
+        if not self.connection.is_open:
+            raise ConnectionError("Connection closed")
+
+    def queue_declare(self, queue, durable=False, **kwargs):
+        self._check_open()
+        with self.broker._lock:
+            self.broker.queues.setdefault(queue, [])
+        self.durable[queue] = durable
+
+    def confirm_delivery(self):
+        self._check_open()
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, mandatory=False):
+        self._check_open()
+        with self.broker._lock:
+            self.broker.publish_count += 1
+            if self.broker.fail_every and self.broker.publish_count % self.broker.fail_every == 0:
+                self.connection.is_open = False
+                raise ConnectionError("Simulated broker connection loss")
+            self.broker.queues.setdefault(routing_key, []).append((body, properties))
+
+
+class FakeAsyncChannel:
+    """
+    The async side of a FakeChannel: publishes return at once, and each
+    delivery's Basic.Ack (or Basic.Nack, for every Nth publish with
+    `nack_every`) arrives on the connection's next process_data_events().
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._on_confirm = None
+        self._delivery_tag = 0
+
+    def confirm_delivery(self, ack_nack_callback, callback=None):
+        self.channel._check_open()
+        self._on_confirm = ack_nack_callback
+        if callback:
+            self.channel.connection._events.append((callback, SimpleNamespace(method=SimpleNamespace())))
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, mandatory=False):
+        self.channel.basic_publish(exchange, routing_key, body, properties, mandatory)
+        self._delivery_tag += 1
+        broker = self.channel.broker
+        nack = broker.nack_every and broker.publish_count % broker.nack_every == 0
+        method = type('Nack' if nack else 'Ack', (), {})()
+        method.delivery_tag, method.multiple = self._delivery_tag, False
+        self.channel.connection._events.append((self._on_confirm, SimpleNamespace(method=method)))
@@ -0,0 +1,248 @@
+"""
+Live in-game mode: python scraper.py --live
+
+Polls the current week's box scores while games are on and publishes short
+Matt & Jose cut-ins, but only for matchups where something worth talking
+about happened since the previous poll:
+
+  - a lead change
+  - a new matchup storyline (NAIL-BITER, BLOWOUT, MONSTER SCORE)
+  - a new notable performance (350 passing yards, 2 TDs, 30-point game...)
+
+Everything else (scores ticking up, a kicker's field goal) is diffed and
+counted but never reaches the LLM or the queue. Starters who gained at
+least LIVE_PLAYER_SWING points since the last poll are passed along as
+context with the update.
+
+The poll interval adapts between LIVE_POLL_MIN_SECONDS and
+LIVE_POLL_MAX_SECONDS: fast when a live game is within LIVE_CLOSE_MARGIN
+points and most of its starters have played, slow between game windows
+and after quiet polls. The session ends once every starter's game is over.
+"""
+import hashlib
+import re
+import time
+from datetime import datetime, timezone
+
+from config import (
+    LIVE_POLL_MIN_SECONDS, LIVE_POLL_MAX_SECONDS, LIVE_CLOSE_MARGIN, LIVE_PLAYER_SWING, QUEUE_MESSAGE_SCHEMA
+)
+from stats_engine import StatsFrame
+from telemetry import telemetry
+
+
+def matchup_key(game):
+    return (game.home_team.team_name, game.away_team.team_name)
+
+
+def _signature(text):
+    # "NAIL-BITER! Just 3.2 points..." and "NAIL-BITER! Just 1.5 points..." are the same storyline
+    return re.sub(r'\d+(\.\d+)?', '#', text)
+
+
+def _game_played(player):
+    # espn_api's BoxPlayer.game_played is 0-100; snapshots and byes count as finished
+    if getattr(player, 'on_bye_week', False): return 100
+    return getattr(player, 'game_played', 100)
+
+
+def snapshot_matchups(box_scores):
+    """One poll's view of the week: {matchup_key: state} for every non-bye game."""
+    games = [g for g in box_scores if not isinstance(g.home_team, int) and not isinstance(g.away_team, int)]
+    frame = StatsFrame(games)
+    notable_by_game = frame.notable_by_game()
+    storylines_by_game = frame.storylines_by_game()
+
+    states = {}
+    for game in games:
+        gid = frame.game_index(game)
+        players, played = {}, []
+        for side, team, lineup in (('home', game.home_team, getattr(game, 'home_lineup', [])),
+                                   ('away', game.away_team, getattr(game, 'away_lineup', []))):
+            for player in lineup:
+                if player.slot_position == 'BE': continue
+                players[(side, player.name)] = (team.team_name, player.points)
+                played.append(_game_played(player))
+
+        if game.home_score > game.away_score: leader = game.home_team.team_name
+        elif game.away_score > game.home_score: leader = game.away_team.team_name
+        else: leader = None
+
+        states[matchup_key(game)] = {
+            'home_team': game.home_team.team_name,
+            'away_team': game.away_team.team_name,
+            'home_score': game.home_score,
+            'away_score': game.away_score,
+            'leader': leader,
+            'storylines': {_signature(s): s for s in storylines_by_game.get(gid, [])},
+            'notable': {_signature(n): n for n in notable_by_game.get(gid, [])},
+            'players': players,
+            'progress': sum(played) / (100.0 * len(played)) if played else 1.0,
+            'in_progress': any(0 < p < 100 for p in played),
+            'final': all(p >= 100 for p in played)
+        }
+    return states
+
+
+def diff_matchup(before, after):
+    """What changed in one matchup between two polls."""
+    lead_change = before['leader'] is not None and after['leader'] is not None and before['leader'] != after['leader']
+
+    swings = []
+    for key, (team, points) in after['players'].items():
+        _, previous = before['players'].get(key, (team, 0))
+        delta = round(points - previous, 2)
+        if LIVE_PLAYER_SWING and abs(delta) >= LIVE_PLAYER_SWING:
+            swings.append({'name': key[1], 'team': team, 'delta': delta, 'points': points})
+    swings.sort(key=lambda s: -abs(s['delta']))
+
+    return {
+        'home_team': after['home_team'],
+        'away_team': after['away_team'],
+        'home_score': after['home_score'],
+        'away_score': after['away_score'],
+        'leader': after['leader'],
+        'lead_change': lead_change,
+        'new_storylines': [text for sig, text in after['storylines'].items() if sig not in before['storylines']],
+        'new_notable': [text for sig, text in after['notable'].items() if sig not in before['notable']],
+        'player_swings': swings,
+        'scores_changed': (before['home_score'], before['away_score']) != (after['home_score'], after['away_score'])
+    }
+
+
+def is_significant(delta):
+    return bool(delta['lead_change'] or delta['new_storylines'] or delta['new_notable'])
+
+
+def live_facts(delta):
+    """The delta as the fact lines the director writes the cut-in from (most important first)."""
+    home, away = delta['home_team'], delta['away_team']
+    lines = []
+    if delta['lead_change']:
+        trailer = away if delta['leader'] == home else home
+        lines.append(f"LEAD CHANGE: {delta['leader']} takes the lead over {trailer}!")
+    lines.append(f"SCORE: {home} {delta['home_score']} - {away} {delta['away_score']}")
+    lines += [f"NEW STORYLINE: {s}" for s in delta['new_storylines']]
+    lines += [f"NEW PERFORMANCE: {n}" for n in delta['new_notable']]
+    for swing in delta['player_swings'][:3]:
+        lines.append(f"SINCE LAST UPDATE: {swing['name']} ({swing['team']}) {swing['delta']:+.1f} pts, now {swing['points']}")
+    return "\n".join(lines)
+
+
+def poll_interval(states, quiet_polls=0):
+    """
+    Seconds until the next poll. Any game in progress pulls the interval
+    down from the max; a close game late in the day pulls it to the min.
+    Each poll in a row with no score changes stretches it back out.
+    """
+    live = [s for s in states.values() if s['in_progress']]
+    if not live:
+        return LIVE_POLL_MAX_SECONDS
+
+    def urgency(state):
+        closeness = max(0.0, 1.0 - abs(state['home_score'] - state['away_score']) / LIVE_CLOSE_MARGIN)
+        return 0.25 + 0.75 * closeness * (0.5 + 0.5 * state['progress'])
+
+    interval = LIVE_POLL_MAX_SECONDS - (LIVE_POLL_MAX_SECONDS - LIVE_POLL_MIN_SECONDS) * max(urgency(s) for s in live)
+    return round(min(LIVE_POLL_MAX_SECONDS, interval * (1 + 0.5 * quiet_polls)), 1)
+
+
+def publish_live_update(publisher, week, short_name, delta, script, idempotency_key=None):
+    """One cut-in, shaped like a GameStatMessage for its matchup."""
+    message = {
+        "week": week,
+        "shortName": short_name,
+        "home_team": delta['home_team'], "home_score": delta['home_score'],
+        "away_team": delta['away_team'], "away_score": delta['away_score'],
+        "storylines": delta['new_storylines'] + delta['new_notable'],
+        "ai_recap": script,
+        "live": True,
+        "lead_change": delta['lead_change'],
+        "player_swings": delta['player_swings']
+    }
+    if QUEUE_MESSAGE_SCHEMA == 'legacy':
+        message.update(home_roster=[], away_roster=[])
+    if idempotency_key:
+        message["idempotency_key"] = idempotency_key
+    with telemetry.span("publish"):
+        publisher.publish(message, message_id=idempotency_key)
+        publisher.flush()
+
+
+class LiveSession:
+    """
+    Polls one league week and publishes cut-ins for significant deltas.
+    `key_prefix` (e.g. "<league>-<year>") makes idempotency keys; a cut-in
+    is keyed by its matchup and scores, so a restarted session re-sending
+    the same update is deduplicated downstream.
+    """
+
+    def __init__(self, league, week, director, publisher, key_prefix=None):
+        self.league = league
+        self.week = week
+        self.director = director
+        self.publisher = publisher
+        self.key_prefix = key_prefix
+        self.states = None
+        self.quiet_polls = 0
+        self.published = 0
+
+    def poll(self, llm_pool):
+        """Fetches, diffs and publishes once. Returns the number of cut-ins published."""
+        with telemetry.span("live_poll"):
+            with telemetry.span("espn_fetch"):
+                box_scores = self.league.box_scores(self.week)
+            states = snapshot_matchups(box_scores)
+        telemetry.incr("live_polls_total")
+
+        previous, self.states = self.states, states
+        if previous is None:
+            print(f"📡 Live: watching {len(states)} Week {self.week} matchups...")
+            return 0
+
+        deltas = [diff_matchup(previous[key], state) for key, state in states.items() if key in previous]
+        self.quiet_polls = 0 if any(d['scores_changed'] for d in deltas) else self.quiet_polls + 1
+
+        significant = [d for d in deltas if is_significant(d)]
+        telemetry.incr("live_deltas_skipped_total", sum(1 for d in deltas if d['scores_changed'] and not is_significant(d)))
+        if not significant:
+            return 0
+
+        # Cut-ins are written concurrently and published in matchup order
+        futures = [llm_pool.submit(self.director.generate_live_update, d['home_team'], d['away_team'], live_facts(d))
+                   for d in significant]
+        stamp = datetime.now(timezone.utc).strftime('%a%H%M%S')
+        for index, (delta, future) in enumerate(zip(significant, futures)):
+            print(f"   ⚡ LIVE: {live_facts(delta).splitlines()[0]}")
+            self.publish(delta, future.result(), f"Week_{self.week}_Live_{stamp}_{index:02d}")
+        telemetry.incr("live_updates_total", len(significant))
+        return len(significant)
+
+    def publish(self, delta, script, short_name):
+        idempotency_key = None
+        if self.key_prefix:
+            digest = hashlib.sha256(repr((delta['home_team'], delta['away_team'], delta['home_score'], delta['away_score'])).encode('utf-8')).hexdigest()
+            idempotency_key = f"{self.key_prefix}-week{self.week}-live-{digest[:16]}"
+        publish_live_update(self.publisher, self.week, short_name, delta, script, idempotency_key)
+        self.published += 1
+
+    def finished(self):
+        return self.states is not None and all(s['final'] for s in self.states.values())
+
+    def run(self, llm_pool, max_polls=None, sleep=time.sleep):
+        """Polls until every game is final (or `max_polls` polls). Returns the number of cut-ins published."""
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            try:
+                self.poll(llm_pool)
+            except Exception as e:
+                print(f"⚠️ Live poll failed: {e}")
+                telemetry.incr("live_poll_errors_total")
+            if self.finished():
+                print(f"🏁 Live: every Week {self.week} game is final.")
+                break
+            interval = poll_interval(self.states or {}, self.quiet_polls)
+            print(f"   ⏳ Next live poll in {interval:.0f}s")
+            sleep(interval)
+        return self.published
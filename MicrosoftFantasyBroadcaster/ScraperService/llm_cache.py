@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import (
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, LLM_FORCE_REGENERATE,
+    SQLITE_BUSY_TIMEOUT_SECONDS
+)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "data", "llm_cache.sqlite")
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of chat completion responses, shared by every LLM call
+    in the scraper (BroadcastDirector and StorylineGenerator).
+
+    Entries are keyed by a hash of (deployment, system message, prompt,
+    temperature, max_tokens) and stored in a small SQLite file so they
+    survive between runs. The cache holds at most `max_entries` responses and
+    evicts the least recently used ones first. `ttl_seconds` (0 = forever)
+    expires old entries, and `force_regenerate` skips lookups while still
+    storing the fresh responses.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5000, ttl_seconds=0, force_regenerate=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.force_regenerate = force_regenerate
+
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        if path != ":memory:":
+            # --manifest workers share the file: WAL lets them read while one of them writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " total_tokens INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " last_used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used_at)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(deployment, system_message, prompt, temperature, max_tokens):
+        raw = json.dumps([deployment, system_message, prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached response text for `key`, or None on a miss."""
+        if self.force_regenerate:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content, total_tokens, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row and self.ttl_seconds and now - row[2] > self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            self.tokens_saved += row[1]
+            return row[0]
+
+    def put(self, key, content, total_tokens=0):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, content, total_tokens, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, content, total_tokens or 0, now, now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "tokens_saved": self.tokens_saved}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """
+    Returns the process-wide ResponseCache configured in config.py, or None
+    if LLM_CACHE_ENABLED is turned off.
+    """
+    global _shared_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache(
+                path=LLM_CACHE_PATH or DEFAULT_CACHE_PATH,
+                max_entries=LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                force_regenerate=LLM_FORCE_REGENERATE
+            )
+        return _shared_cache
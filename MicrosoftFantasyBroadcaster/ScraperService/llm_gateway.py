@@ -0,0 +1,174 @@
+import threading
+from types import SimpleNamespace
+
+from config import (
+    AZURE_API_VERSION, AZURE_ENDPOINT, AZURE_KEY,
+    LLM_HTTP_KEEPALIVE, LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_TIMEOUT
+)
+from llm_cache import ResponseCache, get_shared_cache
+from rate_scheduler import PRIORITY_BANTER, estimate_tokens, get_shared_scheduler
+from telemetry import telemetry
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """
+    Returns the process-wide AzureOpenAI client, built on first use.
+
+    The openai SDK (the slowest import in the scraper) is only loaded here, so
+    runs that never reach the API (replays of published weeks, --help) don't
+    pay for it. One client means one keep-alive connection pool, sized by
+    LLM_HTTP_MAX_CONNECTIONS / LLM_HTTP_KEEPALIVE, for every caller.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            import httpx
+            from openai import AzureOpenAI, DefaultHttpxClient
+            _shared_client = AzureOpenAI(
+                azure_endpoint=AZURE_ENDPOINT,
+                api_key=AZURE_KEY,
+                api_version=AZURE_API_VERSION,
+                max_retries=0,  # retries are handled by the shared RequestScheduler
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_HTTP_KEEPALIVE
+                    ),
+                    timeout=LLM_HTTP_TIMEOUT
+                )
+            )
+        return _shared_client
+
+
+def prewarm_client():
+    """Builds the shared client on a background thread, overlapping the openai import with other startup work."""
+    threading.Thread(target=get_shared_client, name="llm-client-prewarm", daemon=True).start()
+
+
+def chat_completion(client, deployment, prompt, system_message=None, temperature=1.0, max_tokens=250,
+                    response_format=None, validate=None, priority=PRIORITY_BANTER):
+    """
+    Single entry point for every Azure OpenAI chat completion the scraper makes.
+
+    Checks the shared response cache first and only calls the API on a miss,
+    through the shared RequestScheduler (rate limits, retries, `priority`).
+    Returns the response text (possibly None/empty). API errors that outlast
+    the retries are raised so each caller keeps its own fallback behaviour.
+    If `validate` is given, only responses it accepts are written to the cache.
+    """
+    cache = get_shared_cache()
+    key = ResponseCache.make_key(deployment, system_message, prompt, temperature, max_tokens)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            telemetry.incr("llm_cache_hits_total")
+            return cached
+        telemetry.incr("llm_cache_misses_total")
+
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+
+    request = {}
+    if response_format:
+        request['response_format'] = response_format
+
+    with telemetry.span("llm_api", stream="false"):
+        response = get_shared_scheduler().run(
+            lambda: client.chat.completions.create(
+                model=deployment,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **request
+            ),
+            priority=priority,
+            estimated_tokens=estimate_tokens(system_message, prompt) + max_tokens
+        )
+    telemetry.incr("llm_requests_total")
+    telemetry.record_usage(getattr(response, "usage", None))
+    content = response.choices[0].message.content
+
+    if cache and content and (validate is None or validate(content)):
+        usage = getattr(response, "usage", None)
+        cache.put(key, content, total_tokens=getattr(usage, "total_tokens", 0))
+    return content
+
+
+def stream_chat_completion(client, deployment, prompt, system_message=None, temperature=1.0, max_tokens=250,
+                           priority=PRIORITY_BANTER):
+    """
+    Streaming variant of chat_completion(): yields the response text in pieces
+    as the model produces it. A cache hit is yielded as a single piece, and the
+    full streamed text is cached once the stream finishes. A stream that fails
+    part way raises after the pieces already yielded, and nothing is cached.
+    """
+    cache = get_shared_cache()
+    key = ResponseCache.make_key(deployment, system_message, prompt, temperature, max_tokens)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            telemetry.incr("llm_cache_hits_total")
+            yield cached
+            return
+        telemetry.incr("llm_cache_misses_total")
+
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+
+    estimated_tokens = estimate_tokens(system_message, prompt) + max_tokens
+    with telemetry.span("llm_api", stream="true"):
+        stream = get_shared_scheduler().run(
+            lambda: client.chat.completions.create(
+                model=deployment,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            ),
+            priority=priority,
+            estimated_tokens=estimated_tokens
+        )
+        parts = []
+        usage = None
+        error = None
+        try:
+            for chunk in stream:
+                # The final chunk carries usage when the deployment reports it for streams
+                usage = getattr(chunk, "usage", None) or usage
+                # Azure sends a leading chunk with content filter results and no choices
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            error = e
+    telemetry.incr("llm_requests_total")
+
+    content = "".join(parts)
+    if usage is None:
+        usage = _estimated_usage(system_message, prompt, content)
+    telemetry.record_usage(usage)
+    get_shared_scheduler().settle_usage(estimated_tokens, usage.total_tokens)
+    if error is not None:
+        # The text so far is only part of a response; the caller decides what the rest is
+        telemetry.incr("llm_stream_errors_total")
+        raise error
+    if cache and content:
+        cache.put(key, content, total_tokens=usage.total_tokens)
+
+
+def _estimated_usage(system_message, prompt, content):
+    """A response.usage stand-in for streams that didn't report one."""
+    prompt_tokens = estimate_tokens(system_message, prompt)
+    completion_tokens = estimate_tokens(content)
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
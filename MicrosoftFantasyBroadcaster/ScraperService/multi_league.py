@@ -0,0 +1,225 @@
+"""
+Multi-league mode: python scraper.py --manifest leagues.json
+
+The manifest lists the leagues to run:
+
+    {
+      "leagues": [
+        {"league_id": 123456, "year": 2025, "name": "Office League"},
+        {"league_id": 654321, "espn_s2": "...", "swid": "{...}", "queue": "game_stats_queue.family"}
+      ]
+    }
+
+`year`, `espn_s2` and `swid` default to ESPN_YEAR / ESPN_S2 / ESPN_SWID, and
+`queue` (the routing key the league's messages are published to) defaults to
+game_stats_queue. Every message also carries league_id/year AMQP headers.
+
+Leagues are dealt round-robin into MULTI_LEAGUE_PROCESSES shards, one worker
+process each. A shard opens one RabbitMQ connection and one Azure OpenAI
+client for all of its leagues, and takes their weeks round-robin (see
+scraper.run_backfill_jobs) so a long backlog in one league doesn't starve
+the rest. AZURE_OPENAI_RPM/TPM are split evenly across the shards.
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from config import (
+    ESPN_S2, SWID, YEAR, QUEUE_NAME, RABBITMQ_HOST, RABBITMQ_DURABLE_QUEUE, RABBITMQ_PERSISTENT,
+    RABBITMQ_CONFIRM_WINDOW, RABBITMQ_ENCODING, SNAPSHOTS_ENABLED, RECORDS_ENABLED, RECORDS_MIN_HISTORY_WEEKS,
+    STORYLINE_ARCHIVE_ENABLED, MULTI_LEAGUE_PROCESSES, AZURE_OPENAI_RPM, AZURE_OPENAI_TPM
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+class LeaguePublisher:
+    """Publishes one league's messages through a shared RabbitPublisher, to the league's routing key."""
+
+    def __init__(self, publisher, routing_key, league_id, year):
+        self.publisher = publisher
+        self.routing_key = routing_key
+        self.headers = {'league_id': league_id, 'year': year}
+
+    def publish(self, message, routing_key=None, message_id=None, headers=None):
+        self.publisher.publish(
+            message,
+            routing_key=routing_key or self.routing_key,
+            message_id=message_id,
+            headers=dict(self.headers, **(headers or {}))
+        )
+
+    def flush(self):
+        self.publisher.flush()
+
+    def idle(self, seconds):
+        self.publisher.idle(seconds)
+
+
+def load_manifest(path):
+    """Reads a league manifest and fills in the defaults for each league."""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    entries = manifest.get('leagues', []) if isinstance(manifest, dict) else manifest
+
+    leagues = []
+    for entry in entries:
+        league_id = int(entry['league_id'])
+        leagues.append({
+            'league_id': league_id,
+            'year': int(entry.get('year', YEAR)),
+            'espn_s2': entry.get('espn_s2', ESPN_S2),
+            'swid': entry.get('swid', SWID),
+            'queue': entry.get('queue', QUEUE_NAME),
+            'name': entry.get('name', f"League {league_id}")
+        })
+    return leagues
+
+
+def shard_leagues(leagues, shards):
+    """Deals leagues into `shards` lists round-robin, keeping manifest order within each."""
+    return [leagues[i::shards] for i in range(shards) if leagues[i::shards]]
+
+
+def shard_share(total, shards):
+    """One shard's even share of a per-minute budget (0 stays unlimited)."""
+    return max(1, total // shards) if total and shards > 1 else total
+
+
+def _open_league(spec, replay):
+    from snapshot_store import SnapshotStore, RecordingLeague, SnapshotLeague
+    snapshots = SnapshotStore(spec['league_id'], spec['year'])
+    if replay:
+        if not snapshots.weeks():
+            print(f"❌ {spec['name']}: no snapshots found at {snapshots.path}.")
+            return None
+        return SnapshotLeague(snapshots)
+    from espn_api.football import League
+    league = League(league_id=spec['league_id'], year=spec['year'], espn_s2=spec['espn_s2'], swid=spec['swid'])
+    return RecordingLeague(league, snapshots) if SNAPSHOTS_ENABLED else league
+
+
+def _shard_path(path, shard_index):
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard_index}{ext}"
+
+
+def run_shard(shard_index, leagues, args, shard_count=1):
+    """Runs one shard's leagues in this process. Returns its publish/LLM stats."""
+    import scraper
+    from checkpoint_store import CheckpointStore
+    from llm_gateway import prewarm_client
+    from publisher import RabbitPublisher, pika_connection_factory
+    from rate_scheduler import configure_shared_scheduler, get_shared_scheduler
+    from records_engine import RecordsEngine
+    from storyline_archive import StorylineArchive
+    from storyline_generator import StorylineGenerator
+    from telemetry import telemetry
+
+    if args.metrics_file or args.report:
+        telemetry.enabled = True
+    # Each shard gets its share of the Azure quota
+    configure_shared_scheduler(
+        requests_per_minute=shard_share(AZURE_OPENAI_RPM, shard_count),
+        tokens_per_minute=shard_share(AZURE_OPENAI_TPM, shard_count)
+    )
+    prewarm_client()
+
+    director = scraper.BroadcastDirector()
+    try:
+        story_gen = StorylineGenerator()
+    except ValueError as e:
+        print(f"⚠️ AI Generator Error: {e}")
+        story_gen = None
+
+    publisher = RabbitPublisher(
+        pika_connection_factory(RABBITMQ_HOST), QUEUE_NAME,
+        durable=RABBITMQ_DURABLE_QUEUE,
+        persistent=RABBITMQ_PERSISTENT,
+        confirm_window=RABBITMQ_CONFIRM_WINDOW,
+        encoding=RABBITMQ_ENCODING,
+        # Shards publish concurrently, so each spills to its own outbox
+        outbox_path=os.path.join(DATA_DIR, f"outbox-shard{shard_index}.jsonl")
+    )
+    publisher.connect()
+
+    jobs, records_engines, archives = [], [], []
+    for spec in leagues:
+        print(f"🏈 [shard {shard_index}] Connecting to {spec['name']} ({spec['league_id']}, {spec['year']})...")
+        try:
+            league = _open_league(spec, args.replay)
+        except Exception as e:
+            print(f"❌ {spec['name']}: failed to connect to ESPN: {e}")
+            continue
+        if league is None: continue
+
+        weeks, force = scraper.select_weeks(args, league.current_week)
+        records = None
+        if RECORDS_ENABLED:
+            records = RecordsEngine(spec['league_id'], spec['year'], min_history_weeks=RECORDS_MIN_HISTORY_WEEKS)
+            records_engines.append(records)
+        archive = None
+        if STORYLINE_ARCHIVE_ENABLED:
+            archive = StorylineArchive(spec['league_id'], spec['year'])
+            archives.append(archive)
+        jobs.append(scraper.LeagueJob(
+            league, weeks,
+            LeaguePublisher(publisher, spec['queue'], spec['league_id'], spec['year']),
+            checkpoints=CheckpointStore.for_league(spec['league_id'], spec['year']),
+            force=force,
+            records=records,
+            name=spec['name'],
+            archive=archive
+        ))
+
+    total_weeks = sum(len(job.weeks) for job in jobs)
+    print(f"📊 [shard {shard_index}] {len(jobs)} league(s), {total_weeks} week(s)...")
+    try:
+        if args.stream:
+            scraper.run_streaming_jobs(jobs, director, story_gen)
+        else:
+            scraper.run_backfill_jobs(jobs, director, story_gen, segmented=args.segmented)
+    finally:
+        for records in records_engines:
+            records.close()
+        # Pool workers exit without running atexit hooks, so buffered storylines are flushed here
+        for archive in archives:
+            archive.close()
+        publisher.close()
+
+    if args.metrics_file:
+        telemetry.write_prometheus(_shard_path(args.metrics_file, shard_index))
+    if args.report:
+        telemetry.write_report(_shard_path(args.report, shard_index))
+
+    return dict(publisher.stats(), shard=shard_index, leagues=len(jobs), weeks=total_weeks,
+                **get_shared_scheduler().stats())
+
+
+def run_manifest(args):
+    """Runs every league in args.manifest across up to MULTI_LEAGUE_PROCESSES worker processes."""
+    leagues = load_manifest(args.manifest)
+    if not leagues:
+        print(f"❌ No leagues in {args.manifest}")
+        return []
+
+    shards = shard_leagues(leagues, min(MULTI_LEAGUE_PROCESSES, len(leagues)))
+    print(f"🗂️ {len(leagues)} league(s) in {len(shards)} shard(s)")
+    if len(shards) == 1:
+        results = [run_shard(0, shards[0], args)]
+    else:
+        # spawn: workers start clean instead of inheriting this process's threads and connections
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(run_shard, i, shard, args, len(shards)) for i, shard in enumerate(shards)]
+            results = []
+            for i, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"❌ Shard {i} failed: {e}")
+
+    for r in results:
+        print(f"📨 Shard {r['shard']}: {r['leagues']} league(s), {r['weeks']} week(s), {r['published']} published, "
+              f"{r['spilled']} spilled, ~{r['tokens_used']} tokens, {r['retries']} retries")
+    return results
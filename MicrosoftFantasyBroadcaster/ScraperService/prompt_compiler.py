@@ -0,0 +1,199 @@
+import re
+from collections import namedtuple
+
+from config import LLM_PROMPT_LAYOUT, LLM_PROMPT_TOKEN_BUDGET, LLM_RECAP_MAX_TOKENS, LLM_TOKENIZER
+from stats_engine import notable_weight, storyline_weight
+from telemetry import telemetry
+
+# --- STATIC TEMPLATE ---
+# The storyline prompt is: preamble + matchup facts + instructions. Only the facts
+# and the loser's name change per call; everything else is compiled once, below.
+# CRITICAL: This text preserves the specific "Trash Talk" personality from the
+# original project. Do not modify the prompt text without testing.
+RECAP_PREAMBLE = """You are a fantasy football analyst writing entertaining weekly recaps. Think Pat McAfee Show or Stephen A. Smith energy - ANIMATED, OPINIONATED, and FUN!
+
+"""
+
+RECAP_INSTRUCTIONS = """
+Write a 3-4 paragraph recap that sounds like you're calling this game on a sports talk show. 
+
+MANDATORY STYLE RULES:
+❌ NO formal sports journalism language
+❌ NO "this writer thinks" or "one could argue"  
+❌ NO boring, neutral descriptions
+✅ USE casual language like you're talking to your fantasy league group chat
+✅ USE trash talk (roast the losing team!)
+✅ USE hype (celebrate the winning team's dominance!)
+✅ USE rhetorical questions for effect
+✅ USE present tense for more energy ("Mahomes TORCHES the defense" not "Mahomes torched")
+
+TONE EXAMPLES:
+- "Are you KIDDING me right now?!"
+- "This wasn't a matchup, this was a CLINIC"
+- "Someone check on [loser's team], they might need therapy after this"
+- "Let's talk about [player name] for a second - ABSOLUTELY UNCONSCIOUS"
+- "If you started [player], you're eating GOOD this week"
+
+STRUCTURE:
+Paragraph 1: Open with the VIBE of the game (blowout? nail-biter? upset?). Make it dramatic. Winner gets hyped, loser gets roasted (friendly but spicy).
+
+Paragraph 2-3: Spotlight 2-3 key performances. Use specific stats. Build the narrative - who was the MVP? Who disappeared? Any unexpected heroes or brutal busts?
+
+Paragraph 4: Close with either:
+- A final zinger at the loser
+- Props to an insane individual performance  
+- Forward-looking trash talk ("Good luck next week, {loser_name}")
+- Or if records were broken, END on that hype
+
+LANGUAGE STYLE:
+- Short, punchy sentences mixed with longer ones
+- Contractions (wasn't, didn't, can't)
+- Slang is ENCOURAGED (cooking, eating, bodied, torched, etc.)
+- All caps for EMPHASIS on key moments
+- Sentence fragments. Are fine. For effect.
+
+DO NOT:
+- Use asterisks or markdown formatting
+- Write in past tense throughout (mix it up with present tense for energy)
+- Be neutral or boring
+- Apologize or hedge ("perhaps", "maybe", "might have")
+
+Remember: The goal is ENTERTAINMENT. Make the winner feel like champions and the loser laugh at themselves!
+"""
+
+_INSTRUCTIONS_HEAD, _INSTRUCTIONS_TAIL = RECAP_INSTRUCTIONS.split("{loser_name}")
+
+# Static-first layout: the instructions move into the system message ahead of
+# any per-matchup text, so every storyline request starts with the same prefix.
+STATIC_SYSTEM_MESSAGE = RECAP_PREAMBLE + RECAP_INSTRUCTIONS.strip("\n").replace("{loser_name}", "[loser's team]") + "\n"
+
+LAYOUTS = ('inline', 'static_first')
+
+# Output budgets per requested format. A 3-4 paragraph recap runs ~300-450 words.
+OUTPUT_TOKEN_LIMITS = {
+    'recap': LLM_RECAP_MAX_TOKENS
+}
+
+# Never trim notable performances below this many before touching the storylines
+MIN_NOTABLE_PERFORMANCES = 2
+
+CompiledPrompt = namedtuple('CompiledPrompt', 'system_message prompt prompt_tokens max_tokens trimmed')
+
+# --- TOKEN COUNTING ---
+TIKTOKEN_ENCODING = LLM_TOKENIZER
+_WORD_PIECES = re.compile(r"[A-Za-z]+|[0-9]{1,3}|[^\sA-Za-z0-9]")
+_encoder = None
+
+
+def _get_encoder():
+    """tiktoken's encoder when it is installed and its vocabulary is cached locally, else False."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception:
+            _encoder = False
+    return _encoder
+
+
+def count_tokens(text):
+    """
+    Offline token count. Exact with tiktoken; otherwise an estimate (one token
+    per common word plus one per extra 8 letters, numbers in 3-digit pieces,
+    punctuation one each, emoji two) that errs on the high side, so a
+    budget is never overshot by much.
+    """
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text))
+    total = 0
+    for piece in _WORD_PIECES.findall(text):
+        if piece[0].isalpha():
+            total += 1 + len(piece) // 8
+        else:
+            total += 1 if piece.isascii() else 2
+    return total
+
+
+_static_tokens = {}
+
+
+def _static_token_count(layout):
+    if layout not in _static_tokens:
+        if layout == 'static_first':
+            _static_tokens[layout] = count_tokens(STATIC_SYSTEM_MESSAGE)
+        else:
+            _static_tokens[layout] = count_tokens(RECAP_PREAMBLE) + count_tokens(RECAP_INSTRUCTIONS.replace("{loser_name}", ""))
+    return _static_tokens[layout]
+
+
+def _loser_name(stats):
+    if stats['team_1']['score'] > stats['team_2']['score']:
+        return stats['team_2']['team_name']
+    return stats['team_1']['team_name']
+
+
+def _drop_weakest(facts, weight):
+    # Lists come in lineup order (home team first), so rank by how big each fact is;
+    # on a tie the later one goes
+    facts.remove(min(reversed(facts), key=weight))
+
+
+def _trim_one(notable, storylines):
+    """Drops the lowest-priority fact: the smallest notable performance, then the smallest storyline."""
+    if len(notable) > MIN_NOTABLE_PERFORMANCES:
+        _drop_weakest(notable, notable_weight)
+    elif len(storylines) > 1:
+        _drop_weakest(storylines, storyline_weight)
+    elif notable:
+        _drop_weakest(notable, notable_weight)
+    elif storylines:
+        storylines.pop()
+    else:
+        return False
+    return True
+
+
+def compile_recap_prompt(format_facts, stats, notable_performances, storylines, records,
+                         token_budget=LLM_PROMPT_TOKEN_BUDGET, layout=LLM_PROMPT_LAYOUT):
+    """
+    Builds the storyline request for one matchup.
+
+    `format_facts(stats, notable, storylines, records)` renders the matchup
+    facts block (StorylineGenerator.format_matchup_facts). If the prompt would
+    go over `token_budget` (0 = no limit), notable performances and then
+    storylines are dropped, smallest first (see stats_engine.notable_weight),
+    until it fits; records are never dropped. Without trimming, the 'inline' layout is byte-for-byte
+    the prompt format_stats_for_prompt has always produced.
+
+    Returns a CompiledPrompt(system_message, prompt, prompt_tokens, max_tokens, trimmed).
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown prompt layout '{layout}' (expected one of {', '.join(LAYOUTS)})")
+    loser_name = _loser_name(stats)
+    notable = list(notable_performances)
+    storylines = list(storylines)
+
+    static_tokens = _static_token_count(layout)
+    if layout == 'inline':
+        static_tokens += count_tokens(loser_name)
+
+    trimmed = 0
+    while True:
+        facts = format_facts(stats, notable, storylines, records)
+        prompt_tokens = static_tokens + count_tokens(facts)
+        if not token_budget or prompt_tokens <= token_budget or not _trim_one(notable, storylines):
+            break
+        trimmed += 1
+
+    if trimmed:
+        telemetry.incr("prompt_facts_trimmed_total", trimmed)
+        print(f"   ✂️ Trimmed {trimmed} fact(s) to fit the {token_budget}-token prompt budget")
+
+    if layout == 'static_first':
+        return CompiledPrompt(STATIC_SYSTEM_MESSAGE, facts, prompt_tokens, OUTPUT_TOKEN_LIMITS['recap'], trimmed)
+    prompt = RECAP_PREAMBLE + facts + _INSTRUCTIONS_HEAD + loser_name + _INSTRUCTIONS_TAIL
+    return CompiledPrompt(None, prompt, prompt_tokens, OUTPUT_TOKEN_LIMITS['recap'], trimmed)
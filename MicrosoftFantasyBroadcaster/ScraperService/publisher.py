@@ -0,0 +1,303 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+
+DEFAULT_OUTBOX_PATH = os.path.join(os.path.dirname(__file__), "data", "outbox.jsonl")
+
+ENCODINGS = ('json', 'json+gzip', 'msgpack')
+
+
+def encode_message(message, encoding='json'):
+    """Returns (body, content_type, content_encoding) for a message dict."""
+    if encoding == 'json':
+        return json.dumps(message, separators=(',', ':')).encode('utf-8'), 'application/json', None
+    if encoding == 'json+gzip':
+        return gzip.compress(json.dumps(message, separators=(',', ':')).encode('utf-8')), 'application/json', 'gzip'
+    if encoding == 'msgpack':
+        import msgpack
+        return msgpack.packb(message, use_bin_type=True), 'application/x-msgpack', None
+    raise ValueError(f"Unknown message encoding '{encoding}' (expected one of {', '.join(ENCODINGS)})")
+
+
+def decode_message(body, content_type='application/json', content_encoding=None):
+    if content_encoding == 'gzip':
+        body = gzip.decompress(body)
+    if content_type == 'application/x-msgpack':
+        import msgpack
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body.decode('utf-8'))
+
+
+def pika_connection_factory(host):
+    def connect():
+        import pika
+        return pika.BlockingConnection(pika.ConnectionParameters(host=host))
+    return connect
+
+
+def _basic_properties(**kwargs):
+    try:
+        import pika
+        return pika.BasicProperties(**kwargs)
+    except ImportError:
+        # In-process fakes don't need real pika properties
+        from types import SimpleNamespace
+        return SimpleNamespace(**kwargs)
+
+
+class RabbitPublisher:
+    """
+    Reliable publisher for game_stats_queue (or any other queue).
+
+    - Publisher confirms: with confirm_window=1 every publish waits for its
+      confirm. With a larger window, the whole window is published without
+      waiting and its acks are collected in one go. pika's BlockingChannel
+      waits for a confirm after every message, so windows are published on
+      its async channel (`_impl`, private to pika; requirements.txt pins the
+      tested range) and the acks pumped off the connection. A channel without
+      one falls back to a blocking confirm per message.
+      A nack or a missing ack fails the window, which is then retried
+      whole (consumers drop the repeats by message_id/idempotency_key).
+    - Persistent delivery (delivery_mode=2) and an optional durable queue.
+      The queue has to be declared the same way the BroadcasterService
+      consumer declares it.
+    - Reconnects with backoff when the broker drops. A window that still
+      can't be confirmed after `max_retries` is spilled to a local JSONL
+      outbox, which is republished first on the next connect.
+    - Heartbeats: idle() waits while servicing the connection, and a publish
+      after a long quiet spell first checks the connection and quietly
+      reopens it if the broker has dropped it in the meantime.
+    - Optional compact encodings (gzip'd JSON, msgpack) flagged through
+      content_type/content_encoding.
+
+    `connection_factory` returns a pika-style BlockingConnection; pass
+    fake_rabbitmq.FakeBroker().connect to run against an in-process fake.
+    """
+
+    def __init__(self, connection_factory, queue, durable=False, persistent=True, confirm_window=1,
+                 encoding='json', outbox_path=DEFAULT_OUTBOX_PATH, max_retries=3, retry_delay=1.0,
+                 confirm_timeout=30.0, idle_check_seconds=10.0):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown message encoding '{encoding}' (expected one of {', '.join(ENCODINGS)})")
+        if encoding == 'msgpack':
+            try:
+                import msgpack  # noqa: F401
+            except ImportError:
+                raise ValueError("RABBITMQ_ENCODING=msgpack needs the msgpack package (pip install msgpack)")
+        self.connection_factory = connection_factory
+        self.queue = queue
+        self.durable = durable
+        self.persistent = persistent
+        self.confirm_window = max(1, confirm_window)
+        self.encoding = encoding
+        self.outbox_path = outbox_path
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.confirm_timeout = confirm_timeout
+        self.idle_check_seconds = idle_check_seconds
+
+        self.published = 0
+        self.spilled = 0
+        self.reconnects = 0
+
+        self._connection = None
+        self._channel = None
+        self._declared = set()
+        self._pending = []
+        self._lock = threading.RLock()
+        self._confirms = None
+        self._delivery_tag = 0
+        self._windowed = False
+        self._last_io = time.monotonic()
+
+    # --- connection handling ---
+    def connect(self):
+        with self._lock:
+            self._open()
+            self._drain_outbox()
+
+    def _open(self):
+        self._connection = self.connection_factory()
+        self._channel = self._connection.channel()
+        self._declared = set()
+        self._declare(self.queue)
+        self._confirms = {}
+        self._delivery_tag = 0
+        impl = getattr(self._channel, '_impl', None)
+        self._windowed = self.confirm_window > 1 and hasattr(impl, 'confirm_delivery') and hasattr(impl, 'basic_publish')
+        if self.confirm_window > 1 and not self._windowed:
+            print("   ⚠️ This pika channel has no async side, confirming each message on its own")
+        if self._windowed:
+            ready = []
+            self._channel._impl.confirm_delivery(self._on_confirm, callback=ready.append)
+            self._wait_for(lambda: ready, "Confirm.SelectOk")
+        else:
+            self._channel.confirm_delivery()
+        self._last_io = time.monotonic()
+
+    def _on_confirm(self, frame):
+        # Basic.Ack / Basic.Nack; `multiple` settles every tag up to this one
+        method = frame.method
+        acked = type(method).__name__ == 'Ack'
+        tags = [t for t in self._confirms if t <= method.delivery_tag] if method.multiple else [method.delivery_tag]
+        for tag in tags:
+            if tag in self._confirms:
+                self._confirms[tag] = acked
+
+    def _wait_for(self, done, what):
+        deadline = time.monotonic() + self.confirm_timeout
+        while not done():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {what}")
+            self._connection.process_data_events(time_limit=0.05)
+
+    def _check_idle(self):
+        """After a quiet spell, makes sure the broker hasn't dropped the connection before publishing on it."""
+        if self._channel is None or time.monotonic() - self._last_io < self.idle_check_seconds:
+            return
+        try:
+            self._connection.process_data_events(time_limit=0)
+            if not self._connection.is_open:
+                raise ConnectionError("Connection closed while idle")
+        except Exception as e:
+            print(f"   🔌 RabbitMQ connection went stale while idle ({e}), reopening...")
+            self._reset()
+            self._open()
+
+    def idle(self, seconds):
+        """Waits `seconds` while answering heartbeats, so long pauses don't drop the connection."""
+        with self._lock:
+            if self._connection is not None and self._connection.is_open:
+                try:
+                    self._connection.sleep(seconds)
+                    self._last_io = time.monotonic()
+                    return
+                except Exception as e:
+                    print(f"   🔌 RabbitMQ connection dropped while idle ({e})")
+                    self._reset()
+        time.sleep(seconds)
+
+    def _declare(self, queue):
+        if queue not in self._declared:
+            self._channel.queue_declare(queue=queue, durable=self.durable)
+            self._declared.add(queue)
+
+    def _reset(self):
+        try:
+            if self._connection is not None and self._connection.is_open:
+                self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+        self._channel = None
+
+    # --- publishing ---
+    def publish(self, message, routing_key=None, message_id=None, headers=None):
+        """Queues a message dict for delivery; the window is sent once it fills up."""
+        with self._lock:
+            self._pending.append({
+                'routing_key': routing_key or self.queue,
+                'message': message,
+                'message_id': message_id,
+                'headers': headers
+            })
+            if len(self._pending) >= self.confirm_window:
+                self.flush()
+
+    def flush(self):
+        """Sends and confirms everything pending, retrying and spilling as needed."""
+        with self._lock:
+            if not self._pending:
+                return
+            window, self._pending = self._pending, []
+
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if self._channel is None:
+                        self._open()
+                        self.reconnects += 1
+                    else:
+                        self._check_idle()
+                    self._send(window)
+                    self.published += len(window)
+                    return
+                except Exception as e:
+                    print(f"   ⚠️ RabbitMQ publish failed ({e}), attempt {attempt + 1}/{self.max_retries + 1}")
+                    self._reset()
+                    if attempt < self.max_retries:
+                        time.sleep(self.retry_delay * (2 ** attempt) * (0.5 + random.random()))
+
+            self._spill(window)
+
+    def _send(self, window):
+        # Windows go out on the async channel and are confirmed together; single messages block on their own confirm
+        channel = self._channel._impl if self._windowed else self._channel
+        tags = []
+        for entry in window:
+            self._declare(entry['routing_key'])
+            body, content_type, content_encoding = encode_message(entry['message'], self.encoding)
+            properties = _basic_properties(
+                content_type=content_type,
+                content_encoding=content_encoding,
+                delivery_mode=2 if self.persistent else 1,
+                message_id=entry['message_id'],
+                headers=entry['headers']
+            )
+            channel.basic_publish(exchange='', routing_key=entry['routing_key'], body=body, properties=properties)
+            if self._windowed:
+                # The broker numbers confirms per channel, starting at 1
+                self._delivery_tag += 1
+                self._confirms[self._delivery_tag] = None
+                tags.append(self._delivery_tag)
+
+        if tags:
+            self._wait_for(lambda: all(self._confirms[t] is not None for t in tags), f"{len(tags)} publisher confirms")
+            nacked = sum(1 for t in tags if not self._confirms.pop(t))
+            if nacked:
+                raise ConnectionError(f"Broker nacked {nacked} of {len(tags)} message(s)")
+        self._last_io = time.monotonic()
+
+    # --- outbox ---
+    def _spill(self, window):
+        os.makedirs(os.path.dirname(os.path.abspath(self.outbox_path)), exist_ok=True)
+        with open(self.outbox_path, 'a', encoding='utf-8') as f:
+            for entry in window:
+                f.write(json.dumps(entry) + "\n")
+        self.spilled += len(window)
+        print(f"   💾 Spilled {len(window)} unconfirmed message(s) to {self.outbox_path}")
+
+    def _drain_outbox(self):
+        # A leftover .draining file means an earlier drain was interrupted
+        draining_path = self.outbox_path + ".draining"
+        entries = []
+        for path in (draining_path, self.outbox_path):
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    entries.extend(json.loads(line) for line in f if line.strip())
+        if not entries:
+            return
+
+        with open(draining_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        if os.path.exists(self.outbox_path):
+            os.remove(self.outbox_path)
+
+        print(f"📤 Republishing {len(entries)} message(s) from the outbox...")
+        for entry in entries:
+            self._pending.append(entry)
+            if len(self._pending) >= self.confirm_window:
+                self.flush()
+        self.flush()
+        os.remove(draining_path)
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._reset()
+
+    def stats(self):
+        return {'published': self.published, 'spilled': self.spilled, 'reconnects': self.reconnects}
@@ -0,0 +1,221 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from config import AZURE_OPENAI_RPM, AZURE_OPENAI_TPM, LLM_MAX_RETRIES
+from telemetry import telemetry
+
+# Lower runs first when the scheduler is short on quota
+PRIORITY_RECAP = 0       # feature game storylines (the facts everything else is built on)
+PRIORITY_BANTER = 1      # feature game banter and batched matchup requests
+PRIORITY_TRANSITION = 2  # "next up..." transitions
+PRIORITY_FLAVOR = 3      # intro / outro
+
+RETRYABLE_STATUS = (408, 409, 429)
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute. A rate of 0 means unlimited."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.per_minute:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if they already are)."""
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        # A single request bigger than the whole bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.per_minute
+
+    def take(self, amount):
+        if self.per_minute:
+            self.level -= amount
+
+    def adjust(self, amount):
+        """Gives back (positive) or charges extra (negative) units after the fact."""
+        if self.per_minute:
+            self.level = min(self.capacity, self.level + amount)
+
+
+def _retry_after(error):
+    """Seconds the service asked us to wait, from Retry-After(-ms) headers, if any."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _is_retryable(error):
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    try:
+        from openai import APIConnectionError
+    except ImportError:
+        return False
+    return isinstance(error, APIConnectionError)
+
+
+class RequestScheduler:
+    """
+    Shared gate in front of every Azure OpenAI request.
+
+    - Token buckets for requests/min and tokens/min. A request reserves its
+      prompt estimate + max_tokens up front, and the difference is settled
+      against response.usage once the response arrives.
+    - A priority queue: when quota is short, waiting requests go out in
+      priority order (feature recaps first, intro/outro flavor last), FIFO
+      within a priority.
+    - Retries 429/408/5xx/connection errors with full-jitter exponential
+      backoff, honouring Retry-After. A 429 also pauses the whole queue
+      for that long so other callers don't keep hitting the limit.
+
+    Errors that survive the retries are re-raised so callers keep their
+    existing fallbacks.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.retries = 0
+        self.rate_limited = 0
+        self.tokens_used = 0
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+
+    def run(self, request_fn, priority=PRIORITY_BANTER, estimated_tokens=0):
+        """Calls request_fn() under the rate limits, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(priority, estimated_tokens)
+            try:
+                response = request_fn()
+            except Exception as e:
+                # A rejected request doesn't count against the token budget
+                with self._cond:
+                    self.tokens.adjust(estimated_tokens)
+                    self._cond.notify_all()
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                with self._cond:
+                    self.retries += 1
+                    if getattr(e, 'status_code', None) == 429:
+                        self.rate_limited += 1
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                telemetry.incr("llm_retries_total", status=getattr(e, 'status_code', 'connection'))
+                print(f"   ⏳ Azure OpenAI {getattr(e, 'status_code', 'connection error')}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                continue
+
+            self._settle(response, estimated_tokens)
+            return response
+
+    def _acquire(self, priority, estimated_tokens):
+        with self._cond:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            while True:
+                now = time.monotonic()
+                if self._waiting[0] == entry:
+                    wait = max(
+                        self._paused_until - now,
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(estimated_tokens, now)
+                    )
+                    if wait <= 0:
+                        heapq.heappop(self._waiting)
+                        self.requests.take(1)
+                        self.tokens.take(estimated_tokens)
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+    def _settle(self, response, estimated_tokens):
+        usage = getattr(response, 'usage', None)
+        used = getattr(usage, 'total_tokens', None)
+        with self._cond:
+            # A stream has no usage yet; it is charged the estimate until settle_usage()
+            self.tokens_used += estimated_tokens
+            self._cond.notify_all()
+        if used is not None:
+            self.settle_usage(estimated_tokens, used)
+
+    def settle_usage(self, estimated_tokens, used):
+        """Replaces a request's up-front estimate with the tokens it actually used."""
+        with self._cond:
+            self.tokens_used += used - estimated_tokens
+            self.tokens.adjust(estimated_tokens - used)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {'retries': self.retries, 'rate_limited': self.rate_limited, 'tokens_used': self.tokens_used}
+
+
+def estimate_tokens(*texts):
+    """Rough prompt size (~4 characters per token), for reserving budget up front."""
+    return sum(len(text or "") for text in texts) // 4 + 1
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler():
+    """Returns the process-wide RequestScheduler, built from config.py on first use."""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RequestScheduler(
+                requests_per_minute=AZURE_OPENAI_RPM,
+                tokens_per_minute=AZURE_OPENAI_TPM,
+                max_retries=LLM_MAX_RETRIES
+            )
+        return _shared_scheduler
+
+
+def configure_shared_scheduler(requests_per_minute=AZURE_OPENAI_RPM, tokens_per_minute=AZURE_OPENAI_TPM):
+    """
+    Replaces the process-wide RequestScheduler with one using these budgets
+    (e.g. a multi-league worker's share of the quota). Call before any LLM
+    request is made.
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        _shared_scheduler = RequestScheduler(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_retries=LLM_MAX_RETRIES
+        )
+        return _shared_scheduler
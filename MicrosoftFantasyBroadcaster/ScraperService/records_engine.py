@@ -0,0 +1,314 @@
+import os
+import sqlite3
+import threading
+
+from config import SQLITE_BUSY_TIMEOUT_SECONDS
+from stats_engine import STAT_FIELDS, player_lines
+
+DEFAULT_RECORDS_PATH = os.path.join(os.path.dirname(__file__), "data", "records.sqlite")
+
+# Per-player metrics kept for every active lineup slot (zero values are not stored)
+PLAYER_METRICS = ('points',) + STAT_FIELDS + ('receivingReceptions', 'totalTouchdowns')
+
+# League records, the same set the BroadcasterService's LeagueHistoryService
+# tracks: (record key, 'player' or 'team', metric, positions or None for all,
+# 'max' or 'min', message).
+RECORD_RULES = (
+    ('highest_team_score', 'team', 'points', None, 'max', "🏆 NEW RECORD! {holder} scored {value} points - highest ever!"),
+    ('lowest_team_score', 'team', 'points', None, 'min', "😬 NEW LOW! {holder} scored only {value} points."),
+    ('highest_player_score', 'player', 'points', None, 'max', "🌟 NEW RECORD! {holder} ({position}) scored {value} points!"),
+    ('most_passing_yards', 'player', 'passingYards', ('QB',), 'max', "🚀 NEW RECORD! {holder} threw for {value} yards!"),
+    ('most_passing_tds', 'player', 'passingTouchdowns', ('QB',), 'max', "🎯 NEW RECORD! {holder} threw {value} TDs!"),
+    ('most_rushing_yards', 'player', 'rushingYards', ('RB',), 'max', "🏃 NEW RECORD! {holder} rushed for {value} yards!"),
+    ('most_receiving_yards', 'player', 'receivingYards', ('WR', 'TE'), 'max', "📡 NEW RECORD! {holder} had {value} receiving yards!"),
+    ('most_receptions', 'player', 'receivingReceptions', ('WR', 'TE'), 'max', "🎣 NEW RECORD! {holder} caught {value} passes!"),
+    ('most_total_tds', 'player', 'totalTouchdowns', None, 'max', "🔥 NEW RECORD! {holder} scored {value} TDs!"),
+    ('most_defensive_points', 'player', 'points', ('D/ST',), 'max', "🛡️ NEW RECORD! {holder} defense scored {value} points!"),
+)
+
+
+def _format_value(value):
+    return int(value) if float(value).is_integer() else round(value, 2)
+
+
+def _beats(rule, value, current):
+    direction = rule[4]
+    if direction == 'min':
+        # A zero is an empty or unplayed lineup, not a record low
+        return value > 0 and (current is None or value < current)
+    return value > 0 and (current is None or value > current)
+
+
+def _applies(rule, kind, metric, position):
+    return rule[1] == kind and rule[2] == metric and (rule[3] is None or position in rule[3])
+
+
+class RecordsEngine:
+    """
+    League history and records, kept in a small SQLite file.
+
+    Every ingested week stores its team scores and each active player's stat
+    line (one row per metric) under indexes on (league, kind, metric,
+    [position,] value, tie-break), and keeps a running best per RECORD_RULES
+    entry plus each week's count of earlier weeks. A new
+    week only touches its own rows: each rule compares the week's best
+    against the stored record, so ingestion is O(rows in the week) no matter
+    how much history there is. Re-ingesting a week with stat corrections
+    rewrites only the rows that changed, and only the records those rows
+    feed are looked at; one held by that week (or a later one) is rebuilt
+    with an indexed top-1 query instead of a rescan.
+
+    ingest_week() returns the records set that week, grouped by game (the
+    box score's position in the week's list), ready for the storyline
+    prompt's `records` argument. Announcements wait until the league has
+    `min_history_weeks` weeks of history, so week 1 doesn't break every record.
+    """
+
+    def __init__(self, league_id, year, path=DEFAULT_RECORDS_PATH, min_history_weeks=3):
+        self.league_id = league_id
+        self.year = year
+        self.path = path
+        self.min_history_weeks = min_history_weeks
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        if path != ":memory:":
+            # --manifest workers share the file: WAL lets them read while one of them writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lines ("
+            " league_id INTEGER NOT NULL, year INTEGER NOT NULL, week INTEGER NOT NULL,"
+            " kind TEXT NOT NULL, holder TEXT NOT NULL, team TEXT NOT NULL, position TEXT NOT NULL,"
+            " game INTEGER NOT NULL, metric TEXT NOT NULL, value REAL NOT NULL,"
+            " PRIMARY KEY (league_id, year, week, kind, holder, team, metric))"
+        )
+        # Both indexes end in the record tie-break so a top-1 lookup reads one row
+        # without sorting: one for rules limited to positions, one for the rest
+        self._db.execute("DROP INDEX IF EXISTS idx_lines_leaderboard")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lines_position"
+            " ON lines (league_id, kind, metric, position, value DESC, year, week, game, holder)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lines_best"
+            " ON lines (league_id, kind, metric, value DESC, year, week, game, holder)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " league_id INTEGER NOT NULL, record TEXT NOT NULL, value REAL NOT NULL,"
+            " holder TEXT NOT NULL, team TEXT NOT NULL, position TEXT NOT NULL,"
+            " year INTEGER NOT NULL, week INTEGER NOT NULL, game INTEGER NOT NULL, previous_value REAL,"
+            " PRIMARY KEY (league_id, record))"
+        )
+        new_weeks_table = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'weeks'"
+        ).fetchone() is None
+        # Each ingested week with how many weeks of history came before it
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS weeks ("
+            " league_id INTEGER NOT NULL, year INTEGER NOT NULL, week INTEGER NOT NULL,"
+            " history_weeks INTEGER NOT NULL, PRIMARY KEY (league_id, year, week))"
+        )
+        if new_weeks_table:
+            # Files written before the table existed: count their history once
+            self._db.execute(
+                "INSERT INTO weeks (league_id, year, week, history_weeks)"
+                " SELECT league_id, year, week, 0 FROM lines WHERE kind = 'team' GROUP BY league_id, year, week"
+            )
+            self._db.execute(
+                "UPDATE weeks SET history_weeks = (SELECT COUNT(*) FROM weeks AS earlier"
+                " WHERE earlier.league_id = weeks.league_id"
+                " AND (earlier.year < weeks.year OR (earlier.year = weeks.year AND earlier.week < weeks.week)))"
+            )
+        self._db.commit()
+
+    # --- ingestion ---
+    @staticmethod
+    def week_lines(box_scores):
+        """{(kind, holder, team, metric): (position, game, value)} for a week's box scores."""
+        lines = {}
+        for game_index, game in enumerate(box_scores):
+            if isinstance(game.home_team, int) or isinstance(game.away_team, int): continue
+            for team, score in ((game.home_team, game.home_score), (game.away_team, game.away_score)):
+                lines[('team', team.team_name, team.team_name, 'points')] = ('TEAM', game_index, float(score))
+            for _, line in player_lines(game):
+                values = {
+                    'points': line.points,
+                    'totalTouchdowns': line.get('rushingTouchdowns') + line.get('receivingTouchdowns')
+                }
+                for metric in PLAYER_METRICS:
+                    value = values[metric] if metric in values else line.get(metric)
+                    if value or metric == 'points':
+                        lines[('player', line.name, line.team, metric)] = (line.position, game_index, float(value))
+        return lines
+
+    def ingest_week(self, week, box_scores):
+        """Stores (or corrects) a week's lines, updates the records and returns {game: [record messages]}."""
+        lines = self.week_lines(box_scores)
+        with self._lock:
+            existing = {
+                (kind, holder, team, metric): (position, game, value)
+                for kind, holder, team, metric, position, game, value in self._db.execute(
+                    "SELECT kind, holder, team, metric, position, game, value FROM lines"
+                    " WHERE league_id = ? AND year = ? AND week = ?",
+                    (self.league_id, self.year, week)
+                )
+            }
+            if lines != existing:
+                self._apply(week, lines, existing)
+            return self._broken_records(week)
+
+    def _apply(self, week, lines, existing):
+        if any(kind == 'team' for kind, _, _, _ in lines):
+            self._add_week(week)
+        changed = {key: line for key, line in lines.items() if existing.get(key) != line}
+        removed = [key for key in existing if key not in lines]
+        # Rows this week already had that were corrected or dropped
+        corrected = set(removed) | {key for key, line in changed.items() if key in existing}
+
+        self._db.executemany(
+            "INSERT OR REPLACE INTO lines (league_id, year, week, kind, holder, team, position, game, metric, value)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(self.league_id, self.year, week, kind, holder, team, position, game, metric, value)
+             for (kind, holder, team, metric), (position, game, value) in changed.items()]
+        )
+        self._db.executemany(
+            "DELETE FROM lines WHERE league_id = ? AND year = ? AND week = ? AND kind = ? AND holder = ? AND team = ? AND metric = ?",
+            [(self.league_id, self.year, week) + key for key in removed]
+        )
+
+        for rule in RECORD_RULES:
+            touched = [(key, line) for key, line in changed.items() if _applies(rule, key[0], key[3], line[0])]
+            if not touched and not any(_applies(rule, key[0], key[3], existing[key][0]) for key in corrected):
+                continue
+            current = self._record(rule[0])
+            if current is not None and (current['year'], current['week']) >= (self.year, week):
+                # Correcting the week that holds the record (or a later one):
+                # rebuild this one record from the index
+                self._recompute(rule)
+                continue
+
+            best = None
+            for (kind, holder, team, metric), (position, game, value) in touched:
+                if _beats(rule, value, best[1][2] if best else None):
+                    best = ((kind, holder, team, metric), (position, game, value))
+            if best and _beats(rule, best[1][2], current['value'] if current else None):
+                (_, holder, team, _), (position, game, value) = best
+                self._set_record(rule[0], value, holder, team, position, self.year, week, game,
+                                 current['value'] if current else None)
+        self._db.commit()
+
+    def _record(self, record):
+        row = self._db.execute(
+            "SELECT value, holder, team, position, year, week, game, previous_value FROM records"
+            " WHERE league_id = ? AND record = ?",
+            (self.league_id, record)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('value', 'holder', 'team', 'position', 'year', 'week', 'game', 'previous_value'), row))
+
+    def _set_record(self, record, value, holder, team, position, year, week, game, previous_value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO records (league_id, record, value, holder, team, position, year, week, game, previous_value)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.league_id, record, value, holder, team, position, year, week, game, previous_value)
+        )
+
+    def _best_line(self, rule, before=None):
+        """Top row for a rule straight from the index, optionally only from weeks before (year, week)."""
+        _, kind, metric, positions, direction, _ = rule
+        sql = ("SELECT value, holder, team, position, year, week, game FROM lines"
+               " WHERE league_id = ? AND kind = ? AND metric = ? AND value > 0")
+        params = [self.league_id, kind, metric]
+        if positions:
+            sql += f" AND position IN ({', '.join('?' for _ in positions)})"
+            params.extend(positions)
+        if before:
+            sql += " AND (year < ? OR (year = ? AND week < ?))"
+            params.extend([before[0], before[0], before[1]])
+        # On a tie the earliest line keeps the record, as it would have when the weeks came in
+        sql += " ORDER BY value ASC" if direction == 'min' else " ORDER BY value DESC"
+        sql += ", year ASC, week ASC, game ASC, holder ASC LIMIT 1"
+        return self._db.execute(sql, params).fetchone()
+
+    def _recompute(self, rule):
+        best = self._best_line(rule)
+        if best is None:
+            self._db.execute("DELETE FROM records WHERE league_id = ? AND record = ?", (self.league_id, rule[0]))
+            return
+        value, holder, team, position, year, week, game = best
+        previous = self._best_line(rule, before=(year, week))
+        self._set_record(rule[0], value, holder, team, position, year, week, game, previous[0] if previous else None)
+
+    def _add_week(self, week):
+        if self._history_weeks(week) is not None:
+            return
+        history = self._db.execute(
+            "SELECT COUNT(*) FROM weeks WHERE league_id = ? AND (year < ? OR (year = ? AND week < ?))",
+            (self.league_id, self.year, self.year, week)
+        ).fetchone()[0]
+        self._db.execute(
+            "INSERT INTO weeks (league_id, year, week, history_weeks) VALUES (?, ?, ?, ?)",
+            (self.league_id, self.year, week, history)
+        )
+        # A week filled in late is history for every week already stored after it
+        self._db.execute(
+            "UPDATE weeks SET history_weeks = history_weeks + 1"
+            " WHERE league_id = ? AND (year > ? OR (year = ? AND week > ?))",
+            (self.league_id, self.year, self.year, week)
+        )
+
+    def _history_weeks(self, week):
+        row = self._db.execute(
+            "SELECT history_weeks FROM weeks WHERE league_id = ? AND year = ? AND week = ?",
+            (self.league_id, self.year, week)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _broken_records(self, week):
+        if (self._history_weeks(week) or 0) < self.min_history_weeks:
+            return {}
+        rules = {rule[0]: rule for rule in RECORD_RULES}
+        broken = {}
+        for record, value, holder, position, game, previous_value in self._db.execute(
+            "SELECT record, value, holder, position, game, previous_value FROM records"
+            " WHERE league_id = ? AND year = ? AND week = ? AND previous_value IS NOT NULL",
+            (self.league_id, self.year, week)
+        ):
+            rule = rules.get(record)
+            # Only a strict improvement is a broken record; tying it isn't
+            if rule is None or not _beats(rule, value, previous_value): continue
+            message = rule[5].format(holder=holder, position=position, value=_format_value(value))
+            broken.setdefault(game, []).append(message)
+        return broken
+
+    # --- queries ---
+    def records(self):
+        """Every current record, {record key: {value, holder, team, position, year, week, ...}}."""
+        with self._lock:
+            current = {rule[0]: self._record(rule[0]) for rule in RECORD_RULES}
+        return {record: entry for record, entry in current.items() if entry}
+
+    def leaderboard(self, metric='points', position=None, n=10, year=None, kind='player'):
+        """Top `n` weekly lines for a metric (optionally one position / one season), served from the index."""
+        sql = ("SELECT holder, team, position, year, week, value FROM lines"
+               " WHERE league_id = ? AND kind = ? AND metric = ?")
+        params = [self.league_id, kind, metric]
+        if position:
+            sql += " AND position = ?"
+            params.append(position)
+        if year:
+            sql += " AND year = ?"
+            params.append(year)
+        sql += " ORDER BY value DESC LIMIT ?"
+        params.append(n)
+        with self._lock:
+            return [dict(zip(('holder', 'team', 'position', 'year', 'week', 'value'), row))
+                    for row in self._db.execute(sql, params)]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
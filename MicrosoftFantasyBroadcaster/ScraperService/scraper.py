@@ -1,41 +1,42 @@
+import argparse
 import json
-import pika
-import os
-import math
-import random
-from pathlib import Path
-from espn_api.football import League
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+import queue
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from config import (
+    RABBITMQ_HOST, LEAGUE_ID, YEAR, ESPN_S2, SWID, QUEUE_NAME,
+    RABBITMQ_DURABLE_QUEUE, RABBITMQ_PERSISTENT, RABBITMQ_CONFIRM_WINDOW, RABBITMQ_ENCODING, QUEUE_MESSAGE_SCHEMA,
+    AZURE_DEPLOYMENT, LLM_MAX_CONCURRENCY, ESPN_FETCH_CONCURRENCY, WEEK_CONCURRENCY,
+    LLM_BATCH_MODE, LLM_BATCH_SIZE, STREAM_SEGMENTS, SEGMENTED_OUTPUT, SEGMENT_MAX_SECONDS, SNAPSHOTS_ENABLED, RECORDS_ENABLED, RECORDS_MIN_HISTORY_WEEKS,
+    STORYLINE_ARCHIVE_ENABLED,
+    LIVE_POLL_MIN_SECONDS, LIVE_POLL_MAX_SECONDS, METRICS_FILE, METRICS_PORT, RUN_REPORT_FILE
+)
 from storyline_generator import StorylineGenerator
+from llm_gateway import chat_completion, get_shared_client, prewarm_client, stream_chat_completion
+from rate_scheduler import PRIORITY_BANTER, PRIORITY_FLAVOR, PRIORITY_TRANSITION, get_shared_scheduler
+from llm_cache import get_shared_cache
+from checkpoint_store import CheckpointStore, box_score_fingerprint
+from snapshot_store import SnapshotStore, RecordingLeague, SnapshotLeague
+from records_engine import RecordsEngine
+from storyline_archive import StorylineArchive
+from stats_engine import StatsFrame
+from script_segments import SegmentParser, clean_text, make_segment, manifest_entries, segment_script
+from publisher import RabbitPublisher, pika_connection_factory
+from telemetry import telemetry
 
-# --- 1. ROBUST ENV LOADING ---
-env_path = Path(__file__).parent / '.env'
-load_dotenv(dotenv_path=env_path)
-
-# --- 2. CONFIGURATION ---
-RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
-LEAGUE_ID = int(os.getenv('ESPN_LEAGUE_ID', '0'))
-YEAR = int(os.getenv('ESPN_YEAR', '2025'))
-ESPN_S2 = os.getenv('ESPN_S2')
-SWID = os.getenv('ESPN_SWID')
-QUEUE_NAME = 'game_stats_queue'
-
-# Azure Config
-AZURE_ENDPOINT = os.getenv('AZURE_OPENAI_ENDPOINT')
-AZURE_KEY = os.getenv('AZURE_OPENAI_API_KEY')
-AZURE_DEPLOYMENT = os.getenv('AZURE_DEPLOYMENT_NAME')
+# --- 1-2. ENV LOADING & CONFIGURATION: see config.py ---
 
 # --- 3. BROADCAST DIRECTOR (Matt & Jose Edition) ---
+DIRECTOR_SYSTEM_MESSAGE = "You are a scriptwriter for 'The Fantasy Zone'. Hosts: Matt (Pro) and Jose (Wild). They have great chemistry and banter."
+
 class BroadcastDirector:
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=AZURE_ENDPOINT,
-            api_key=AZURE_KEY,
-            api_version="2024-05-01-preview"
-        )
+    @property
+    def client(self):
+        # Shared with the StorylineGenerator and only built on the first LLM call
+        return get_shared_client()
 
-    def generate_intro(self, week):
+    def generate_intro(self, week, on_text=None):
         prompt = (
             f"Write a TV intro for the Week {week} Fantasy Recap with hosts MATT and JOSE.\n"
             f"Roles:\n"
@@ -46,17 +47,17 @@ class BroadcastDirector:
             f"- Format: [MATT]: ... [JOSE]: ...\n"
             f"- Keep it under 4 lines."
         )
-        return self._call_ai(prompt, fallback="[MATT]: Welcome to Week " + str(week) + "! [JOSE]: Let's go Matt, I'm ready!")
+        return self._call_ai(prompt, fallback="[MATT]: Welcome to Week " + str(week) + "! [JOSE]: Let's go Matt, I'm ready!", on_text=on_text, priority=PRIORITY_FLAVOR)
 
-    def generate_transition(self, home_team, away_team):
+    def generate_transition(self, home_team, away_team, on_text=None):
         prompt = (
             f"Write a transition to the {home_team} vs {away_team} game.\n"
             f"Matt sets it up, Jose adds a quick hype comment.\n"
             f"Format: [MATT]: ... [JOSE]: ..."
         )
-        return self._call_ai(prompt, fallback=f"[MATT]: Next up, {home_team} vs {away_team}. [JOSE]: This one was ugly!")
+        return self._call_ai(prompt, fallback=f"[MATT]: Next up, {home_team} vs {away_team}. [JOSE]: This one was ugly!", on_text=on_text, priority=PRIORITY_TRANSITION)
 
-    def generate_banter_recap(self, recap_text, winner, score):
+    def generate_banter_recap(self, recap_text, winner, score, on_text=None):
         # This takes the dry stats recap and turns it into a conversation
         prompt = (
             f"Rewrite this recap into a dialogue between MATT and JOSE:\n"
@@ -69,221 +70,841 @@ class BroadcastDirector:
             f"- Make them talk TO each other. (e.g., 'Did you see that, Jose?', 'Tell em, Matt!')\n"
             f"- Keep it under 6 lines total."
         )
-        return self._call_ai(prompt, fallback=f"[MATT]: {winner} won with {score} points. [JOSE]: Total domination!")
+        return self._call_ai(prompt, fallback=f"[MATT]: {winner} won with {score} points. [JOSE]: Total domination!", on_text=on_text)
 
-    def generate_outro(self, week):
+    def generate_outro(self, week, on_text=None):
         prompt = (
             f"Write a sign-off for Week {week}.\n"
             f"Matt wraps it up professionally, Jose yells something funny or tells people to hit the waiver wire.\n"
             f"Format: [MATT]: ... [JOSE]: ..."
         )
-        return self._call_ai(prompt, fallback="[MATT]: That's the show! [JOSE]: Peace out!")
+        return self._call_ai(prompt, fallback="[MATT]: That's the show! [JOSE]: Peace out!", on_text=on_text, priority=PRIORITY_FLAVOR)
+
+    def generate_live_update(self, home_team, away_team, facts, on_text=None):
+        # Mid-game cut-in, only written when live mode sees something worth reporting
+        prompt = (
+            f"Write a LIVE cut-in for the {home_team} vs {away_team} game, which is still being played.\n"
+            f"What just happened:\n{facts}\n\n"
+            f"Matt reads the update, Jose reacts.\n"
+            f"Format: [MATT]: ... [JOSE]: ...\n"
+            f"Keep it under 3 lines."
+        )
+        headline = facts.splitlines()[0] if facts else f"{home_team} vs {away_team}"
+        return self._call_ai(prompt, fallback=f"[MATT]: Live update! {headline}", on_text=on_text)
+
+    def generate_matchup_batch(self, week, matchups):
+        """
+        Writes commentary for several matchups in a single JSON-mode request.
+
+        `matchups` is a list of dicts with 'id', 'kind' ('feature' or 'quick')
+        and 'facts' (the StorylineGenerator matchup facts block). Feature games
+        get a transition and banter, quick games a single line of banter.
+        Returns {id: entry} for the entries that came back valid; anything
+        missing or malformed is left out so the caller can fall back to
+        per-game calls for just those games.
+        """
+        blocks = []
+        for m in matchups:
+            blocks.append(f"[{m['id']}] {m['kind'].upper()}\n{m['facts']}")
+        prompt = (
+            f"Write Week {week} commentary for the {len(matchups)} matchups below.\n"
+            f"Return ONLY a JSON object of the form {{\"matchups\": [{{\"id\": ..., ...}}]}} with exactly one entry per matchup id.\n\n"
+            f"FEATURE matchups need:\n"
+            f"- \"transition\": Matt sets up the game, Jose adds a quick hype comment. Format: [MATT]: ... [JOSE]: ...\n"
+            f"- \"banter\": a trash-talk recap of the game as a dialogue, using the stats given. MATT (60%) reads the stats, JOSE (40%) reacts, roasts the loser or praises the winner and interrupts Matt. "
+            f"Use tags [MATT]: and [JOSE]:, make them talk TO each other, keep it under 6 lines.\n"
+            f"QUICK matchups need:\n"
+            f"- \"banter\": ONE line from Jose reacting to the result. Format: [JOSE]: ...\n\n"
+            f"MATCHUPS:\n\n" + "\n".join(blocks)
+        )
+        max_tokens = sum(350 if m['kind'] == 'feature' else 60 for m in matchups)
 
-    def _call_ai(self, prompt, fallback):
         try:
-            response = self.client.chat.completions.create(
-                model=AZURE_DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": "You are a scriptwriter for 'The Fantasy Zone'. Hosts: Matt (Pro) and Jose (Wild). They have great chemistry and banter."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=1.0, 
-                max_tokens=250
-            )
-            content = response.choices[0].message.content
+            with telemetry.span("llm_call", caller="director_batch"):
+                content = chat_completion(
+                    self.client, AZURE_DEPLOYMENT, prompt,
+                    system_message=DIRECTOR_SYSTEM_MESSAGE,
+                    temperature=1.0,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"},
+                    validate=lambda text: bool(self._parse_batch(text, matchups)),
+                    priority=PRIORITY_BANTER
+                )
+            results = self._parse_batch(content, matchups)
+        except Exception as e:
+            print(f"   ⚠️ Director Batch Error: {e}")
+            telemetry.incr("llm_errors_total", caller="director_batch")
+            return {}
+
+        if len(results) < len(matchups):
+            telemetry.incr("llm_fallbacks_total", len(matchups) - len(results), caller="director_batch")
+            print(f"   ⚠️ Director Batch: {len(matchups) - len(results)} of {len(matchups)} entries malformed, falling back for those games")
+        return results
+
+    @staticmethod
+    def _parse_batch(content, matchups):
+        try:
+            entries = json.loads(content or "{}").get('matchups', [])
+        except (ValueError, AttributeError):
+            return {}
+        if not isinstance(entries, list):
+            return {}
+
+        kinds = {str(m['id']): m['kind'] for m in matchups}
+        required = {'feature': ('transition', 'banter'), 'quick': ('banter',)}
+        results = {}
+        for entry in entries:
+            if not isinstance(entry, dict): continue
+            matchup_id = str(entry.get('id'))
+            if matchup_id not in kinds: continue
+            fields = {}
+            for field in required[kinds[matchup_id]]:
+                value = entry.get(field)
+                if not isinstance(value, str) or not value.strip(): break
+                fields[field] = value.strip()
+            else:
+                if '[MATT]:' not in fields['banter'] and '[JOSE]:' not in fields['banter']: continue
+                if kinds[matchup_id] == 'quick':
+                    fields['banter'] = " ".join(fields['banter'].split())
+                results[matchup_id] = fields
+        return results
+
+    def _call_ai(self, prompt, fallback, on_text=None, priority=PRIORITY_BANTER):
+        if on_text:
+            return self._stream_ai(prompt, fallback, on_text, priority)
+        try:
+            with telemetry.span("llm_call", caller="director"):
+                content = chat_completion(
+                    self.client, AZURE_DEPLOYMENT, prompt,
+                    system_message=DIRECTOR_SYSTEM_MESSAGE,
+                    temperature=1.0, 
+                    max_tokens=250,
+                    priority=priority
+                )
             if content: return content.strip()
-            return fallback
         except Exception as e:
             print(f"   ⚠️ Director Error: {e}")
-            return fallback
-
-class StatsAnalyzer:
-    def get_player_performances(self, matchup):
-        players = {'home': [], 'away': []}
-        if hasattr(matchup, 'home_lineup'):
-            for player in matchup.home_lineup:
-                if player.slot_position != 'BE':
-                    players['home'].append(self._extract_stats(player))
-        if hasattr(matchup, 'away_lineup'):
-            for player in matchup.away_lineup:
-                if player.slot_position != 'BE':
-                    players['away'].append(self._extract_stats(player))
-        return players
-
-    def _extract_stats(self, player):
-        raw_stats = player.stats.get(player.lineupSlot, {})
-        if not raw_stats:
-             keys = list(player.stats.keys())
-             if keys: raw_stats = player.stats[keys[0]]
-        return {
-            'name': player.name, 'position': player.position,
-            'points': player.points, 'stats': raw_stats 
-        }
-
-    def find_interesting_performances(self, players_dict):
-        notable = []
-        for team in ['home', 'away']:
-            for player in players_dict[team]:
-                stats = player['stats']
-                position = player['position']
-                name = player['name']
-                points = player['points']
-                
-                if position == 'QB':
-                    pass_yds = stats.get('passingYards', 0)
-                    pass_tds = stats.get('passingTouchdowns', 0)
-                    if pass_yds >= 350: notable.append(f"🚀 {name}: {pass_yds} passing yards!")
-                    if pass_tds >= 4: notable.append(f"🎯 {name}: {pass_tds} passing TDs!")
-                elif position == 'RB':
-                    total_tds = stats.get('rushingTouchdowns', 0) + stats.get('receivingTouchdowns', 0)
-                    rush_yds = stats.get('rushingYards', 0)
-                    if total_tds >= 2: notable.append(f"🔥 {name}: {total_tds} total TDs!")
-                    if rush_yds >= 100: notable.append(f"💯 {name}: {rush_yds} rushing yards!")
-                elif position in ['WR', 'TE']:
-                    rec_tds = stats.get('receivingTouchdowns', 0)
-                    rec_yds = stats.get('receivingYards', 0)
-                    if rec_tds >= 2: notable.append(f"🎯 {name}: {rec_tds} receiving TDs!")
-                    if rec_yds >= 100: notable.append(f"💯 {name}: {rec_yds} receiving yards!")
-                
-                if points >= 30: notable.append(f"🌟 {name}: MONSTER game ({points} pts)!")
-        return notable
-
-    def find_matchup_storylines(self, matchup, players_dict):
-        storylines = []
-        home_score = matchup.home_score
-        away_score = matchup.away_score
-        diff = abs(home_score - away_score)
-        
-        winner = matchup.home_team.team_name if home_score > away_score else matchup.away_team.team_name
-        if diff >= 40: storylines.append(f"💣 BLOWOUT! {winner} dominates by {diff:.1f} points!")
-        elif diff <= 5: storylines.append(f"😰 NAIL-BITER! Just {diff:.1f} points separate them!")
-        if home_score >= 150: storylines.append(f"🔥 {matchup.home_team.team_name}: MONSTER SCORE ({home_score} pts)!")
-        if away_score >= 150: storylines.append(f"🔥 {matchup.away_team.team_name}: MONSTER SCORE ({away_score} pts)!")
-        return storylines
-
-def main():
-    if LEAGUE_ID == 0:
-        print("❌ ERROR: ESPN_LEAGUE_ID not found. Check your .env file.")
-        return
+            telemetry.incr("llm_errors_total", caller="director")
+        telemetry.incr("llm_fallbacks_total", caller="director")
+        return fallback
+
+    def _stream_ai(self, prompt, fallback, on_text, priority):
+        """
+        Like _call_ai, but hands each piece of text to `on_text` as it streams in.
+        If the stream breaks part way, the fallback line follows what was
+        already sent and is what's returned, not the partial text.
+        """
+        parts = []
+        try:
+            with telemetry.span("llm_call", caller="director_stream"):
+                for delta in stream_chat_completion(
+                    self.client, AZURE_DEPLOYMENT, prompt,
+                    system_message=DIRECTOR_SYSTEM_MESSAGE,
+                    temperature=1.0,
+                    max_tokens=250,
+                    priority=priority
+                ):
+                    parts.append(delta)
+                    on_text(delta)
+        except Exception as e:
+            print(f"   ⚠️ Director Stream Error: {e}")
+            telemetry.incr("llm_errors_total", caller="director_stream")
+            if parts:
+                telemetry.incr("llm_fallbacks_total", caller="director_stream")
+                on_text("\n" + fallback)
+                return fallback
+
+        content = "".join(parts).strip()
+        if content: return content
+        telemetry.incr("llm_fallbacks_total", caller="director_stream")
+        on_text(fallback)
+        return fallback
+
+def rank_games(box_scores):
+    """Splits a week's box scores into the top 3 feature games and the quick games."""
+    game_rankings = []
+    for game in box_scores:
+        if isinstance(game.home_team, int) or isinstance(game.away_team, int): continue
+        excitement_score = (game.home_score + game.away_score) + (100 - abs(game.home_score - game.away_score))
+        game_rankings.append({'game': game, 'score': excitement_score})
+
+    game_rankings.sort(key=lambda x: x['score'], reverse=True)
+    feature_games = [g['game'] for g in game_rankings[:3]]
+    quick_games = [g['game'] for g in game_rankings[3:]]
+    return feature_games, quick_games
+
+def feature_game_recap(game, notable_perfs, matchup_stories, director, story_gen, on_text=None, records=None, week=None, archive=None):
+    """
+    Runs one feature game's dependency chain (storyline -> banter).
+    Returns the banter block, or None if the storyline could not be generated.
+    With an `archive`, the storyline is saved there for `week`.
+    """
+    stats_payload = _stats_payload(game)
+
+    # 1. Get the "Facts" from the Story Generator
+    raw_story = story_gen.generate_storyline(stats=stats_payload, notable_performances=notable_perfs, storylines=matchup_stories, records=records or [], week=week, archive=archive)
+    if not raw_story:
+        return None
+
+    # 2. Convert Facts into Banter
+    winner_name = game.home_team.team_name if game.home_score > game.away_score else game.away_team.team_name
+    winner_score = max(game.home_score, game.away_score)
+    return director.generate_banter_recap(raw_story, winner_name, winner_score, on_text=on_text)
+
+QUICK_GAMES_HEADER = "[MATT]: AND IN OTHER ACTION AROUND THE LEAGUE..."
+
+def quick_game_line(game, frame, top_by_game):
+    """Matt's one-line read of a non-feature game."""
+    winner = game.home_team.team_name if game.home_score > game.away_score else game.away_team.team_name
+    loser = game.away_team.team_name if game.home_score > game.away_score else game.home_team.team_name
+    line = f"[MATT]: {winner} defeated {loser}, {max(game.home_score, game.away_score)} to {min(game.home_score, game.away_score)}."
+    top = top_by_game.get(frame.game_index(game))
+    if top:
+        line += f" {top[0]} led the way with {top[2]} points."
+    return line
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _stats_payload(game):
+    return {
+        'team_1': {'team_name': game.home_team.team_name, 'score': game.home_score},
+        'team_2': {'team_name': game.away_team.team_name, 'score': game.away_score}
+    }
+
+def batch_matchups(week, feature_games, quick_games, frame, notable_by_game, storylines_by_game, records_by_game, director, story_gen, executor):
+    """
+    Batched mode: submits the week's matchups to the director LLM_BATCH_SIZE
+    at a time without waiting on them. Returns (futures, matchup count) for
+    collect_batches().
+    """
+    matchups = []
+    for kind, games in (('feature', feature_games), ('quick', quick_games)):
+        for game in games:
+            gid = frame.game_index(game)
+            facts = story_gen.format_matchup_facts(
+                _stats_payload(game),
+                notable_by_game.get(gid, []) if kind == 'feature' else [],
+                storylines_by_game.get(gid, []) if kind == 'feature' else [],
+                records_by_game.get(gid, [])
+            )
+            matchups.append({'id': str(gid), 'kind': kind, 'facts': facts})
+
+    batches = [matchups[i:i + LLM_BATCH_SIZE] for i in range(0, len(matchups), LLM_BATCH_SIZE)]
+    return [executor.submit(director.generate_matchup_batch, week, batch) for batch in batches], len(matchups)
+
+def collect_batches(futures, matchup_count):
+    """Waits on batch_matchups() requests. Returns {game_id: entry} for every entry that came back valid."""
+    results = {}
+    for future in futures:
+        for matchup_id, entry in future.result().items():
+            results[int(matchup_id)] = entry
+    print(f"   📦 Batched {matchup_count} matchups into {len(futures)} request(s), {len(results)} valid")
+    return results
+
+def build_week_script(week, box_scores, director, story_gen, executor, batch=False, records_by_game=None, archive=None):
+    """
+    Builds the full Matt & Jose script for one week.
+
+    Notable performances and storylines for every game come from one
+    vectorized StatsFrame pass over the whole week, which also gives the
+    quick games their top performer line.
+
+    Every LLM call is fanned out on `executor`: the intro, outro and each game's
+    transition run alongside each feature game's storyline -> banter chain.
+    With `batch`, the matchups are packed into a few structured requests instead,
+    sent alongside the intro and outro, and only the games whose batch entry was
+    malformed fall back to the per-game calls. The pieces are stitched back together in the original show
+    order. `records_by_game` ({game index: [record messages]}, from the
+    RecordsEngine) feeds each storyline's RECORDS SHATTERED section, and an
+    `archive` (StorylineArchive) keeps each feature game's storyline.
+    Returns (script, games_processed).
+    """
+    records_by_game = records_by_game or {}
+    with telemetry.span("stats_analysis"):
+        feature_games, quick_games = rank_games(box_scores)
+        frame = StatsFrame(box_scores)
+        notable_by_game = frame.notable_by_game()
+        storylines_by_game = frame.storylines_by_game()
+        top_by_game = frame.top_performer_by_game()
+
+    batched = {}
+    batching = batch and story_gen
+    if batching:
+        batch_futures, matchup_count = batch_matchups(week, feature_games, quick_games, frame, notable_by_game, storylines_by_game, records_by_game, director, story_gen, executor)
+        # The intro and outro don't depend on the batch, so they don't wait for it
+        intro_future = executor.submit(director.generate_intro, week)
+        outro_future = executor.submit(director.generate_outro, week)
+        batched = collect_batches(batch_futures, matchup_count)
+
+    feature_jobs = []
+    if story_gen:
+        for game in feature_games:
+            print(f"   🌟 FEATURE: {game.home_team.team_name} vs {game.away_team.team_name}...")
+            entry = batched.get(frame.game_index(game))
+            if entry:
+                feature_jobs.append((_completed(entry['transition']), _completed(entry['banter'])))
+                continue
+            gid = frame.game_index(game)
+            recap_future = executor.submit(feature_game_recap, game, notable_by_game.get(gid, []), storylines_by_game.get(gid, []), director, story_gen, records=records_by_game.get(gid, []), week=week, archive=archive)
+            transition_future = executor.submit(director.generate_transition, game.home_team.team_name, game.away_team.team_name)
+            feature_jobs.append((transition_future, recap_future))
+
+    if not batching:
+        # Flavor calls go in last so the scheduler hands quota to the recaps first
+        intro_future = executor.submit(director.generate_intro, week)
+        outro_future = executor.submit(director.generate_outro, week)
+
+    # Intro
+    script = intro_future.result() + "\n"
+
+    games_processed = 0
+
+    # Feature Games
+    for transition_future, recap_future in feature_jobs:
+        try:
+            script += f"{transition_future.result()}\n"
+            banter = recap_future.result()
+            if banter:
+                script += f"{banter}\n"
+                games_processed += 1
+        except Exception as e:
+            print(f"   ❌ AI Gen Error: {e}")
+
+    # Quick Games (Matt reads these alone quickly)
+    if quick_games:
+        script += QUICK_GAMES_HEADER + "\n"
+        for game in quick_games:
+            script += quick_game_line(game, frame, top_by_game) + "\n"
+            entry = batched.get(frame.game_index(game))
+            if entry:
+                script += entry['banter'] + "\n"
+            games_processed += 1
+
+    # Outro
+    script += outro_future.result()
+
+    return script, games_processed
+
+def _stream_block(segments, generate):
+    """
+    Runs one show block's generator, pushing each finished segment onto
+    `segments` as the text streams in. A None marks the end of the block.
+    """
+    parser = SegmentParser()
+    try:
+        generate(lambda text: [segments.put(seg) for seg in parser.feed(text)])
+    except Exception as e:
+        print(f"   ❌ AI Gen Error: {e}")
+    finally:
+        for seg in parser.flush():
+            segments.put(seg)
+        segments.put(None)
+
+def stream_week_script(week, box_scores, director, story_gen, executor, emit, records_by_game=None, archive=None):
+    """
+    Streaming variant of build_week_script().
+
+    Every show block (intro, each feature game's transition and banter, the
+    quick games, outro) streams concurrently on `executor` into its own
+    queue. This thread drains the queues in show order and calls
+    emit(index, speaker, text) for each finished, cleaned segment, so the first segment goes
+    out as soon as the intro's first line is complete while later blocks keep
+    generating. Returns the number of games processed, like build_week_script();
+    a week with no games streams nothing.
+    """
+    records_by_game = records_by_game or {}
+    with telemetry.span("stats_analysis"):
+        feature_games, quick_games = rank_games(box_scores)
+        if not feature_games and not quick_games:
+            return 0
+        frame = StatsFrame(box_scores)
+        notable_by_game = frame.notable_by_game()
+        storylines_by_game = frame.storylines_by_game()
+        top_by_game = frame.top_performer_by_game()
+
+    # (segment queue, games the block covers once it has said anything)
+    blocks = []
+    def add_block(generate, games=0):
+        segments = queue.Queue()
+        executor.submit(_stream_block, segments, generate)
+        blocks.append((segments, games))
+
+    add_block(lambda on_text: director.generate_intro(week, on_text=on_text))
+    if story_gen:
+        for game in feature_games:
+            print(f"   🌟 FEATURE: {game.home_team.team_name} vs {game.away_team.team_name}...")
+            gid = frame.game_index(game)
+            add_block(lambda on_text, game=game: director.generate_transition(game.home_team.team_name, game.away_team.team_name, on_text=on_text))
+            add_block(lambda on_text, game=game, gid=gid: feature_game_recap(game, notable_by_game.get(gid, []), storylines_by_game.get(gid, []), director, story_gen, on_text=on_text, records=records_by_game.get(gid, []), week=week, archive=archive), games=1)
 
-    print(f"🏈 Connecting to League {LEAGUE_ID}...")
+    if quick_games:
+        quick_text = "\n".join([QUICK_GAMES_HEADER] + [quick_game_line(game, frame, top_by_game) for game in quick_games])
+        quick = queue.Queue()
+        _stream_block(quick, lambda on_text: on_text(quick_text))
+        blocks.append((quick, len(quick_games)))
+
+    add_block(lambda on_text: director.generate_outro(week, on_text=on_text))
+
+    emitted = 0
+    games_processed = 0
+    for segments, games in blocks:
+        said = False
+        while True:
+            seg = segments.get()
+            if seg is None: break
+            speaker, text = seg
+            # Stage directions and markup are stripped; a segment with nothing left to say is skipped
+            text = clean_text(text)
+            if not text: continue
+            emit(emitted, speaker, text)
+            emitted += 1
+            said = True
+        if said:
+            games_processed += games
+    return games_processed
+
+def fetch_week(league, week):
+    """Fetches one week's box scores from ESPN. Returns None if the fetch fails."""
+    try:
+        with telemetry.span("espn_fetch"):
+            return league.box_scores(week)
+    except Exception as e:
+        print(f"⚠️ Could not fetch Week {week}: {e}")
+        return None
+
+def generate_week(week, box_scores, director, story_gen, llm_pool, records_by_game=None, archive=None):
+    print(f"🎬 Director generating Matt & Jose script for Week {week}...")
+    with telemetry.span("week_script"):
+        return build_week_script(week, box_scores, director, story_gen, llm_pool, batch=LLM_BATCH_MODE, records_by_game=records_by_game, archive=archive)
+
+def ingest_records(records, week, box_scores):
+    """Adds a week to the records engine (if any) and returns its broken records by game."""
+    if records is None:
+        return {}
     try:
-        league = League(league_id=LEAGUE_ID, year=YEAR, espn_s2=ESPN_S2, swid=SWID)
+        with telemetry.span("records"):
+            broken = records.ingest_week(week, box_scores)
     except Exception as e:
-        print(f"❌ Failed to connect to ESPN: {e}")
+        print(f"⚠️ Records update failed for Week {week}: {e}")
+        return {}
+    if broken:
+        print(f"🚨 Week {week}: {sum(len(r) for r in broken.values())} league record(s) broken")
+    return broken
+
+# Empty GameStatMessage fields the full recap used to carry; only the legacy schema still sends them
+RECAP_PLACEHOLDERS = {
+    "home_team": "Recap", "home_score": 0, "home_roster": [],
+    "away_team": "Recap", "away_score": 0, "away_roster": [],
+    "storylines": []
+}
+
+def publish_week(publisher, week, script, games_processed, idempotency_key=None, segmented=False):
+    """Publishes a week's script (as a manifest and segments with `segmented`). Returns True if anything was sent."""
+    if games_processed > 0 and segmented:
+        return publish_segmented_week(publisher, week, script, idempotency_key)
+    if games_processed > 0:
+        message = {"week": week, "shortName": f"Week_{week}_Full_Recap"}
+        if QUEUE_MESSAGE_SCHEMA == 'legacy':
+            message.update(RECAP_PLACEHOLDERS)
+        message["ai_recap"] = script
+        if idempotency_key:
+            message["idempotency_key"] = idempotency_key
+        with telemetry.span("publish"):
+            publisher.publish(message, message_id=idempotency_key)
+            # Confirmed before the caller checkpoints the week
+            publisher.flush()
+        print(f" [x] Sent Matt & Jose Script for Week {week}")
+        return True
+    else:
+        print(f" [!] Skipping Week {week} message (No games processed).")
+        return False
+
+def publish_segmented_week(publisher, week, script, idempotency_key=None):
+    """
+    Splits a finished script into validated speaker segments and publishes
+    the show manifest first, then every segment, so TTS workers can take
+    segments in parallel and put the audio back together by index.
+    """
+    show = segment_script(script, f"Week_{week}_Full_Recap", max_seconds=SEGMENT_MAX_SECONDS)
+    for repair in show.repairs:
+        print(f"   🩹 Week {week} script: {repair}")
+    if not show.segments:
+        print(f" [!] Skipping Week {week} message (nothing speakable in the script).")
+        return False
+
+    message = {
+        "week": week,
+        "shortName": f"Week_{week}_Manifest",
+        "show": f"Week_{week}_Full_Recap",
+        "manifest": True,
+        "segment_count": len(show.segments),
+        "duration_seconds": show.duration,
+        "segments": manifest_entries(show.segments),
+        "repairs": show.repairs
+    }
+    if idempotency_key:
+        message["idempotency_key"] = f"{idempotency_key}-manifest"
+    with telemetry.span("publish"):
+        publisher.publish(message, message_id=message.get("idempotency_key"))
+    for segment in show.segments:
+        publish_segment(publisher, week, segment, idempotency_key)
+    with telemetry.span("publish"):
+        publisher.flush()
+    print(f" [x] Sent Matt & Jose Script for Week {week} as {len(show.segments)} segments (~{show.duration:.0f}s)")
+    return True
+
+def publish_segment(publisher, week, segment, idempotency_key=None):
+    message = {
+        "week": week,
+        "shortName": f"Week_{week}_Segment_{segment.index:03d}",
+        "show": f"Week_{week}_Full_Recap",
+        "segment_id": segment.id,
+        "segment_index": segment.index,
+        "speaker": segment.speaker,
+        "duration_seconds": segment.duration,
+        "end_of_show": False,
+        "ai_recap": f"[{segment.speaker}]: {segment.text}"
+    }
+    if idempotency_key:
+        message["idempotency_key"] = f"{idempotency_key}-seg{segment.index}"
+    with telemetry.span("publish"):
+        publisher.publish(message, message_id=message.get("idempotency_key"))
+
+def publish_end_of_show(publisher, week, segments, idempotency_key=None):
+    """Closes a streamed show; carries the manifest, since it's only known once every segment is out."""
+    message = {
+        "week": week,
+        "shortName": f"Week_{week}_End_Of_Show",
+        "show": f"Week_{week}_Full_Recap",
+        "segment_index": len(segments),
+        "segment_count": len(segments),
+        "duration_seconds": round(sum(s.duration for s in segments), 1),
+        "segments": manifest_entries(segments),
+        "end_of_show": True
+    }
+    if QUEUE_MESSAGE_SCHEMA == 'legacy':
+        message["ai_recap"] = ""
+    if idempotency_key:
+        message["idempotency_key"] = f"{idempotency_key}-end"
+    with telemetry.span("publish"):
+        publisher.publish(message, message_id=message.get("idempotency_key"))
+        publisher.flush()
+    print(f" [x] Streamed {len(segments)} Matt & Jose segments for Week {week}")
+
+class LeagueJob:
+    """
+    One league's share of a run: where its box scores come from, which weeks
+    to process and where its messages go. A multi-league shard runs several
+    jobs over the same LLM client and RabbitMQ connection; `publisher` is
+    usually a LeaguePublisher that adds the league's routing key, and
+    `archive` is the league/season's StorylineArchive, if storylines are kept.
+    """
+
+    def __init__(self, league, weeks, publisher, checkpoints=None, force=False, records=None, name=None, archive=None):
+        self.league = league
+        self.weeks = list(weeks)
+        self.publisher = publisher
+        self.checkpoints = checkpoints
+        self.force = force
+        self.records = records
+        self.name = name
+        self.archive = archive
+
+    def label(self, week):
+        return f"{self.name} Week {week}" if self.name else f"Week {week}"
+
+def round_robin(jobs):
+    """Yields (job, week) one week per league in turn, so a long season can't hold up the other leagues."""
+    queues = [deque(job.weeks) for job in jobs]
+    while any(queues):
+        for job, weeks in zip(jobs, queues):
+            if weeks:
+                yield job, weeks.popleft()
+
+def run_streaming(league, weeks, director, story_gen, publisher, checkpoints=None, force=False, records=None, archive=None):
+    """
+    Streaming publish mode. Weeks run one at a time on this thread, so every
+    publish stays on the publisher's thread, and each segment is published
+    the moment it is complete instead of waiting for the whole show. The TTS
+    worker can start on the intro while the rest of the week is generating.
+    """
+    run_streaming_jobs([LeagueJob(league, weeks, publisher, checkpoints, force, records, archive=archive)], director, story_gen)
+
+def run_streaming_jobs(jobs, director, story_gen):
+    """run_streaming() over several leagues, taking their weeks round-robin."""
+    with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY) as llm_pool:
+        for job, week in round_robin(jobs):
+            box_scores = fetch_week(job.league, week)
+            if box_scores is None: continue
+            records_by_game = ingest_records(job.records, week, box_scores)
+
+            checkpoints = job.checkpoints
+            fingerprint = box_score_fingerprint(box_scores) if checkpoints else None
+            if checkpoints and not job.force and checkpoints.is_current(week, fingerprint):
+                print(f"⏭️ {job.label(week)} unchanged since last publish, skipping.")
+                continue
+            idempotency_key = checkpoints.idempotency_key(week, fingerprint) if checkpoints else None
+
+            print(f"🎙️ Streaming Matt & Jose segments for {job.label(week)}...")
+            segments = []
+            def emit(index, speaker, text, job=job, week=week, idempotency_key=idempotency_key, segments=segments):
+                segment = make_segment(f"Week_{week}_Full_Recap", index, speaker, text)
+                segments.append(segment)
+                publish_segment(job.publisher, week, segment, idempotency_key)
+                # Sent now rather than when the confirm window fills, so TTS can start on it
+                job.publisher.flush()
+
+            with telemetry.span("week_script"):
+                games_processed = stream_week_script(week, box_scores, director, story_gen, llm_pool, emit=emit, records_by_game=records_by_game, archive=job.archive)
+            if not games_processed:
+                # No end of show and no checkpoint, so the week is retried on the next run
+                print(f" [!] Skipping {job.label(week)} end of show (No games processed).")
+                continue
+            publish_end_of_show(job.publisher, week, segments, idempotency_key)
+            if checkpoints:
+                checkpoints.mark_published(week, fingerprint)
+
+def run_backfill(league, weeks, director, story_gen, publisher, checkpoints=None, force=False, records=None, segmented=False, archive=None):
+    """
+    Pipelined backfill: ESPN fetches, script generation and publishing for
+    different weeks overlap, each stage with its own worker pool.
+
+    Weeks are handed to the script stage in week order and published strictly
+    in week order as soon as every earlier week has been published, so the
+    consumer still sees Week_1, Week_2, ... even though later weeks may finish
+    generating first.
+
+    With a CheckpointStore, weeks whose box scores match the fingerprint they
+    were last published from are skipped unless `force` is set. With a
+    RecordsEngine, every fetched week (skipped or not) is added to the league
+    history in week order before its script is generated. With `segmented`,
+    each week goes out as a manifest plus speaker segments (see
+    publish_segmented_week) instead of one message. With a StorylineArchive,
+    every feature game storyline is archived as it is generated.
+    """
+    run_backfill_jobs([LeagueJob(league, weeks, publisher, checkpoints, force, records, archive=archive)], director, story_gen, segmented)
+
+def wait_serviced(future, publisher, interval=5.0):
+    """future.result(), answering the publisher's heartbeats every `interval` seconds while it waits."""
+    idle = getattr(publisher, 'idle', None)
+    while idle and not wait([future], timeout=interval).done:
+        idle(0)
+    return future.result()
+
+def run_backfill_jobs(jobs, director, story_gen, segmented=False):
+    """
+    run_backfill() over several leagues sharing the same stage pools.
+
+    Weeks enter the pipeline round-robin across leagues (one week of each
+    league in turn), and fetches are only started ESPN_FETCH_CONCURRENCY * 2
+    weeks ahead, so a league with a long backlog can't hold up the others.
+    Each league publishes in its own week order; a slow week in one league
+    doesn't hold back another league's finished weeks.
+    """
+    with ThreadPoolExecutor(max_workers=ESPN_FETCH_CONCURRENCY) as fetch_pool, \
+         ThreadPoolExecutor(max_workers=WEEK_CONCURRENCY) as script_pool, \
+         ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY) as llm_pool:
+
+        schedule = round_robin(jobs)
+        fetches = deque()
+        in_flight = {id(job): deque() for job in jobs}
+
+        def fetch_ahead():
+            for job, week in schedule:
+                fetches.append((job, week, fetch_pool.submit(fetch_week, job.league, week)))
+                if len(fetches) >= ESPN_FETCH_CONCURRENCY * 2: break
+
+        def publish_ready(block):
+            for job in jobs:
+                pending = in_flight[id(job)]
+                while pending and (block or pending[0][2].done()):
+                    week, fingerprint, script_future = pending.popleft()
+                    try:
+                        script, games_processed = wait_serviced(script_future, job.publisher)
+                    except Exception as e:
+                        print(f"❌ {job.label(week)} script failed: {e}")
+                        continue
+                    checkpoints = job.checkpoints
+                    idempotency_key = checkpoints.idempotency_key(week, fingerprint) if checkpoints else None
+                    if publish_week(job.publisher, week, script, games_processed, idempotency_key, segmented) and checkpoints:
+                        checkpoints.mark_published(week, fingerprint)
+
+        fetch_ahead()
+        while fetches:
+            job, week, fetch_future = fetches.popleft()
+            fetch_ahead()
+            box_scores = wait_serviced(fetch_future, job.publisher)
+            if box_scores is not None:
+                records_by_game = ingest_records(job.records, week, box_scores)
+                checkpoints = job.checkpoints
+                fingerprint = box_score_fingerprint(box_scores) if checkpoints else None
+                if checkpoints and not job.force and checkpoints.is_current(week, fingerprint):
+                    print(f"⏭️ {job.label(week)} unchanged since last publish, skipping.")
+                else:
+                    in_flight[id(job)].append((week, fingerprint, script_pool.submit(generate_week, week, box_scores, director, story_gen, llm_pool, records_by_game, job.archive)))
+            publish_ready(block=False)
+
+        publish_ready(block=True)
+
+def run_live(league, week, director, publisher, key_prefix=None):
+    """Live in-game mode for `week` (see live_mode.py). Returns the number of cut-ins published."""
+    from live_mode import LiveSession
+    with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY) as llm_pool:
+        # Sleeping through the publisher keeps its connection's heartbeats answered between polls
+        sleep = getattr(publisher, 'idle', time.sleep)
+        return LiveSession(league, week, director, publisher, key_prefix=key_prefix).run(llm_pool, sleep=sleep)
+
+def parse_weeks(spec):
+    """Parses a week list like '1,3,5-7' into [1, 3, 5, 6, 7]."""
+    weeks = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part: continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            weeks.update(range(int(start), int(end) + 1))
+        else:
+            weeks.add(int(part))
+    return sorted(weeks)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape ESPN fantasy weeks and publish Matt & Jose scripts.")
+    parser.add_argument('--weeks', type=parse_weeks, help="Only (re)process these weeks, e.g. '3' or '1,4-6'. Ignores checkpoints.")
+    parser.add_argument('--since', type=int, help="Only (re)process weeks from this week through the current week. Ignores checkpoints.")
+    parser.add_argument('--force', action='store_true', help="Regenerate and republish even if a week's box scores are unchanged.")
+    parser.add_argument('--stream', action='store_true', default=STREAM_SEGMENTS, help="Publish each script segment as soon as it is generated instead of one message per week.")
+    parser.add_argument('--segmented', action='store_true', default=SEGMENTED_OUTPUT, help="Publish each week as a manifest plus one message per speaker segment, for parallel TTS.")
+    parser.add_argument('--replay', action='store_true', help="Run the whole pipeline from local box score snapshots, with no ESPN calls. Ignores checkpoints.")
+    parser.add_argument('--live', action='store_true', help="Poll the current week while games are on and publish cut-ins for lead changes and new storylines.")
+    parser.add_argument('--manifest', help="Run every league in this JSON manifest (multi-league mode) instead of ESPN_LEAGUE_ID.")
+    parser.add_argument('--metrics-file', default=METRICS_FILE, help="Write Prometheus text-format metrics to this file when the run ends.")
+    parser.add_argument('--report', default=RUN_REPORT_FILE, help="Write a JSON run report (stage timings, counters, token usage) to this file.")
+    args = parser.parse_args(argv)
+    if args.live and args.manifest:
+        parser.error("--live runs a single league; it can't be combined with --manifest")
+    return args
+
+def select_weeks(args, current_week):
+    """Weeks to process for a league at `current_week`, and whether checkpoints are ignored."""
+    if current_week == 0: current_week = 1
+
+    if args.weeks:
+        weeks = [w for w in args.weeks if 1 <= w <= current_week]
+    elif args.since:
+        weeks = list(range(max(1, args.since), current_week + 1))
+    else:
+        weeks = list(range(1, current_week + 1))
+    # A replay is asked for explicitly, so already-published weeks are regenerated too
+    force = args.force or args.replay or bool(args.weeks) or bool(args.since)
+    return weeks, force
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.metrics_file or args.report:
+        telemetry.enabled = True
+    if METRICS_PORT:
+        telemetry.serve_prometheus(METRICS_PORT)
+        print(f"📈 Serving metrics on :{METRICS_PORT}/metrics")
+
+    if args.manifest:
+        from multi_league import run_manifest
+        run_manifest(args)
+        return
+
+    if LEAGUE_ID == 0:
+        print("❌ ERROR: ESPN_LEAGUE_ID not found. Check your .env file.")
         return
 
-    analyzer = StatsAnalyzer()
+    # The Azure client (and the openai import behind it) gets built while ESPN and RabbitMQ connect
+    prewarm_client()
+
+    snapshots = SnapshotStore(LEAGUE_ID, YEAR)
+    if args.replay:
+        if not snapshots.weeks():
+            print(f"❌ No snapshots found at {snapshots.path}. Run once without --replay first.")
+            return
+        print(f"📼 Replaying League {LEAGUE_ID} from snapshots ({len(snapshots.weeks())} weeks)...")
+        league = SnapshotLeague(snapshots)
+    else:
+        print(f"🏈 Connecting to League {LEAGUE_ID}...")
+        try:
+            from espn_api.football import League
+            league = League(league_id=LEAGUE_ID, year=YEAR, espn_s2=ESPN_S2, swid=SWID)
+        except Exception as e:
+            print(f"❌ Failed to connect to ESPN: {e}")
+            return
+        # Live polls re-fetch the same unfinished week every few minutes; those aren't snapshotted
+        if SNAPSHOTS_ENABLED and not args.live:
+            league = RecordingLeague(league, snapshots)
+
     director = BroadcastDirector()
     
     print("🤖 Initializing Azure AI Storyline Generator...")
     try:
         story_gen = StorylineGenerator()
-        ai_enabled = True
     except ValueError as e:
         print(f"⚠️ AI Generator Error: {e}")
-        ai_enabled = False
         story_gen = None
 
     try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host=RABBITMQ_HOST))
-        channel = connection.channel()
-        channel.queue_declare(queue=QUEUE_NAME)
+        publisher = RabbitPublisher(
+            pika_connection_factory(RABBITMQ_HOST), QUEUE_NAME,
+            durable=RABBITMQ_DURABLE_QUEUE,
+            persistent=RABBITMQ_PERSISTENT,
+            confirm_window=RABBITMQ_CONFIRM_WINDOW,
+            encoding=RABBITMQ_ENCODING
+        )
+        publisher.connect()
     except Exception as e:
         print(f"❌ RabbitMQ Error: {e}")
         return
     
-    current_week = league.current_week
-    if current_week == 0: current_week = 1
+    records = archive = None
+    try:
+        if args.live:
+            week = max(1, league.current_week)
+            print(f"📡 Live mode for Week {week} (polling every {LIVE_POLL_MIN_SECONDS}-{LIVE_POLL_MAX_SECONDS}s)...")
+            run_live(league, week, director, publisher, key_prefix=f"{LEAGUE_ID}-{YEAR}")
+        else:
+            weeks, force = select_weeks(args, league.current_week)
 
-    print(f"📊 Processing weeks 1-{current_week}...")
-    
-    for week in range(1, current_week + 1):
-        try:
-            box_scores = league.box_scores(week)
-        except Exception as e:
-            print(f"⚠️ Could not fetch Week {week}: {e}")
-            continue
-
-        # --- RANK GAMES ---
-        game_rankings = []
-        for game in box_scores:
-            if isinstance(game.home_team, int) or isinstance(game.away_team, int): continue
-            excitement_score = (game.home_score + game.away_score) + (100 - abs(game.home_score - game.away_score))
-            game_rankings.append({'game': game, 'score': excitement_score})
-        
-        game_rankings.sort(key=lambda x: x['score'], reverse=True)
-        feature_games = [g['game'] for g in game_rankings[:3]]
-        quick_games = [g['game'] for g in game_rankings[3:]]
-
-        # --- GENERATE SCRIPT ---
-        print(f"🎬 Director generating Matt & Jose script for Week {week}...")
-        
-        # Intro
-        script = director.generate_intro(week) + "\n"
-        
-        games_processed = 0
-
-        # Feature Games
-        for game in feature_games:
-            players_dict = analyzer.get_player_performances(game)
-            notable_perfs = analyzer.find_interesting_performances(players_dict)
-            matchup_stories = analyzer.find_matchup_storylines(game, players_dict)
-            
-            if ai_enabled and story_gen:
-                stats_payload = {
-                    'team_1': {'team_name': game.home_team.team_name, 'score': game.home_score},
-                    'team_2': {'team_name': game.away_team.team_name, 'score': game.away_score}
-                }
-                
-                print(f"   🌟 FEATURE: {game.home_team.team_name} vs {game.away_team.team_name}...")
-                try:
-                    # 1. Transition
-                    transition = director.generate_transition(game.home_team.team_name, game.away_team.team_name)
-                    script += f"{transition}\n"
-
-                    # 2. Get the "Facts" from the Story Generator
-                    raw_story = story_gen.generate_storyline(stats=stats_payload, players=players_dict, notable_performances=notable_perfs, storylines=matchup_stories, records=[])
-                    
-                    if raw_story:
-                        # 3. Convert Facts into Banter
-                        winner_name = game.home_team.team_name if game.home_score > game.away_score else game.away_team.team_name
-                        winner_score = max(game.home_score, game.away_score)
-                        
-                        banter = director.generate_banter_recap(raw_story, winner_name, winner_score)
-                        script += f"{banter}\n"
-                        games_processed += 1
-
-                except Exception as e:
-                    print(f"   ❌ AI Gen Error: {e}")
-
-        # Quick Games (Matt reads these alone quickly)
-        if quick_games:
-            script += "[MATT]: AND IN OTHER ACTION AROUND THE LEAGUE...\n"
-            for game in quick_games:
-                winner = game.home_team.team_name if game.home_score > game.away_score else game.away_team.team_name
-                loser = game.away_team.team_name if game.home_score > game.away_score else game.home_team.team_name
-                script += f"[MATT]: {winner} defeated {loser}, {max(game.home_score, game.away_score)} to {min(game.home_score, game.away_score)}.\n"
-                games_processed += 1
+            checkpoints = CheckpointStore(LEAGUE_ID, YEAR)
+            records = RecordsEngine(LEAGUE_ID, YEAR, min_history_weeks=RECORDS_MIN_HISTORY_WEEKS) if RECORDS_ENABLED else None
+            archive = StorylineArchive(LEAGUE_ID, YEAR) if STORYLINE_ARCHIVE_ENABLED else None
 
-        # Outro
-        script += director.generate_outro(week)
-        
-        if games_processed > 0:
-            message = {
-                "week": week,
-                "shortName": f"Week_{week}_Full_Recap",
-                "home_team": "Recap", "home_score": 0, "home_roster": [],
-                "away_team": "Recap", "away_score": 0, "away_roster": [],
-                "storylines": [],
-                "ai_recap": script
-            }
-            channel.basic_publish(exchange='', routing_key=QUEUE_NAME, body=json.dumps(message))
-            print(f" [x] Sent Matt & Jose Script for Week {week}")
-        else:
-            print(f" [!] Skipping Week {week} message (No games processed).")
+            print(f"📊 Processing weeks {', '.join(map(str, weeks))} (fetch x{ESPN_FETCH_CONCURRENCY}, weeks x{WEEK_CONCURRENCY}, AI calls x{LLM_MAX_CONCURRENCY})...")
+            if args.stream:
+                run_streaming(league, weeks, director, story_gen, publisher, checkpoints=checkpoints, force=force, records=records, archive=archive)
+            else:
+                run_backfill(league, weeks, director, story_gen, publisher, checkpoints=checkpoints, force=force, records=records, segmented=args.segmented, archive=archive)
+    finally:
+        # Even after a failed run: buffered storylines are appended, SQLite closed and pending messages confirmed or spilled
+        if records:
+            records.close()
+        if archive is not None:
+            archive.close()
+        publisher.close()
+
+    publisher_stats = publisher.stats()
+    print(f"📨 RabbitMQ: {publisher_stats['published']} published, {publisher_stats['spilled']} spilled to outbox, {publisher_stats['reconnects']} reconnects")
+
+    scheduler_stats = get_shared_scheduler().stats()
+    print(f"⏱️ Azure OpenAI: ~{scheduler_stats['tokens_used']} tokens, {scheduler_stats['retries']} retries ({scheduler_stats['rate_limited']} rate limited)")
+
+    cache = get_shared_cache()
+    if cache:
+        cache_stats = cache.stats()
+        print(f"💾 LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, ~{cache_stats['tokens_saved']} tokens saved")
 
-    connection.close()
+    if args.metrics_file:
+        telemetry.write_prometheus(args.metrics_file)
+        print(f"📈 Metrics written to {args.metrics_file}")
+    if args.report:
+        telemetry.write_report(args.report)
+        print(f"📈 Run report written to {args.report}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,188 @@
+import hashlib
+import re
+from collections import namedtuple
+
+SPEAKERS = ('MATT', 'JOSE')
+SPEAKER_TAG = re.compile(r'\[(MATT|JOSE)\]:')
+DEFAULT_SPEAKER = 'MATT'
+
+# Loose speaker tags the LLM writes instead of [MATT]:/[JOSE]:, e.g. "[Matt]",
+# "(JOSE):", "**Matt:**" or "JOSE:" at the start of a line, or a second
+# host's "JOSE:" run into the same line right after a sentence ends. A bare
+# "[Jose]" waits for its colon or its first word, so a colon streamed in after it
+# isn't left behind in the text.
+_BRACKET_TAG = re.compile(r'\[\s*(matt|jose)\s*\](?:\s*:|(?=\s*[^\s:]))|\(\s*(matt|jose)\s*\)\s*:', re.I)
+_BARE_TAG = re.compile(r'\[\s*(?:matt|jose)\s*\]', re.I)
+_LINE_TAG = re.compile(r'^[ \t*_#>-]*(matt|jose)[ \t*_]*:[ \t*_]*', re.I | re.M)
+_INLINE_TAG = re.compile(r'(?<=[.!?"\'*)])[ \t]+\**(matt|jose)\**[ \t]*:[ \t*]*', re.I)
+# The same host tagged twice in a row, e.g. "[JOSE]: Jose: I agree"
+_REPEATED_TAG = re.compile(r'\[(MATT|JOSE)\]:[ \t*_]*(?:\[\1\]:|\1[ \t*_]*:)[ \t*_]*', re.I)
+
+# Stage directions ("*laughs*", "(clears throat)") and markdown left in the text would
+# be read out. Other *emphasis* keeps its words and only loses the asterisks.
+_STAGE_DIRECTIONS = (
+    'laugh', 'laughs', 'laughing', 'chuckle', 'chuckles', 'chuckling', 'sigh', 'sighs', 'sighing',
+    'pause', 'pauses', 'gasp', 'gasps', 'groan', 'groans', 'clears throat', 'coughs', 'whistles',
+    'applause', 'cheers', 'shrugs', 'grins', 'smiles', 'claps', 'sniffs', 'scoffs', 'winks'
+)
+_ACTION = re.compile(
+    r'(?<!\*)\*[ \t]*(?:%(words)s)\b[^*\n]{0,30}\*(?!\*)|\([ \t]*(?:%(words)s)\b[^()\n]{0,30}\)'
+    % {'words': '|'.join(_STAGE_DIRECTIONS)}, re.I
+)
+_MARKUP = re.compile(r'[*`]')
+# Markdown headers ("## Week 3") and _emphasis_/__strong__ only: "#1 seed" and
+# "Snake_Case FC" are read as written
+_HEADER = re.compile(r'(?:^|(?<=\s))#{1,6}(?=\s)')
+_UNDERSCORE_EMPHASIS = re.compile(r'(?<![A-Za-z0-9_])(__?)(?=[^\s_])([^_\n]+?)(?<=[^\s_])\1(?![A-Za-z0-9_])')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Newscast pace (~155 words a minute), used to estimate each segment's audio length
+WORDS_PER_SECOND = 2.6
+MIN_SEGMENT_SECONDS = 0.5
+MAX_SEGMENT_SECONDS = 20.0
+
+Segment = namedtuple('Segment', 'id index speaker text duration')
+SegmentedShow = namedtuple('SegmentedShow', 'segments repairs duration')
+
+
+def normalize_tags(text):
+    """Rewrites loose speaker tags as [MATT]:/[JOSE]:."""
+    text = _BRACKET_TAG.sub(lambda m: f"[{(m.group(1) or m.group(2)).upper()}]:", text)
+    text = _LINE_TAG.sub(lambda m: f"[{m.group(1).upper()}]: ", text)
+    text = _INLINE_TAG.sub(lambda m: f" [{m.group(1).upper()}]: ", text)
+    return _REPEATED_TAG.sub(lambda m: f"[{m.group(1).upper()}]: ", text)
+
+
+def clean_text(text):
+    """Segment text as the TTS worker should read it, or "" if nothing speakable is left."""
+    text = _MARKUP.sub('', _ACTION.sub(' ', text))
+    text = _UNDERSCORE_EMPHASIS.sub(r'\2', _HEADER.sub('', text))
+    # The worker drops the text straight into SSML
+    text = text.replace('&', ' and ').replace('<', ' ').replace('>', ' ')
+    text = " ".join(text.split()).lstrip(':;,- ')
+    return text if re.search(r'[A-Za-z0-9]', text) else ""
+
+
+def estimate_duration(text):
+    return round(max(MIN_SEGMENT_SECONDS, len(text.split()) / WORDS_PER_SECOND), 1)
+
+
+def segment_id(show, index, speaker, text):
+    # Changes whenever the segment's words do, so a regenerated line is never mistaken for the old audio
+    digest = hashlib.sha256(f"{speaker}:{text}".encode('utf-8')).hexdigest()
+    return f"{show}-{index:03d}-{digest[:8]}"
+
+
+def make_segment(show, index, speaker, text):
+    return Segment(segment_id(show, index, speaker, text), index, speaker, text, estimate_duration(text))
+
+
+def manifest_entries(segments):
+    """What a TTS worker pool needs to put a show back together in order."""
+    return [{'id': s.id, 'index': s.index, 'speaker': s.speaker, 'duration_seconds': s.duration} for s in segments]
+
+
+class SegmentParser:
+    """
+    Incrementally splits Matt & Jose script text into speaker segments.
+
+    Feed it text as it arrives (e.g. streamed completion deltas). A segment is
+    complete once the next [MATT]:/[JOSE]: tag shows up, so feed() returns
+    only finished (speaker, text) pairs and keeps the rest buffered. Call
+    flush() at the end of a block to get the final segment. Untagged text
+    is read by Matt, the same default the TTS worker uses. Loose tags
+    ("Jose:", "**MATT:**") are normalized first, so they split turns too.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._speaker = None
+
+    def feed(self, text):
+        self._buffer = normalize_tags(self._buffer + text)
+        segments = []
+        while True:
+            match = SPEAKER_TAG.search(self._buffer)
+            if not match:
+                break
+            segment = self._segment(self._buffer[:match.start()])
+            if segment:
+                segments.append(segment)
+            self._speaker = match.group(1)
+            self._buffer = self._buffer[match.end():]
+        return segments
+
+    def flush(self):
+        # A bare tag still buffered ends the block with nothing to say
+        segment = self._segment(_BARE_TAG.sub('', self._buffer))
+        self._buffer = ""
+        self._speaker = None
+        return [segment] if segment else []
+
+    def _segment(self, text):
+        text = " ".join(text.split())
+        if not text:
+            return None
+        return (self._speaker or DEFAULT_SPEAKER, text)
+
+
+def split_segments(script):
+    """Splits a complete script into [(speaker, text), ...]."""
+    parser = SegmentParser()
+    return parser.feed(script) + parser.flush()
+
+
+def _split_long(text, max_seconds):
+    """Breaks text longer than max_seconds at sentence ends (a single long sentence stays whole)."""
+    max_words = max(1, int(max_seconds * WORDS_PER_SECOND))
+    chunks, current = [], []
+    for sentence in _SENTENCE_END.split(text):
+        words = len(sentence.split())
+        if current and sum(len(s.split()) for s in current) + words > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        current.append(sentence)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def segment_script(script, show, max_seconds=MAX_SEGMENT_SECONDS):
+    """
+    Turns a finished show script into ordered, validated TTS segments.
+
+    Loose tags are normalized and untagged text goes to Matt. Stage
+    directions, markdown and SSML-breaking characters are stripped, and
+    segments with nothing speakable left are dropped. Back-to-back turns by
+    the same host are merged, and turns longer than `max_seconds` are split
+    at sentence ends, so the TTS workers get evenly sized pieces. Returns a
+    SegmentedShow with the segments, a list of the repairs made and the
+    show's estimated length in seconds.
+    """
+    repairs = []
+    normalized = normalize_tags(script)
+    if normalized != script:
+        repairs.append("normalized loose speaker tags")
+    if normalized.strip() and not SPEAKER_TAG.match(normalized.strip()):
+        repairs.append(f"untagged opening line given to {DEFAULT_SPEAKER}")
+
+    turns = []
+    for speaker, text in split_segments(normalized):
+        cleaned = clean_text(text)
+        if not cleaned:
+            repairs.append(f"dropped an empty {speaker} line")
+            continue
+        if turns and turns[-1][0] == speaker and estimate_duration(turns[-1][1] + " " + cleaned) <= max_seconds:
+            turns[-1] = (speaker, turns[-1][1] + " " + cleaned)
+            continue
+        turns.append((speaker, cleaned))
+
+    segments = []
+    for speaker, text in turns:
+        chunks = _split_long(text, max_seconds) if estimate_duration(text) > max_seconds else [text]
+        if len(chunks) > 1:
+            repairs.append(f"split a long {speaker} line into {len(chunks)} segments")
+        for chunk in chunks:
+            segments.append(make_segment(show, len(segments), speaker, chunk))
+
+    return SegmentedShow(segments, list(dict.fromkeys(repairs)), round(sum(s.duration for s in segments), 1))
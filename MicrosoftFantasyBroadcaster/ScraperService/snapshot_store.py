@@ -0,0 +1,200 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "data", "snapshots")
+
+SNAPSHOT_MAGIC = b"FZSNAP1\n"
+
+# Decoded weeks kept in memory per store (a replay touches each week a couple of times in a row)
+DECODED_CACHE_WEEKS = 4
+
+
+# --- Lightweight stand-ins for the espn_api objects the scraper reads ---
+class SnapshotTeam:
+    def __init__(self, team_name):
+        self.team_name = team_name
+
+
+class SnapshotPlayer:
+    def __init__(self, name, position, slot_position, lineupSlot, points, stats):
+        self.name = name
+        self.position = position
+        self.slot_position = slot_position
+        self.lineupSlot = lineupSlot
+        self.points = points
+        self.stats = stats
+
+
+class SnapshotBoxScore:
+    def __init__(self, home_team, away_team, home_score, away_score, home_lineup, away_lineup):
+        self.home_team = home_team
+        self.away_team = away_team
+        self.home_score = home_score
+        self.away_score = away_score
+        self.home_lineup = home_lineup
+        self.away_lineup = away_lineup
+
+
+def _encode_team(team):
+    # Bye weeks show up as a bare int instead of a Team object
+    if isinstance(team, int) or team is None: return None
+    return team.team_name
+
+
+def _decode_team(name):
+    return 0 if name is None else SnapshotTeam(name)
+
+
+def _encode_player(player):
+    # player.stats is keyed by week number (int), which JSON would turn into a
+    # string, so it is stored as [key, value] pairs to round-trip exactly.
+    return [
+        player.name, player.position, player.slot_position,
+        getattr(player, 'lineupSlot', player.slot_position), player.points,
+        [[k, v] for k, v in (player.stats or {}).items()]
+    ]
+
+
+def _decode_player(row):
+    name, position, slot_position, lineup_slot, points, stats = row
+    return SnapshotPlayer(name, position, slot_position, lineup_slot, points, {k: v for k, v in stats})
+
+
+def encode_box_scores(box_scores):
+    games = []
+    for game in box_scores:
+        games.append([
+            _encode_team(game.home_team), _encode_team(game.away_team),
+            game.home_score, game.away_score,
+            [_encode_player(p) for p in getattr(game, 'home_lineup', [])],
+            [_encode_player(p) for p in getattr(game, 'away_lineup', [])]
+        ])
+    raw = json.dumps(games, separators=(',', ':'), ensure_ascii=False, default=str)
+    return zlib.compress(raw.encode('utf-8'), 6)
+
+
+def decode_box_scores(blob):
+    games = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return [
+        SnapshotBoxScore(
+            _decode_team(home), _decode_team(away), home_score, away_score,
+            [_decode_player(p) for p in home_lineup],
+            [_decode_player(p) for p in away_lineup]
+        )
+        for home, away, home_score, away_score, home_lineup, away_lineup in games
+    ]
+
+
+class SnapshotStore:
+    """
+    On-disk snapshots of a league/season's weekly box scores.
+
+    Each week is one zlib-compressed JSON block appended to a single
+    `<league>_<year>.snap` file, with a small `.idx.json` sidecar mapping
+    week -> (offset, length). Reads memory-map the file and only decode the
+    weeks actually asked for, so replaying a whole season never touches the
+    network and never parses weeks it doesn't need. Re-recording a week with
+    identical data is a no-op; changed data (stat corrections) is appended
+    and the index repointed.
+    """
+
+    def __init__(self, league_id, year, directory=DEFAULT_SNAPSHOT_DIR, path=None, cache_weeks=DECODED_CACHE_WEEKS):
+        self.path = path or os.path.join(directory, f"{league_id}_{year}.snap")
+        self.index_path = self.path + ".idx.json"
+        self.cache_weeks = cache_weeks
+        self._lock = threading.Lock()
+        # LRU of decoded weeks, at most `cache_weeks` of them
+        self._decoded = OrderedDict()
+        self._mmap = None
+        self._index = {'current_week': 0, 'weeks': {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+
+    @property
+    def current_week(self):
+        return self._index.get('current_week', 0)
+
+    def weeks(self):
+        return sorted(int(w) for w in self._index['weeks'])
+
+    def has_week(self, week):
+        return str(week) in self._index['weeks']
+
+    def save_week(self, week, box_scores, current_week=None):
+        blob = encode_box_scores(box_scores)
+        digest = hashlib.sha256(blob).hexdigest()
+        with self._lock:
+            entry = self._index['weeks'].get(str(week))
+            if entry is None or entry['sha256'] != digest:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, 'ab') as f:
+                    if f.tell() == 0:
+                        f.write(SNAPSHOT_MAGIC)
+                    offset = f.tell()
+                    f.write(blob)
+                self._index['weeks'][str(week)] = {'offset': offset, 'length': len(blob), 'sha256': digest}
+                self._decoded.pop(week, None)
+                self._close_mmap()
+            if current_week is not None:
+                self._index['current_week'] = max(self._index.get('current_week', 0), current_week)
+            self._save_index()
+
+    def load_week(self, week):
+        with self._lock:
+            if week in self._decoded:
+                self._decoded.move_to_end(week)
+                return self._decoded[week]
+            entry = self._index['weeks'].get(str(week))
+            if entry is None:
+                raise KeyError(f"No snapshot for week {week} in {self.path}")
+            if self._mmap is None:
+                with open(self.path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            blob = self._mmap[entry['offset']:entry['offset'] + entry['length']]
+            box_scores = decode_box_scores(blob)
+            self._decoded[week] = box_scores
+            while len(self._decoded) > self.cache_weeks:
+                self._decoded.popitem(last=False)
+            return box_scores
+
+    def _close_mmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+
+class RecordingLeague:
+    """Wraps an espn_api League and snapshots every week it fetches."""
+
+    def __init__(self, league, store):
+        self._league = league
+        self.store = store
+        self.current_week = league.current_week
+
+    def box_scores(self, week):
+        box_scores = self._league.box_scores(week)
+        self.store.save_week(week, box_scores, current_week=self.current_week)
+        return box_scores
+
+
+class SnapshotLeague:
+    """League look-alike that serves box scores from a SnapshotStore, with zero network I/O."""
+
+    def __init__(self, store):
+        self.store = store
+        self.current_week = store.current_week or max(store.weeks(), default=0)
+
+    def box_scores(self, week):
+        return self.store.load_week(week)
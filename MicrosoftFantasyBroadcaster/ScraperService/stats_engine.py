@@ -0,0 +1,258 @@
+import re
+import sys
+
+# numpy is imported by the first StatsFrame, so just importing the scraper stays fast
+np = None
+
+
+def _load_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+# Columns loaded for every active lineup slot
+STAT_FIELDS = (
+    'passingYards', 'passingTouchdowns',
+    'rushingYards', 'rushingTouchdowns',
+    'receivingYards', 'receivingTouchdowns'
+)
+
+POSITION_CODES = {'QB': 0, 'RB': 1, 'WR': 2, 'TE': 3, 'K': 4, 'D/ST': 5}
+
+# Derived metrics: how to compute the column from the loaded columns, and the
+# same value from a player's stats (used to format the message text with the
+# player's exact stat value rather than the float column).
+DERIVED_METRICS = {
+    'totalTouchdowns': (
+        lambda cols: cols['rushingTouchdowns'] + cols['receivingTouchdowns'],
+        lambda stats, points: stats.get('rushingTouchdowns', 0) + stats.get('receivingTouchdowns', 0)
+    ),
+    'points': (
+        lambda cols: cols['points'],
+        lambda stats, points: points
+    ),
+}
+
+# Declarative notable-performance rules: (positions or None for all, metric,
+# threshold, message). For each player, rules fire in table order. This table
+# is the one place the thresholds live.
+NOTABLE_RULES = (
+    (('QB',), 'passingYards', 350, "🚀 {name}: {value} passing yards!"),
+    (('QB',), 'passingTouchdowns', 4, "🎯 {name}: {value} passing TDs!"),
+    (('RB',), 'totalTouchdowns', 2, "🔥 {name}: {value} total TDs!"),
+    (('RB',), 'rushingYards', 100, "💯 {name}: {value} rushing yards!"),
+    (('WR', 'TE'), 'receivingTouchdowns', 2, "🎯 {name}: {value} receiving TDs!"),
+    (('WR', 'TE'), 'receivingYards', 100, "💯 {name}: {value} receiving yards!"),
+    (None, 'points', 30, "🌟 {name}: MONSTER game ({value} pts)!"),
+)
+
+BLOWOUT_MARGIN = 40
+NAIL_BITER_MARGIN = 5
+MONSTER_TEAM_SCORE = 150
+
+MONSTER_SCORE_TEMPLATE = "🔥 {name}: MONSTER SCORE ({value} pts)!"
+
+
+def _template_pattern(template):
+    pattern = re.escape(template).replace(re.escape("{name}"), "(.+)").replace(re.escape("{value}"), r"(-?[0-9.]+)")
+    return re.compile(pattern)
+
+
+_NOTABLE_PATTERNS = [(_template_pattern(template), threshold) for _, _, threshold, template in NOTABLE_RULES]
+_MONSTER_SCORE_PATTERN = _template_pattern(MONSTER_SCORE_TEMPLATE)
+
+
+def notable_weight(text):
+    """
+    How far past its rule's threshold a notable-performance line is (1.0 =
+    just made it, 2.0 = double the threshold), so a 500-yard game outranks
+    a 100-yard one whichever team it came from. Unknown lines count as 1.0.
+    """
+    for pattern, threshold in _NOTABLE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            return float(match.group(2)) / threshold
+    return 1.0
+
+
+def storyline_weight(text):
+    """MONSTER SCORE lines rank by score; the matchup's blowout/nail-biter line always ranks first."""
+    match = _MONSTER_SCORE_PATTERN.fullmatch(text)
+    return float(match.group(2)) / MONSTER_TEAM_SCORE if match else float('inf')
+
+
+def raw_stats_for(player):
+    """A player's stats dict for the week (lineup slot entry, else the first one)."""
+    raw_stats = player.stats.get(player.lineupSlot, {})
+    if not raw_stats:
+        keys = list(player.stats.keys())
+        if keys: raw_stats = player.stats[keys[0]]
+    return raw_stats
+
+
+def _team_name(team):
+    return None if isinstance(team, int) else team.team_name
+
+
+# Stat fields a PlayerLine keeps: the StatsFrame columns plus what the records engine reads
+LINE_FIELDS = STAT_FIELDS + ('receivingReceptions',)
+
+
+def intern_name(name):
+    # Player, team and position names repeat every week; keep one copy of each
+    return sys.intern(name) if isinstance(name, str) else name
+
+
+class PlayerLine:
+    """
+    One active lineup slot, cut down to what the analyzers and the records
+    engine read: interned names, fantasy points and one slot per
+    LINE_FIELDS stat, instead of the player's full raw stats mapping.
+    get(field) reads a stat the way the raw stats dict would.
+    """
+    __slots__ = ('name', 'team', 'position', 'points') + LINE_FIELDS
+
+    def __init__(self, name, team, position, points, stats):
+        self.name = name
+        self.team = team
+        self.position = position
+        self.points = points
+        for field in LINE_FIELDS:
+            setattr(self, field, stats.get(field, 0))
+
+    @classmethod
+    def from_player(cls, player, team_name):
+        return cls(intern_name(player.name), intern_name(team_name), intern_name(player.position),
+                   player.points, raw_stats_for(player))
+
+    def get(self, field, default=0):
+        return getattr(self, field, default) if field in LINE_FIELDS else default
+
+
+def player_lines(game):
+    """(side, PlayerLine) for every active lineup slot of a game, home lineup first."""
+    for side, lineup_attr, team in (('home', 'home_lineup', game.home_team), ('away', 'away_lineup', game.away_team)):
+        team_name = _team_name(team)
+        for player in getattr(game, lineup_attr, []):
+            if player.slot_position == 'BE': continue
+            yield side, PlayerLine.from_player(player, team_name)
+
+
+class StatsFrame:
+    """
+    Columnar view of every active lineup slot across a set of games, built
+    once and then queried with vectorized masks.
+
+    `games` is a list of box score objects; pass a whole week, or a season
+    across leagues (see from_weeks). Game ids are positions in that list and
+    rows keep home-then-away lineup order within each game, so results come
+    out in lineup order.
+    """
+
+    def __init__(self, games, game_keys=None):
+        _load_numpy()
+        games = list(games)
+        self.game_keys = list(game_keys) if game_keys is not None else list(range(len(games)))
+        # The frame keeps PlayerLines and each game's names and scores, not the box score objects
+        self._game_ids = {id(game): i for i, game in enumerate(games)}
+        self.matchups = [(intern_name(_team_name(g.home_team)), intern_name(_team_name(g.away_team)), g.home_score, g.away_score)
+                         for g in games]
+
+        lines, game_ids = [], []
+        for gid, game in enumerate(games):
+            for _, line in player_lines(game):
+                lines.append(line)
+                game_ids.append(gid)
+        self.lines = lines
+
+        self.game_id = np.asarray(game_ids, dtype=np.int32)
+        self.position_code = np.asarray([POSITION_CODES.get(line.position, -1) for line in lines], dtype=np.int8)
+        self.columns = {'points': np.asarray([line.points for line in lines], dtype=np.float64)}
+        for field in STAT_FIELDS:
+            self.columns[field] = np.asarray([line.get(field) for line in lines], dtype=np.float64)
+        for metric, (column_fn, _) in DERIVED_METRICS.items():
+            self.columns[metric] = column_fn(self.columns)
+
+        self.home_score = np.asarray([m[2] for m in self.matchups], dtype=np.float64)
+        self.away_score = np.asarray([m[3] for m in self.matchups], dtype=np.float64)
+
+    @classmethod
+    def from_weeks(cls, weeks):
+        """Builds one frame from {key: box_scores}, e.g. {(league_id, week): [...]}."""
+        games, keys = [], []
+        for key, box_scores in weeks.items():
+            for i, game in enumerate(box_scores):
+                games.append(game)
+                keys.append((key, i))
+        return cls(games, keys)
+
+    def game_index(self, game):
+        """Game id of one of the box score objects the frame was built from."""
+        return self._game_ids[id(game)]
+
+    def _value(self, metric, row):
+        line = self.lines[row]
+        if metric in DERIVED_METRICS:
+            return DERIVED_METRICS[metric][1](line, line.points)
+        return line.get(metric, 0)
+
+    def notable_by_game(self):
+        """All rule hits for every game in one pass: {game_id: [notable strings]}."""
+        if not len(self.game_id):
+            return {}
+        masks = np.empty((len(self.game_id), len(NOTABLE_RULES)), dtype=bool)
+        for r, (positions, metric, threshold, _) in enumerate(NOTABLE_RULES):
+            mask = self.columns[metric] >= threshold
+            if positions is not None:
+                mask &= np.isin(self.position_code, [POSITION_CODES[p] for p in positions])
+            masks[:, r] = mask
+
+        # Row-major nonzero keeps player order, then rule order within a player
+        notable = {}
+        for row, r in zip(*np.nonzero(masks)):
+            _, metric, _, template = NOTABLE_RULES[r]
+            text = template.format(name=self.lines[row].name, value=self._value(metric, row))
+            notable.setdefault(int(self.game_id[row]), []).append(text)
+        return notable
+
+    def storylines_by_game(self):
+        """Matchup storylines for every game: {game_id: [storyline strings]}."""
+        diff = np.abs(self.home_score - self.away_score)
+        blowout = diff >= BLOWOUT_MARGIN
+        nail_biter = ~blowout & (diff <= NAIL_BITER_MARGIN)
+        home_monster = self.home_score >= MONSTER_TEAM_SCORE
+        away_monster = self.away_score >= MONSTER_TEAM_SCORE
+
+        storylines = {}
+        for gid in np.nonzero(blowout | nail_biter | home_monster | away_monster)[0]:
+            home_team, away_team, home_score, away_score = self.matchups[gid]
+            margin = abs(home_score - away_score)
+            lines = storylines.setdefault(int(gid), [])
+            if blowout[gid]:
+                winner = home_team if home_score > away_score else away_team
+                lines.append(f"💣 BLOWOUT! {winner} dominates by {margin:.1f} points!")
+            elif nail_biter[gid]:
+                lines.append(f"😰 NAIL-BITER! Just {margin:.1f} points separate them!")
+            if home_monster[gid]: lines.append(MONSTER_SCORE_TEMPLATE.format(name=home_team, value=home_score))
+            if away_monster[gid]: lines.append(MONSTER_SCORE_TEMPLATE.format(name=away_team, value=away_score))
+        return storylines
+
+    def leaderboard(self, metric='points', n=5, positions=None):
+        """Top `n` active players by `metric`: [(name, team_name, value), ...]."""
+        values = self.columns[metric]
+        rows = np.arange(len(values))
+        if positions is not None:
+            rows = rows[np.isin(self.position_code, [POSITION_CODES[p] for p in positions])]
+        top = rows[np.argsort(-values[rows], kind='stable')[:n]]
+        return [(self.lines[row].name, self.lines[row].team, self._value(metric, row)) for row in top]
+
+    def top_performer_by_game(self, metric='points'):
+        """Best active player in each game by `metric`: {game_id: (name, team_name, value)}."""
+        values = self.columns[metric]
+        if not len(values):
+            return {}
+        # Sort by game, then by value descending; the first row of each game wins
+        order = np.lexsort((-values, self.game_id))
+        firsts = order[np.r_[True, self.game_id[order][1:] != self.game_id[order][:-1]]]
+        return {int(self.game_id[row]): (self.lines[row].name, self.lines[row].team, self._value(metric, row)) for row in firsts}
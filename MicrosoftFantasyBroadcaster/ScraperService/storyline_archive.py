@@ -0,0 +1,284 @@
+"""
+Bulk archive of generated storylines: python storyline_archive.py --import
+
+Every storyline of a league/season goes into one append-only
+`<league>_<year>.arc` file (one zlib-compressed JSON record each). Its
+`.idx.jsonl` sidecar is append-only too: one line per archived record, keyed
+by (week, matchup, prompt hash), replayed on load with the newest line for a
+key winning. Writes are buffered and appended STORYLINE_ARCHIVE_BATCH_SIZE
+records at a time, with one index append per batch. Lookups are a dict hit
+plus one read; iter_records() streams a week (or a season) back in the order
+it was written, for re-publishing old shows.
+
+--import moves the old one-file-per-matchup data/storylines/week_*.txt
+files into the archive. They don't record their prompt, so they are keyed
+with an empty prompt hash, and their matchup is the filename's as written
+(see legacy_matchup_key()): the old writer's replacements can't be undone.
+"""
+import argparse
+import atexit
+import glob
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from config import LEAGUE_ID, YEAR, STORYLINE_ARCHIVE_BATCH_SIZE
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), "data", "storyline_archive")
+LEGACY_STORYLINE_DIR = os.path.join(os.path.dirname(__file__), "data", "storylines")
+
+ARCHIVE_MAGIC = b"FZARC1\n"
+
+_LEGACY_NAME = re.compile(r'^week_(\d+)_(.+)\.txt$')
+_LEGACY_HEADER = re.compile(r'^Week \d+ Matchup Recap[^\n]*\nGenerated: ([^\n]*)\n=+\n\n')
+
+
+def prompt_hash(prompt, system_message=None):
+    """Short digest of the prompt a storyline was generated from."""
+    return hashlib.sha256(f"{system_message or ''}\n{prompt}".encode('utf-8')).hexdigest()[:16]
+
+
+def legacy_matchup_key(matchup_info):
+    """The matchup an imported .txt storyline is archived under, as the old save_storyline named the file."""
+    return matchup_info.replace(" ", "_").replace("/", "-")
+
+
+def _key(week, matchup, prompt_digest):
+    return f"{week}|{matchup}|{prompt_digest}"
+
+
+class StorylineArchive:
+    """
+    One league/season's storylines in a single append-only file.
+
+    put() buffers a record and flush() appends the whole batch in one write,
+    so archiving a week costs one archive append and one index append instead
+    of a file per matchup. Re-putting a record with the same key and text is a
+    no-op; changed text is appended along with a new index line for its key.
+    """
+
+    def __init__(self, league_id, year, directory=DEFAULT_ARCHIVE_DIR, path=None, batch_size=STORYLINE_ARCHIVE_BATCH_SIZE):
+        self.league_id = league_id
+        self.year = year
+        self.path = path or os.path.join(directory, f"{league_id}_{year}.arc")
+        self.index_path = self.path + ".idx.jsonl"
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._pending = {}
+        self._index = {}
+        # (week, matchup) -> key of its newest record, whatever the prompt
+        self._latest = {}
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'rb') as f:
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            # A flush that died mid-line: its records are unindexed and get re-put on the next run
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(len(complete))
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            key = entry.pop('key')
+            self._index[key] = entry
+            self._latest[(entry['week'], entry['matchup'])] = key
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index) + sum(1 for key in self._pending if key not in self._index)
+
+    def weeks(self):
+        with self._lock:
+            return sorted({week for week, _ in self._latest})
+
+    def put(self, week, matchup, storyline, prompt_digest="", generated_at=None):
+        """Buffers one storyline. Returns its key."""
+        record = {
+            'league_id': self.league_id, 'year': self.year, 'week': week, 'matchup': matchup,
+            'prompt_hash': prompt_digest, 'generated_at': generated_at or time.time(), 'storyline': storyline
+        }
+        digest = hashlib.sha256(storyline.encode('utf-8')).hexdigest()
+        key = _key(week, matchup, prompt_digest)
+        with self._lock:
+            entry = self._index.get(key)
+            if key not in self._pending and entry is not None and entry['sha256'] == digest:
+                return key
+            self._pending[key] = (record, digest)
+            self._latest[(week, matchup)] = key
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+        return key
+
+    def get(self, week, matchup, prompt_digest=None):
+        """The archived record, or None. Without a prompt hash, the newest one for the matchup."""
+        with self._lock:
+            key = self._latest.get((week, matchup)) if prompt_digest is None else _key(week, matchup, prompt_digest)
+            if key in self._pending:
+                return dict(self._pending[key][0])
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if self._mmap is None:
+                with open(self.path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._decode(self._mmap[entry['offset']:entry['offset'] + entry['length']])
+
+    def iter_records(self, week=None):
+        """
+        Streams records in the order they were archived, one decoded at a
+        time. Only the current version of each key is yielded.
+        """
+        self.flush()
+        with self._lock:
+            entries = [e for e in self._index.values() if week is None or e['week'] == week]
+        entries.sort(key=lambda e: e['offset'])
+        if not entries:
+            return
+        with open(self.path, 'rb') as f:
+            for entry in entries:
+                f.seek(entry['offset'])
+                yield self._decode(f.read(entry['length']))
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._close_mmap()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        entries = {}
+        with open(self.path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(ARCHIVE_MAGIC)
+            offset = f.tell()
+            chunks = []
+            for key, (record, digest) in self._pending.items():
+                blob = zlib.compress(json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), 6)
+                chunks.append(blob)
+                entries[key] = {
+                    'week': record['week'], 'matchup': record['matchup'], 'prompt_hash': record['prompt_hash'],
+                    'offset': offset, 'length': len(blob), 'sha256': digest
+                }
+                offset += len(blob)
+            f.write(b"".join(chunks))
+        # Index lines go in only once their records are in the archive
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(dict(entry, key=key), separators=(',', ':'), ensure_ascii=False) + "\n"
+                            for key, entry in entries.items()))
+        self._index.update(entries)
+        self._pending = {}
+        self._close_mmap()
+
+    @staticmethod
+    def _decode(blob):
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def _close_mmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+_shared_archives = {}
+_shared_archives_lock = threading.Lock()
+
+
+def get_shared_archive(league_id=LEAGUE_ID, year=YEAR):
+    """The process-wide archive for a league/season. Buffered records are flushed at exit."""
+    with _shared_archives_lock:
+        archive = _shared_archives.get((league_id, year))
+        if archive is None:
+            archive = _shared_archives[(league_id, year)] = StorylineArchive(league_id, year)
+            atexit.register(archive.close)
+        return archive
+
+
+def parse_legacy_storyline(path):
+    """(week, matchup, storyline, generated_at) from a week_<N>_<matchup>.txt file, or None."""
+    match = _LEGACY_NAME.match(os.path.basename(path))
+    if not match:
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    generated_at = os.path.getmtime(path)
+    header = _LEGACY_HEADER.match(text)
+    if header:
+        text = text[header.end():]
+        try:
+            generated_at = datetime.strptime(header.group(1).strip(), '%Y-%m-%d %H:%M:%S').timestamp()
+        except ValueError:
+            pass
+    return int(match.group(1)), match.group(2), text, generated_at
+
+
+def import_legacy_storylines(archive, directory=LEGACY_STORYLINE_DIR, remove=False):
+    """
+    One-time import of the old per-matchup .txt files into `archive`.
+    Safe to re-run: files already archived are skipped. With `remove`, each
+    file is deleted only once its storyline reads back from the flushed
+    archive. Returns the number of files imported.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "week_*.txt")))
+    imported = []
+    for path in paths:
+        try:
+            parsed = parse_legacy_storyline(path)
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+            continue
+        if parsed is None: continue
+        week, matchup, storyline, generated_at = parsed
+        archive.put(week, matchup, storyline, generated_at=generated_at)
+        imported.append((path, week, matchup, storyline))
+    archive.flush()
+
+    if remove:
+        for path, week, matchup, storyline in imported:
+            record = archive.get(week, matchup, "")
+            if record is None or record['storyline'] != storyline:
+                print(f"⚠️ Keeping {path}: it didn't read back from the archive")
+                continue
+            os.remove(path)
+    return len(imported)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storyline archive tools")
+    parser.add_argument('--league', type=int, default=LEAGUE_ID, help="League ID (defaults to ESPN_LEAGUE_ID).")
+    parser.add_argument('--year', type=int, default=YEAR, help="Season (defaults to ESPN_YEAR).")
+    parser.add_argument('--import', dest='import_dir', nargs='?', const=LEGACY_STORYLINE_DIR,
+                        help="Import the old week_*.txt storyline files from this folder (default data/storylines).")
+    parser.add_argument('--remove', action='store_true', help="Delete the .txt files once they are imported.")
+    parser.add_argument('--week', type=int, help="Print this week's archived storylines.")
+    args = parser.parse_args()
+
+    archive = StorylineArchive(args.league, args.year)
+    if args.import_dir:
+        count = import_legacy_storylines(archive, args.import_dir, remove=args.remove)
+        print(f"📦 Imported {count} storyline file(s) into {archive.path}")
+    if args.week is not None:
+        for record in archive.iter_records(args.week):
+            print(f"=== Week {record['week']}: {record['matchup']} ===\n{record['storyline']}\n")
+    print(f"🗄️ {len(archive)} storyline(s) across weeks {archive.weeks()}")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
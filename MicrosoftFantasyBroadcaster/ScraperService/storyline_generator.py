@@ -1,10 +1,8 @@
-import os
-from datetime import datetime
-from dotenv import load_dotenv
-from openai import AzureOpenAI
-
-# Load environment variables from the .env file in the ScraperService folder
-load_dotenv()
+from config import AZURE_DEPLOYMENT, AZURE_ENDPOINT, AZURE_KEY
+from llm_gateway import chat_completion, get_shared_client
+from prompt_compiler import compile_recap_prompt
+from rate_scheduler import PRIORITY_RECAP
+from telemetry import telemetry
 
 class StorylineGenerator:
     """
@@ -14,31 +12,26 @@ class StorylineGenerator:
     
     def __init__(self):
         """
-        Initialize the Azure OpenAI client using credentials from .env
+        Check the Azure OpenAI credentials from .env. The client itself is the
+        shared one from llm_gateway, built on first use.
         """
         # Validate that keys exist to prevent confusing errors later
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        deployment = os.getenv("AZURE_DEPLOYMENT_NAME")
-
-        if not api_key or not endpoint or not deployment:
+        if not AZURE_KEY or not AZURE_ENDPOINT or not AZURE_DEPLOYMENT:
              raise ValueError("❌ Missing Azure configuration! Check your .env file for AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, and AZURE_DEPLOYMENT_NAME.")
 
-        self.client = AzureOpenAI(
-            api_key=api_key,
-            api_version="2024-02-15-preview",  # Use a stable version suitable for your region
-            azure_endpoint=endpoint
-        )
-        self.deployment_name = deployment
+        self.deployment_name = AZURE_DEPLOYMENT
         
         print(f"✅ Storyline Generator initialized (Azure Deployment: {self.deployment_name})")
 
-    def format_stats_for_prompt(self, stats, players, notable_performances, storylines, records):
+    @property
+    def client(self):
+        # The one pooled AzureOpenAI client, shared with the BroadcastDirector
+        return get_shared_client()
+
+    def format_matchup_facts(self, stats, notable_performances, storylines, records):
         """
-        Format all the stats data into a structured prompt.
-        
-        CRITICAL: This function preserves the specific "Trash Talk" personality 
-        from the original project. Do not modify the prompt text without testing.
+        Format the facts of one matchup (score, notable performances, storylines
+        and records). Shared by the single-game prompt and the batched prompt.
         """
         
         # Determine winner and loser for trash talk purposes
@@ -56,10 +49,7 @@ class StorylineGenerator:
             
         margin = abs(stats['team_1']['score'] - stats['team_2']['score'])
         
-        # --- BEGIN PROMPT CONSTRUCTION ---
-        prompt = f"""You are a fantasy football analyst writing entertaining weekly recaps. Think Pat McAfee Show or Stephen A. Smith energy - ANIMATED, OPINIONATED, and FUN!
-
-THE MATCHUP:
+        facts = f"""THE MATCHUP:
 {winner_name}: {winner_score:.1f} points (WINNER)
 {loser_name}: {loser_score:.1f} points (LOSER)
 Beatdown Margin: {margin:.1f} points
@@ -68,80 +58,47 @@ Beatdown Margin: {margin:.1f} points
         
         # Add notable individual performances
         if notable_performances:
-            prompt += "PLAYERS WHO SHOWED UP:\n"
+            facts += "PLAYERS WHO SHOWED UP:\n"
             for performance in notable_performances:
                 # Clean up emojis if they exist in the raw data, though the prompt likes energy
                 clean_perf = performance.lstrip('🔥💯🚀🎯⚡💪🏃📡🎣🌟💥📈🛡️📊🦵💣🤯🏆🔒')
-                prompt += f"- {clean_perf}\n"
-            prompt += "\n"
+                facts += f"- {clean_perf}\n"
+            facts += "\n"
         
         # Add matchup storylines
         if storylines:
-            prompt += "THE REAL STORY:\n"
+            facts += "THE REAL STORY:\n"
             for storyline in storylines:
                 clean_story = storyline.lstrip('💣😰🔥😬🎒')
-                prompt += f"- {clean_story}\n"
-            prompt += "\n"
+                facts += f"- {clean_story}\n"
+            facts += "\n"
         
         # Add broken records
         if records:
-            prompt += "🚨 RECORDS SHATTERED:\n"
+            facts += "🚨 RECORDS SHATTERED:\n"
             for record in records:
-                prompt += f"- {record}\n"
-            prompt += "\n"
-        
-        # The Personality Instructions (Preserved EXACTLY from original)
-        prompt += f"""
-Write a 3-4 paragraph recap that sounds like you're calling this game on a sports talk show. 
-
-MANDATORY STYLE RULES:
-❌ NO formal sports journalism language
-❌ NO "this writer thinks" or "one could argue"  
-❌ NO boring, neutral descriptions
-✅ USE casual language like you're talking to your fantasy league group chat
-✅ USE trash talk (roast the losing team!)
-✅ USE hype (celebrate the winning team's dominance!)
-✅ USE rhetorical questions for effect
-✅ USE present tense for more energy ("Mahomes TORCHES the defense" not "Mahomes torched")
-
-TONE EXAMPLES:
-- "Are you KIDDING me right now?!"
-- "This wasn't a matchup, this was a CLINIC"
-- "Someone check on [loser's team], they might need therapy after this"
-- "Let's talk about [player name] for a second - ABSOLUTELY UNCONSCIOUS"
-- "If you started [player], you're eating GOOD this week"
-
-STRUCTURE:
-Paragraph 1: Open with the VIBE of the game (blowout? nail-biter? upset?). Make it dramatic. Winner gets hyped, loser gets roasted (friendly but spicy).
-
-Paragraph 2-3: Spotlight 2-3 key performances. Use specific stats. Build the narrative - who was the MVP? Who disappeared? Any unexpected heroes or brutal busts?
-
-Paragraph 4: Close with either:
-- A final zinger at the loser
-- Props to an insane individual performance  
-- Forward-looking trash talk ("Good luck next week, {loser_name}")
-- Or if records were broken, END on that hype
-
-LANGUAGE STYLE:
-- Short, punchy sentences mixed with longer ones
-- Contractions (wasn't, didn't, can't)
-- Slang is ENCOURAGED (cooking, eating, bodied, torched, etc.)
-- All caps for EMPHASIS on key moments
-- Sentence fragments. Are fine. For effect.
+                facts += f"- {record}\n"
+            facts += "\n"
 
-DO NOT:
-- Use asterisks or markdown formatting
-- Write in past tense throughout (mix it up with present tense for energy)
-- Be neutral or boring
-- Apologize or hedge ("perhaps", "maybe", "might have")
+        return facts
 
-Remember: The goal is ENTERTAINMENT. Make the winner feel like champions and the loser laugh at themselves!
-"""
-        return prompt
+    def format_stats_for_prompt(self, stats, players, notable_performances, storylines, records):
+        """
+        Format all the stats data into a structured prompt.
+        
+        CRITICAL: This function preserves the specific "Trash Talk" personality 
+        from the original project. The prompt text lives in prompt_compiler.py;
+        do not modify it without testing. `players` is not used.
+        """
+        return compile_recap_prompt(
+            self.format_matchup_facts, stats, notable_performances, storylines, records, layout='inline'
+        ).prompt
 
-    def generate_storyline(self, stats, players=None, notable_performances=None, storylines=None, records=None):
+    def generate_storyline(self, stats, players=None, notable_performances=None, storylines=None, records=None, week=None, archive=None):
         """
-        Generate a storyline by calling the Azure OpenAI API.
+        Generate a storyline by calling the Azure OpenAI API. With an `archive`
+        (a StorylineArchive), the storyline is also saved there for `week`,
+        keyed by the hash of the prompt it was generated from.
         """
         # Handle empty lists if None is passed
         players = players or {}
@@ -149,57 +106,55 @@ Remember: The goal is ENTERTAINMENT. Make the winner feel like champions and the
         storylines = storylines or []
         records = records or []
 
-        # 1. Build the prompt
-        prompt = self.format_stats_for_prompt(
-            stats, players, notable_performances, storylines, records
-        )
+        # 1. Build the prompt (within the token budget)
+        with telemetry.span("prompt_build"):
+            compiled = compile_recap_prompt(
+                self.format_matchup_facts, stats, notable_performances, storylines, records
+            )
         
         print(f"🤖 Generating storyline for {stats['team_1']['team_name']} vs {stats['team_2']['team_name']}...")
         
         try:
-            # 2. Call Azure OpenAI
-            response = self.client.chat.completions.create(
-                model=self.deployment_name, # Critical: Matches the "Deployment Name" in Azure Portal
-                messages=[
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.8 # High creativity for trash talk
-            )
+            # 2. Call Azure OpenAI (through the shared response cache)
+            with telemetry.span("llm_call", caller="storyline"):
+                storyline = chat_completion(
+                    self.client,
+                    self.deployment_name, # Critical: Matches the "Deployment Name" in Azure Portal
+                    compiled.prompt,
+                    system_message=compiled.system_message,
+                    max_tokens=compiled.max_tokens, # sized for a 3-4 paragraph recap
+                    temperature=0.8, # High creativity for trash talk
+                    priority=PRIORITY_RECAP
+                )
             
-            # 3. Extract text
-            storyline = response.choices[0].message.content
             print("✅ Storyline generated successfully!")
-            return storyline
-            
         except Exception as e:
             print(f"❌ Azure API Error: {e}")
+            telemetry.incr("llm_errors_total", caller="storyline")
             return None
 
-    def save_storyline(self, storyline, week, matchup_info):
+        if archive is not None and storyline:
+            from storyline_archive import prompt_hash
+            matchup = f"{stats['team_1']['team_name']} vs {stats['team_2']['team_name']}"
+            try:
+                self.save_storyline(storyline, week, matchup, prompt_hash(compiled.prompt, compiled.system_message), archive=archive)
+            except Exception as e:
+                print(f"⚠️ Could not archive storyline: {e}")
+        return storyline
+            
+    def save_storyline(self, storyline, week, matchup_info, prompt_digest="", archive=None):
         """
-        Save the generated storyline to the data folder.
+        Save the generated storyline to the league/season's storyline archive
+        (see storyline_archive.py). Pass the prompt's hash to keep storylines
+        generated from different prompts apart. Returns the archive key.
         """
-        # Adjust path to match ScraperService structure
-        # Assuming we want to save in a 'data' folder relative to this script
-        output_dir = os.path.join(os.path.dirname(__file__), "data", "storylines")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        safe_matchup = matchup_info.replace(" ", "_").replace("/", "-")
-        filename = f"week_{week}_{safe_matchup}.txt"
-        filepath = os.path.join(output_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Week {week} Matchup Recap (Azure Generated)\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 70 + "\n\n")
-            f.write(storyline)
-            
-        print(f"💾 Storyline saved to: {filepath}")
-        return filepath
+        from storyline_archive import get_shared_archive
+        if archive is None:
+            archive = get_shared_archive()
+        key = archive.put(week, matchup_info, storyline, prompt_digest)
+
+        print(f"💾 Storyline archived: Week {week} {matchup_info} ({archive.path})")
+        return key
 
 # --- TEST BLOCK ---
 # You can run this file directly to test if Azure is working
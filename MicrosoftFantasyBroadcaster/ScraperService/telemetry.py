@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import TELEMETRY_ENABLED
+
+METRIC_PREFIX = "scraper"
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('telemetry', 'name', 'labels', 'started')
+
+    def __init__(self, telemetry, name, labels):
+        self.telemetry = telemetry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.telemetry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if exc_type is not None:
+            self.telemetry.incr("errors_total", stage=self.name)
+        return False
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class Telemetry:
+    """
+    Stage timings and counters for a scraper run.
+
+    span('llm_call', caller='director') times a block, incr() bumps a
+    counter, record_usage() adds response.usage token counts. Everything
+    can be exported as Prometheus text (file or /metrics endpoint) and as a
+    JSON run report. When disabled, span() hands back a shared no-op
+    context manager and the other calls return right away, so leaving the
+    instrumentation in costs next to nothing.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._timings = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, labels)
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._timings.setdefault((name, _label_key(labels)), []).append(seconds)
+
+    def incr(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            key = (name, _label_key(labels))
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_usage(self, usage, **labels):
+        """Adds an OpenAI response.usage object to the token counters."""
+        if not self.enabled or usage is None:
+            return
+        self.incr("llm_prompt_tokens_total", getattr(usage, 'prompt_tokens', 0) or 0, **labels)
+        self.incr("llm_completion_tokens_total", getattr(usage, 'completion_tokens', 0) or 0, **labels)
+
+    # --- export ---
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            timings = {k: list(v) for k, v in self._timings.items()}
+            counters = dict(self._counters)
+
+        def fmt_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        seen = set()
+        for (name, labels), values in sorted(timings.items()):
+            metric = f"{METRIC_PREFIX}_{name}_seconds"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} summary")
+                seen.add(metric)
+            ordered = sorted(values)
+            for q in (0.5, 0.95):
+                lines.append(f"{metric}{fmt_labels(labels, [('quantile', q)])} {_percentile(ordered, q * 100):.6f}")
+            lines.append(f"{metric}_sum{fmt_labels(labels)} {sum(values):.6f}")
+            lines.append(f"{metric}_count{fmt_labels(labels)} {len(values)}")
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{fmt_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve_prometheus(self, port):
+        """Serves /metrics on `port` from a background thread."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = telemetry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def report(self):
+        """JSON-friendly run report: per-stage timing stats and all counters."""
+        with self._lock:
+            timings = {k: sorted(v) for k, v in self._timings.items()}
+            counters = dict(self._counters)
+
+        def name_of(name, labels):
+            return name + "".join(f"[{k}={v}]" for k, v in labels)
+
+        return {
+            'started_at': self.started_at,
+            'duration': time.time() - self.started_at,
+            'stages': {
+                name_of(name, labels): {
+                    'count': len(values),
+                    'total': sum(values),
+                    'p50': _percentile(values, 50),
+                    'p95': _percentile(values, 95),
+                    'max': values[-1] if values else 0.0
+                }
+                for (name, labels), values in sorted(timings.items())
+            },
+            'counters': {name_of(name, labels): value for (name, labels), value in sorted(counters.items())}
+        }
+
+    def write_report(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+# Process-wide instance every module records into
+telemetry = Telemetry(enabled=TELEMETRY_ENABLED)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scraper is a flat set of modules; make them importable from anywhere pytest runs
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+import scraper
+from benchmarks.fake_league import FakeLeague
+
+
+class FakePublisher:
+    def __init__(self):
+        self.weeks = []
+
+    def publish(self, message, message_id=None):
+        self.weeks.append(message['week'])
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def finished(monkeypatch):
+    """Stubs out script generation: week 1 finishes last, week 2 fails. Returns the weeks in the order they finished."""
+    finished = []
+    week_3_done = threading.Event()
+
+    def generate_week(week, box_scores, director, story_gen, llm_pool, records_by_game=None, archive=None):
+        if week == 1:
+            assert week_3_done.wait(5)
+        if week == 2:
+            raise RuntimeError("LLM unavailable")
+        finished.append(week)
+        if week == 3:
+            week_3_done.set()
+        return f"[MATT]: Week {week} is in the books.", len(box_scores)
+
+    monkeypatch.setattr(scraper, 'generate_week', generate_week)
+    monkeypatch.setattr(scraper, 'WEEK_CONCURRENCY', 4)
+    return finished
+
+
+def test_weeks_publish_in_order_past_slow_and_failed_weeks(finished):
+    publisher = FakePublisher()
+    scraper.run_backfill(FakeLeague(teams=4, weeks=4), range(1, 5), None, None, publisher)
+    assert finished.index(3) < finished.index(1)
+    assert publisher.weeks == [1, 3, 4]
@@ -0,0 +1,102 @@
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import scraper
+import storyline_generator
+from benchmarks.fake_league import FakeLeague
+from storyline_generator import StorylineGenerator
+
+BATCH_ID = re.compile(r'^\[(\d+)\] (FEATURE|QUICK)$', re.M)
+
+
+def valid_entries(prompt):
+    entries = []
+    for matchup_id, kind in BATCH_ID.findall(prompt):
+        if kind == 'FEATURE':
+            entries.append({'id': matchup_id, 'transition': f"[MATT]: Batched transition {matchup_id}.",
+                            'banter': f"[MATT]: Batched banter {matchup_id}. [JOSE]: Wow!"})
+        else:
+            entries.append({'id': matchup_id, 'banter': f"[JOSE]: Batched quick {matchup_id}!"})
+    return entries
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fakes every LLM call; set `llm.batch` to turn the batch prompt into a response."""
+    class FakeLLM:
+        def __init__(self):
+            self.batch = lambda prompt: json.dumps({'matchups': valid_entries(prompt)})
+            self.calls = []
+
+        def chat_completion(self, client, deployment, prompt, response_format=None, **kwargs):
+            if response_format:
+                return self.batch(prompt)
+            self.calls.append(prompt)
+            return "[MATT]: Per-game call."
+
+    fake = FakeLLM()
+    monkeypatch.setattr(scraper, 'chat_completion', fake.chat_completion)
+    monkeypatch.setattr(scraper, 'get_shared_client', lambda: None)
+    monkeypatch.setattr(storyline_generator, 'chat_completion', fake.chat_completion)
+    monkeypatch.setattr(storyline_generator, 'get_shared_client', lambda: None)
+    return fake
+
+
+def build(box_scores):
+    story_gen = StorylineGenerator.__new__(StorylineGenerator)
+    story_gen.deployment_name = "test"
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        return scraper.build_week_script(1, box_scores, scraper.BroadcastDirector(), story_gen, executor, batch=True)
+
+
+def per_game(llm, kind):
+    prefix = {'transition': "Write a transition", 'banter': "Rewrite this recap"}[kind]
+    return [prompt for prompt in llm.calls if prompt.startswith(prefix)]
+
+
+def test_valid_batch_needs_no_per_game_calls(llm):
+    script, games = build(FakeLeague(teams=8, weeks=1).box_scores(1))
+    assert games == 4
+    assert per_game(llm, 'transition') == per_game(llm, 'banter') == []
+    assert script.count("Batched banter") == 3 and script.count("Batched quick") == 1
+
+
+@pytest.mark.parametrize("response, fallbacks", [
+    (lambda entries: '{"matchups": [', 3),
+    (lambda entries: json.dumps({'matchups': "not a list"}), 3),
+    (lambda entries: json.dumps({'matchups': [dict(entries[0], transition=None)] + entries[1:]}), 1),
+    (lambda entries: json.dumps({'matchups': [{k: v for k, v in entries[1].items() if k != 'banter'}] + entries[2:]}), 2),
+    (lambda entries: json.dumps({'matchups': entries[:1]}), 2),
+], ids=["malformed-json", "not-a-list", "null-field", "missing-key", "short-array"])
+def test_bad_batch_entries_fall_back_to_per_game_calls(llm, response, fallbacks):
+    llm.batch = lambda prompt: response(valid_entries(prompt))
+    script, games = build(FakeLeague(teams=8, weeks=1).box_scores(1))
+    assert games == 4
+    assert len(per_game(llm, 'transition')) == len(per_game(llm, 'banter')) == fallbacks
+    assert script.count("Batched banter") == 3 - fallbacks
+
+
+def test_intro_and_outro_do_not_wait_for_the_batch(llm, monkeypatch):
+    flavor_done = threading.Event()
+    calls = []
+
+    def batch(prompt):
+        # Only answers once the intro and outro have been written alongside it
+        assert flavor_done.wait(5), "intro/outro were held back behind the batch"
+        return json.dumps({'matchups': valid_entries(prompt)})
+
+    def chat_completion(client, deployment, prompt, response_format=None, **kwargs):
+        if response_format:
+            return batch(prompt)
+        calls.append(prompt)
+        if len(calls) == 2:
+            flavor_done.set()
+        return "[MATT]: Flavor."
+
+    monkeypatch.setattr(scraper, 'chat_completion', chat_completion)
+    script, games = build(FakeLeague(teams=8, weeks=1).box_scores(1))
+    assert games == 4 and script.count("Batched banter") == 3
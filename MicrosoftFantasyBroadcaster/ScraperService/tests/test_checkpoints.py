@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+import scraper
+from benchmarks.fake_league import FakeLeague
+from checkpoint_store import CheckpointStore, box_score_fingerprint
+from fake_rabbitmq import FakeBroker
+from publisher import RabbitPublisher
+from snapshot_store import RecordingLeague, SnapshotLeague, SnapshotStore
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Stubs out script generation; returns the weeks a script was generated for."""
+    weeks = []
+
+    def generate_week(week, box_scores, director, story_gen, llm_pool, records_by_game=None, archive=None):
+        weeks.append(week)
+        return f"[MATT]: Week {week} is in the books.", len(box_scores)
+
+    monkeypatch.setattr(scraper, 'generate_week', generate_week)
+    return weeks
+
+
+def backfill(league, broker, checkpoints, tmp_path, force=False):
+    publisher = RabbitPublisher(broker.connect, scraper.QUEUE_NAME, outbox_path=str(tmp_path / "outbox.jsonl"))
+    publisher.connect()
+    scraper.run_backfill(league, range(1, league.current_week + 1), None, None, publisher, checkpoints=checkpoints, force=force)
+    publisher.close()
+
+
+def published_weeks(broker):
+    return [json.loads(body)['week'] for body, _ in broker.messages(scraper.QUEUE_NAME)]
+
+
+def test_fingerprint_ignores_bench_and_refetches():
+    league = FakeLeague(teams=4, weeks=1)
+    games = league.box_scores(1)
+    before = box_score_fingerprint(games)
+    games[0].home_lineup[-1].points += 10
+    assert games[0].home_lineup[-1].slot_position == 'BE'
+    assert box_score_fingerprint(games) == before
+    assert box_score_fingerprint(FakeLeague(teams=4, weeks=1).box_scores(1)) == before
+
+
+def test_fingerprint_changes_on_stat_correction():
+    league = FakeLeague(teams=4, weeks=1)
+    games = league.box_scores(1)
+    before = box_score_fingerprint(games)
+    games[0].home_lineup[0].points += 0.5
+    assert box_score_fingerprint(games) != before
+
+
+def test_checkpoints_persist_per_league(tmp_path):
+    path = str(tmp_path / "checkpoints.json")
+    CheckpointStore(1, 2025, path=path).mark_published(3, "abc")
+    assert CheckpointStore(1, 2025, path=path).is_current(3, "abc")
+    assert not CheckpointStore(1, 2025, path=path).is_current(3, "def")
+    assert not CheckpointStore(2, 2025, path=path).is_current(3, "abc")
+
+
+def test_unchanged_weeks_are_skipped(tmp_path, generated):
+    league = FakeLeague(teams=4, weeks=3)
+    broker = FakeBroker()
+    checkpoints = CheckpointStore(1, 2025, path=str(tmp_path / "checkpoints.json"))
+    backfill(league, broker, checkpoints, tmp_path)
+    backfill(league, broker, checkpoints, tmp_path)
+    assert generated == [1, 2, 3]
+    assert published_weeks(broker) == [1, 2, 3]
+
+
+def test_corrected_week_is_republished(tmp_path, generated):
+    league = FakeLeague(teams=4, weeks=3)
+    broker = FakeBroker()
+    checkpoints = CheckpointStore(1, 2025, path=str(tmp_path / "checkpoints.json"))
+    backfill(league, broker, checkpoints, tmp_path)
+    league.box_scores(2)[0].home_lineup[0].points += 1.2
+    backfill(league, broker, checkpoints, tmp_path)
+    assert published_weeks(broker) == [1, 2, 3, 2]
+    keys = [properties.message_id for _, properties in broker.messages(scraper.QUEUE_NAME)]
+    assert keys[1] != keys[3]
+
+
+def test_force_republishes_everything(tmp_path, generated):
+    league = FakeLeague(teams=4, weeks=2)
+    broker = FakeBroker()
+    checkpoints = CheckpointStore(1, 2025, path=str(tmp_path / "checkpoints.json"))
+    backfill(league, broker, checkpoints, tmp_path)
+    backfill(league, broker, checkpoints, tmp_path, force=True)
+    assert published_weeks(broker) == [1, 2, 1, 2]
+
+
+@pytest.mark.parametrize("argv, weeks, force", [
+    ([], [1, 2, 3, 4], False),
+    (['--force'], [1, 2, 3, 4], True),
+    (['--weeks', '2,9'], [2], True),
+    (['--since', '3'], [3, 4], True),
+])
+def test_select_weeks(argv, weeks, force):
+    assert scraper.select_weeks(scraper.parse_args(argv), 4) == (weeks, force)
+
+
+def test_replay_ignores_checkpoints():
+    assert scraper.select_weeks(scraper.parse_args(['--replay']), 4) == ([1, 2, 3, 4], True)
+
+
+def test_replay_regenerates_published_weeks_from_snapshots(tmp_path, generated):
+    snapshots = SnapshotStore(1, 2025, path=str(tmp_path / "1_2025.snap"))
+    broker = FakeBroker()
+    checkpoints = CheckpointStore(1, 2025, path=str(tmp_path / "checkpoints.json"))
+    backfill(RecordingLeague(FakeLeague(teams=4, weeks=2), snapshots), broker, checkpoints, tmp_path)
+
+    replay = SnapshotLeague(SnapshotStore(1, 2025, path=snapshots.path))
+    assert replay.current_week == 2
+    # Snapshots fingerprint the same as the live data they were recorded from
+    assert all(checkpoints.is_current(w, box_score_fingerprint(replay.box_scores(w))) for w in (1, 2))
+    _, force = scraper.select_weeks(scraper.parse_args(['--replay']), replay.current_week)
+    backfill(replay, broker, checkpoints, tmp_path, force=force)
+    assert generated == [1, 2, 1, 2]
+
+
+def test_live_cannot_run_a_manifest(capsys):
+    with pytest.raises(SystemExit):
+        scraper.parse_args(['--live', '--manifest', 'leagues.json'])
+    assert "--manifest" in capsys.readouterr().err
+
+
+def test_streamed_week_without_games_is_not_closed_or_checkpointed(tmp_path):
+    league = FakeLeague(teams=0, weeks=1)
+    broker = FakeBroker()
+    checkpoints = CheckpointStore(1, 2025, path=str(tmp_path / "checkpoints.json"))
+    publisher = RabbitPublisher(broker.connect, scraper.QUEUE_NAME, outbox_path=str(tmp_path / "outbox.jsonl"))
+    publisher.connect()
+    scraper.run_streaming(league, [1], None, None, publisher, checkpoints=checkpoints)
+    publisher.close()
+    assert broker.messages(scraper.QUEUE_NAME) == []
+    assert not checkpoints.is_current(1, box_score_fingerprint([]))
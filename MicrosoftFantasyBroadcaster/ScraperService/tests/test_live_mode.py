@@ -0,0 +1,79 @@
+import pytest
+
+import live_mode
+from live_mode import diff_matchup, is_significant, live_facts, poll_interval, snapshot_matchups
+from snapshot_store import SnapshotBoxScore, SnapshotPlayer, SnapshotTeam
+
+
+@pytest.fixture(autouse=True)
+def live_config(monkeypatch):
+    monkeypatch.setattr(live_mode, 'LIVE_POLL_MIN_SECONDS', 30)
+    monkeypatch.setattr(live_mode, 'LIVE_POLL_MAX_SECONDS', 300)
+    monkeypatch.setattr(live_mode, 'LIVE_CLOSE_MARGIN', 15.0)
+    monkeypatch.setattr(live_mode, 'LIVE_PLAYER_SWING', 6.0)
+
+
+def rb(name, points):
+    return SnapshotPlayer(name, 'RB', 'RB', 'RB', points, {'RB': {}})
+
+
+def poll(home_score, away_score, home_rb, away_rb):
+    """One poll of an A vs B matchup, each side starting a single RB."""
+    game = SnapshotBoxScore(SnapshotTeam("A"), SnapshotTeam("B"), home_score, away_score,
+                            [rb("A RB", home_rb)], [rb("B RB", away_rb)])
+    return snapshot_matchups([game])[("A", "B")]
+
+
+@pytest.mark.parametrize("before, after, lead_change, swings, significant", [
+    # (home score, away score, home RB points, away RB points) at each poll
+    ((60, 50, 10, 10), (70, 80, 12, 20), True, ["B RB"], True),
+    ((60, 50, 10, 10), (62, 50, 12, 10), False, [], False),
+    ((60, 50, 10, 10), (70, 50, 20, 10), False, ["A RB"], False),
+    ((60, 50, 10, 10), (70, 50, 15.9, 10), False, [], False),
+    ((60, 50, 10, 10), (70, 50, 16, 10), False, ["A RB"], False),
+    ((60, 50, 20, 10), (60, 50, 13, 10), False, ["A RB"], False),
+    ((60, 60, 10, 10), (70, 60, 12, 10), False, [], False),
+    ((60, 50, 10, 10), (60, 58, 10, 10), False, [], True),
+    ((60, 50, 20, 10), (71, 50, 31, 10), False, ["A RB"], True),
+], ids=["lead-change", "scores-tick", "swing-alone", "under-swing", "at-swing", "negative-swing",
+        "tie-broken", "new-storyline", "new-notable"])
+def test_diff_matchup(before, after, lead_change, swings, significant):
+    delta = diff_matchup(poll(*before), poll(*after))
+    assert delta['lead_change'] is lead_change
+    assert [swing['name'] for swing in delta['player_swings']] == swings
+    assert is_significant(delta) is significant
+    assert delta['scores_changed'] is (before[:2] != after[:2])
+
+
+def test_swings_are_off_at_zero(monkeypatch):
+    monkeypatch.setattr(live_mode, 'LIVE_PLAYER_SWING', 0.0)
+    assert diff_matchup(poll(60, 50, 10, 10), poll(90, 50, 40, 10))['player_swings'] == []
+
+
+def test_live_facts_lead_with_the_lead_change():
+    delta = diff_matchup(poll(60, 50, 10, 10), poll(70, 80, 12, 20))
+    assert live_facts(delta).splitlines() == [
+        "LEAD CHANGE: B takes the lead over A!",
+        "SCORE: A 70 - B 80",
+        "SINCE LAST UPDATE: B RB (B) +10.0 pts, now 20",
+    ]
+
+
+def state(home_score, away_score, progress, in_progress=True):
+    return {'home_score': home_score, 'away_score': away_score, 'progress': progress, 'in_progress': in_progress}
+
+
+@pytest.mark.parametrize("states, quiet_polls, interval", [
+    ([], 0, 300),
+    ([state(100, 100, 1.0, in_progress=False)], 0, 300),
+    ([state(100, 100, 1.0)], 0, 30),
+    ([state(100, 100, 0.5)], 0, 80.6),
+    ([state(100, 70, 0.5)], 0, 232.5),
+    ([state(100, 70, 0.5), state(100, 100, 1.0)], 0, 30),
+    ([state(100, 70, 0.5), state(100, 100, 1.0, in_progress=False)], 0, 232.5),
+    ([state(100, 100, 1.0)], 2, 60),
+    ([state(100, 70, 0.5)], 4, 300),
+], ids=["no-games", "all-final", "close-and-late", "close-midway", "blowout", "closest-wins",
+        "finals-ignored", "quiet-stretches", "clamped-to-max"])
+def test_poll_interval(states, quiet_polls, interval):
+    assert poll_interval({i: s for i, s in enumerate(states)}, quiet_polls) == interval
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+import llm_gateway
+from llm_cache import ResponseCache
+from rate_scheduler import RequestScheduler
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(llm_cache, 'time', clock)
+    return clock
+
+
+def cache_at(tmp_path, **kwargs):
+    return ResponseCache(path=str(tmp_path / "llm_cache.sqlite"), **kwargs)
+
+
+def test_entries_survive_a_reopen(tmp_path):
+    cache = cache_at(tmp_path)
+    cache.put("k", "Cached text", total_tokens=42)
+    cache.close()
+    reopened = cache_at(tmp_path)
+    assert reopened.get("k") == "Cached text"
+    assert reopened.get("missing") is None
+    assert reopened.stats() == {'hits': 1, 'misses': 1, 'tokens_saved': 42}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = cache_at(tmp_path, max_entries=2)
+    cache.put("a", "A")
+    clock.now += 1
+    cache.put("b", "B")
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == "A"
+    clock.now += 1
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_expired_entries_are_dropped(tmp_path, clock):
+    cache = cache_at(tmp_path, ttl_seconds=60)
+    cache.put("k", "Fresh")
+    clock.now += 60
+    assert cache.get("k") == "Fresh"
+    # Reading an entry doesn't extend its life
+    clock.now += 1
+    assert cache.get("k") is None
+    assert cache._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+
+def test_force_regenerate_misses_but_still_stores(tmp_path):
+    cache_at(tmp_path).put("k", "Old")
+    forced = cache_at(tmp_path, force_regenerate=True)
+    assert forced.get("k") is None
+    forced.put("k", "New")
+    assert cache_at(tmp_path).get("k") == "New"
+
+
+def fake_client(*contents):
+    """A stand-in AzureOpenAI client that answers with `contents` in turn."""
+    contents = list(contents)
+    def create(**request):
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=contents.pop(0)))], usage=usage)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+@pytest.fixture
+def gateway_cache(tmp_path, monkeypatch):
+    cache = cache_at(tmp_path)
+    scheduler = RequestScheduler()
+    monkeypatch.setattr(llm_gateway, 'get_shared_cache', lambda: cache)
+    monkeypatch.setattr(llm_gateway, 'get_shared_scheduler', lambda: scheduler)
+    return cache
+
+
+def test_responses_failing_validation_are_not_cached(gateway_cache):
+    client = fake_client("not json", '{"ok": true}', "unused")
+    validate = lambda text: text.startswith("{")
+    assert llm_gateway.chat_completion(client, "test", "Prompt", validate=validate) == "not json"
+    # The rejected response wasn't stored, so the next call goes back to the API
+    assert llm_gateway.chat_completion(client, "test", "Prompt", validate=validate) == '{"ok": true}'
+    assert llm_gateway.chat_completion(client, "test", "Prompt", validate=validate) == '{"ok": true}'
+    key = ResponseCache.make_key("test", None, "Prompt", 1.0, 250)
+    assert gateway_cache.get(key) == '{"ok": true}'
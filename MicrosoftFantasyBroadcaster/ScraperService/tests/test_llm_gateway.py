@@ -0,0 +1,69 @@
+import pytest
+
+import llm_gateway
+import scraper
+from benchmarks.fake_azure_openai import FakeAzureOpenAI
+from llm_cache import ResponseCache
+from rate_scheduler import RequestScheduler
+
+openai = pytest.importorskip("openai")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(path=str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(llm_gateway, 'get_shared_cache', lambda: cache)
+    scheduler = RequestScheduler()
+    monkeypatch.setattr(llm_gateway, 'get_shared_scheduler', lambda: scheduler)
+    yield cache
+    cache.close()
+
+
+def fake_server(**kwargs):
+    return FakeAzureOpenAI(latency=0, jitter=0, **kwargs).start()
+
+
+def client_for(server):
+    return openai.AzureOpenAI(azure_endpoint=server.endpoint, api_key="test", api_version="2024-06-01", max_retries=0)
+
+
+def cached_rows(cache):
+    return cache._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def test_complete_stream_is_cached(cache):
+    server = fake_server()
+    try:
+        pieces = list(llm_gateway.stream_chat_completion(client_for(server), "test", "Say something", max_tokens=40))
+    finally:
+        server.stop()
+    key = ResponseCache.make_key("test", None, "Say something", 1.0, 40)
+    assert pieces and cache.get(key) == "".join(pieces)
+
+
+def test_broken_stream_raises_after_its_pieces_and_is_not_cached(cache):
+    server = fake_server(stream_error_rate=1.0)
+    pieces = []
+    try:
+        with pytest.raises(openai.APIError):
+            for piece in llm_gateway.stream_chat_completion(client_for(server), "test", "Say something", max_tokens=40):
+                pieces.append(piece)
+    finally:
+        server.stop()
+    assert pieces
+    assert server.calls[0]['status'] == 'stream_error'
+    assert cached_rows(cache) == 0
+
+
+def test_director_finishes_a_broken_stream_with_its_fallback(cache, monkeypatch):
+    server = fake_server(stream_error_rate=1.0)
+    monkeypatch.setattr(scraper, 'get_shared_client', lambda: client_for(server))
+    heard = []
+    try:
+        banter = scraper.BroadcastDirector().generate_banter_recap("Team 1 won.", "Team 1", 120.0, on_text=heard.append)
+    finally:
+        server.stop()
+    fallback = "[MATT]: Team 1 won with 120.0 points. [JOSE]: Total domination!"
+    assert banter == fallback
+    assert len(heard) > 1 and heard[-1] == "\n" + fallback
+    assert cached_rows(cache) == 0
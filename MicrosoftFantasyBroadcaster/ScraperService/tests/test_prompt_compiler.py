@@ -0,0 +1,84 @@
+import os
+
+from prompt_compiler import STATIC_SYSTEM_MESSAGE, _trim_one, compile_recap_prompt
+from storyline_generator import StorylineGenerator
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+
+STATS = {'team_1': {'team_name': "Team 1", 'score': 151.26}, 'team_2': {'team_name': "Team 2", 'score': 99.0}}
+NOTABLE = ["🚀 Team 1 QB0: 405 passing yards!", "🌟 Team 1 RB1: MONSTER game (35.0 pts)!", "💯 Team 2 WR3: 115 receiving yards!"]
+STORYLINES = ["💣 BLOWOUT! Team 1 dominates by 52.3 points!", "🔥 Team 1: MONSTER SCORE (151.26 pts)!"]
+RECORDS = ["🏆 NEW RECORD! Team 1 scored 151.26 points - highest ever!"]
+
+
+def generator():
+    gen = StorylineGenerator.__new__(StorylineGenerator)
+    gen.deployment_name = "test"
+    return gen
+
+
+def compile_prompt(notable=NOTABLE, storylines=STORYLINES, **kwargs):
+    return compile_recap_prompt(generator().format_matchup_facts, STATS, notable, storylines, RECORDS, **kwargs)
+
+
+def test_inline_layout_is_the_original_prompt():
+    # Written by format_stats_for_prompt before the prompt compiler existed
+    with open(os.path.join(GOLDEN_DIR, "recap_inline.txt"), encoding='utf-8', newline='') as f:
+        golden = f.read()
+    compiled = compile_prompt(layout='inline', token_budget=0)
+    assert compiled.system_message is None and compiled.trimmed == 0
+    assert compiled.prompt == golden
+    assert generator().format_stats_for_prompt(STATS, {}, NOTABLE, STORYLINES, RECORDS) == golden
+
+
+def test_static_first_layout_moves_the_instructions_to_the_system_message():
+    compiled = compile_prompt(layout='static_first', token_budget=0)
+    assert compiled.system_message == STATIC_SYSTEM_MESSAGE
+    assert compiled.prompt in compile_prompt(layout='inline', token_budget=0).prompt
+
+
+def test_trimming_drops_the_lowest_weight_fact_first():
+    notable = [
+        "🚀 Team 1 QB0: 405 passing yards!",       # 1.16x its threshold
+        "💯 Team 1 RB2: 101 rushing yards!",        # 1.01x
+        "🌟 Team 1 RB1: MONSTER game (35.0 pts)!",  # 1.17x
+        "💯 Team 2 WR3: 115 receiving yards!",      # 1.15x
+    ]
+    storylines = [
+        "💣 BLOWOUT! Team 1 dominates by 52.3 points!",
+        "🔥 Team 1: MONSTER SCORE (151.26 pts)!",
+        "🔥 Team 2: MONSTER SCORE (160.0 pts)!",
+    ]
+    dropped = []
+    while True:
+        before = notable + storylines
+        if not _trim_one(notable, storylines):
+            break
+        dropped += [fact for fact in before if fact not in notable + storylines]
+    assert dropped == [
+        # Notable performances down to MIN_NOTABLE_PERFORMANCES, smallest first
+        "💯 Team 1 RB2: 101 rushing yards!",
+        "💯 Team 2 WR3: 115 receiving yards!",
+        # Then storylines down to one; the blowout line is kept longest
+        "🔥 Team 1: MONSTER SCORE (151.26 pts)!",
+        "🔥 Team 2: MONSTER SCORE (160.0 pts)!",
+        # Then whatever is left
+        "🚀 Team 1 QB0: 405 passing yards!",
+        "🌟 Team 1 RB1: MONSTER game (35.0 pts)!",
+        "💣 BLOWOUT! Team 1 dominates by 52.3 points!",
+    ]
+
+
+def test_on_a_tie_the_later_fact_goes():
+    notable = ["💯 Team 1 RB1: 120 rushing yards!", "💯 Team 2 RB1: 120 rushing yards!", "🚀 Team 1 QB0: 500 passing yards!"]
+    assert _trim_one(notable, [])
+    assert notable == ["💯 Team 1 RB1: 120 rushing yards!", "🚀 Team 1 QB0: 500 passing yards!"]
+
+
+def test_over_budget_prompt_keeps_its_biggest_facts_and_records():
+    full = compile_prompt(layout='inline', token_budget=0)
+    compiled = compile_prompt(layout='inline', token_budget=full.prompt_tokens - 1)
+    assert compiled.trimmed == 1 and compiled.prompt_tokens <= full.prompt_tokens - 1
+    assert "115 receiving yards" not in compiled.prompt
+    assert "405 passing yards" in compiled.prompt and "MONSTER game" in compiled.prompt
+    assert RECORDS[0][2:] in compiled.prompt
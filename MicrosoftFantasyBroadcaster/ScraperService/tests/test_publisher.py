@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from fake_rabbitmq import FakeBroker
+from publisher import RabbitPublisher, decode_message
+
+
+def publisher(broker, tmp_path, **kwargs):
+    kwargs.setdefault('retry_delay', 0)
+    rabbit = RabbitPublisher(broker.connect, "game_stats_queue", outbox_path=str(tmp_path / "outbox.jsonl"), **kwargs)
+    rabbit.connect()
+    return rabbit
+
+
+def weeks(broker):
+    return [json.loads(body)['week'] for body, _ in broker.messages("game_stats_queue")]
+
+
+@pytest.mark.parametrize("window", [1, 4])
+def test_messages_arrive_in_order(tmp_path, window):
+    broker = FakeBroker()
+    rabbit = publisher(broker, tmp_path, confirm_window=window)
+    for week in range(1, 11):
+        rabbit.publish({'week': week}, message_id=f"week{week}")
+    rabbit.close()
+    assert weeks(broker) == list(range(1, 11))
+    assert rabbit.stats() == {'published': 10, 'spilled': 0, 'reconnects': 0}
+    _, properties = broker.messages("game_stats_queue")[0]
+    assert properties.message_id == "week1" and properties.delivery_mode == 2
+
+
+def test_window_waits_for_flush(tmp_path):
+    broker = FakeBroker()
+    rabbit = publisher(broker, tmp_path, confirm_window=4)
+    for week in range(1, 4):
+        rabbit.publish({'week': week})
+    assert weeks(broker) == []
+    rabbit.flush()
+    assert weeks(broker) == [1, 2, 3]
+
+
+def test_nacked_window_is_resent_whole(tmp_path):
+    broker = FakeBroker(nack_every=5)
+    rabbit = publisher(broker, tmp_path, confirm_window=3)
+    for week in range(1, 7):
+        rabbit.publish({'week': week})
+    rabbit.close()
+    # Week 5 is nacked, so the second window goes out again (consumers drop the repeats)
+    assert weeks(broker) == [1, 2, 3, 4, 5, 6, 4, 5, 6]
+    assert rabbit.stats() == {'published': 6, 'spilled': 0, 'reconnects': 1}
+
+
+def test_dropped_connection_reconnects(tmp_path):
+    broker = FakeBroker(fail_every=5)
+    rabbit = publisher(broker, tmp_path)
+    for week in range(1, 9):
+        rabbit.publish({'week': week})
+    rabbit.close()
+    assert weeks(broker) == list(range(1, 9))
+    assert rabbit.stats()['reconnects'] == 1
+
+
+def test_unconfirmed_messages_spill_and_drain(tmp_path):
+    broker = FakeBroker(fail_every=1)
+    rabbit = publisher(broker, tmp_path, max_retries=1)
+    rabbit.publish({'week': 1})
+    assert rabbit.stats()['spilled'] == 1
+    assert (tmp_path / "outbox.jsonl").exists()
+
+    broker.fail_every = 0
+    publisher(broker, tmp_path).close()
+    assert weeks(broker) == [1]
+    assert not (tmp_path / "outbox.jsonl").exists()
+
+
+def test_stale_connection_is_reopened(tmp_path):
+    broker = FakeBroker()
+    rabbit = publisher(broker, tmp_path, idle_check_seconds=0)
+    rabbit._connection.is_open = False
+    rabbit.publish({'week': 1})
+    assert weeks(broker) == [1]
+    assert broker.connections == 2
+
+
+def test_idle_keeps_the_connection(tmp_path):
+    broker = FakeBroker()
+    rabbit = publisher(broker, tmp_path)
+    rabbit.idle(0)
+    rabbit.publish({'week': 1})
+    assert broker.connections == 1
+
+
+@pytest.mark.parametrize("encoding", ['json', 'json+gzip'])
+def test_encodings_round_trip(tmp_path, encoding):
+    broker = FakeBroker()
+    rabbit = publisher(broker, tmp_path, encoding=encoding)
+    rabbit.publish({'week': 7, 'ai_recap': "[MATT]: Hello"})
+    body, properties = broker.messages("game_stats_queue")[0]
+    assert decode_message(body, properties.content_type, properties.content_encoding)['ai_recap'] == "[MATT]: Hello"
+
+
+def test_channel_without_async_side_confirms_each_message(tmp_path, monkeypatch):
+    import fake_rabbitmq
+    monkeypatch.setattr(fake_rabbitmq, 'FakeAsyncChannel', lambda channel: None)
+    broker = FakeBroker()
+    rabbit = publisher(broker, tmp_path, confirm_window=4)
+    for week in range(1, 7):
+        rabbit.publish({'week': week})
+    rabbit.close()
+    assert weeks(broker) == list(range(1, 7))
+    assert rabbit.stats() == {'published': 6, 'spilled': 0, 'reconnects': 0}
+
+
+def test_msgpack_without_the_package_is_rejected(tmp_path, monkeypatch):
+    import sys
+    monkeypatch.setitem(sys.modules, 'msgpack', None)
+    with pytest.raises(ValueError, match="pip install msgpack"):
+        RabbitPublisher(FakeBroker().connect, "game_stats_queue", encoding='msgpack')
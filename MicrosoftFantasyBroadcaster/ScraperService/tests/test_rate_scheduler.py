@@ -0,0 +1,184 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import rate_scheduler
+from rate_scheduler import PRIORITY_BANTER, PRIORITY_FLAVOR, PRIORITY_RECAP, RequestScheduler
+
+
+class FakeClock:
+    """Stands in for the scheduler's `time` module: time only moves when advance() is called."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self.scheduler = None
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+    def advance(self, seconds):
+        self.now += seconds
+        # Waiters sleep on the condition with real timeouts; wake them to re-check the fake time
+        with self.scheduler._cond:
+            self.scheduler._cond.notify_all()
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_scheduler, 'time', clock)
+    return clock
+
+
+def scheduler_on(clock, **kwargs):
+    clock.scheduler = RequestScheduler(**kwargs)
+    return clock.scheduler
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def in_thread(fn, *args, **kwargs):
+    thread = threading.Thread(target=fn, args=args, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def failing(*errors, result="ok"):
+    """A request that raises each of `errors` in turn, then returns `result`."""
+    errors = list(errors)
+    calls = []
+    def request():
+        calls.append(len(calls))
+        if errors:
+            raise errors.pop(0)
+        return result
+    request.calls = calls
+    return request
+
+
+def test_higher_priority_goes_first_when_quota_is_short(clock):
+    scheduler = scheduler_on(clock, requests_per_minute=1)
+    scheduler.run(lambda: None)
+    order = []
+    flavor = in_thread(scheduler.run, lambda: order.append('flavor'), priority=PRIORITY_FLAVOR)
+    wait_until(lambda: len(scheduler._waiting) == 1)
+    recap = in_thread(scheduler.run, lambda: order.append('recap'), priority=PRIORITY_RECAP)
+    wait_until(lambda: len(scheduler._waiting) == 2)
+
+    clock.advance(60)
+    recap.join(5)
+    assert order == ['recap']
+    clock.advance(60)
+    flavor.join(5)
+    assert order == ['recap', 'flavor']
+
+
+@pytest.mark.parametrize("headers, delay", [
+    ({'retry-after': '3'}, 3.0),
+    ({'retry-after-ms': '1500'}, 1.5),
+    ({'retry-after-ms': '250', 'retry-after': '1'}, 0.25),
+])
+def test_retry_after_headers_set_the_delay(clock, headers, delay):
+    scheduler = scheduler_on(clock)
+    request = failing(FakeAPIError(503, headers))
+    assert scheduler.run(request) == "ok"
+    assert clock.sleeps == [delay]
+    assert scheduler.stats()['retries'] == 1 and scheduler.stats()['rate_limited'] == 0
+
+
+def test_rate_limit_pauses_every_caller(clock):
+    scheduler = scheduler_on(clock)
+    limited = in_thread(scheduler.run, failing(FakeAPIError(429, {'retry-after': '5'})))
+    wait_until(lambda: scheduler.rate_limited == 1 and len(scheduler._waiting) == 1)
+
+    # Even a higher-priority caller that never saw the 429 waits out the pause
+    calls = []
+    other = in_thread(scheduler.run, lambda: calls.append(clock.now), priority=PRIORITY_RECAP)
+    wait_until(lambda: len(scheduler._waiting) == 2)
+    assert calls == []
+
+    clock.advance(5)
+    other.join(5)
+    limited.join(5)
+    assert calls == [clock.now]
+    assert not limited.is_alive() and scheduler._waiting == []
+
+
+def test_request_bucket_makes_callers_wait(clock):
+    scheduler = scheduler_on(clock, requests_per_minute=2)
+    scheduler.run(lambda: None)
+    scheduler.run(lambda: None)
+    done = []
+    third = in_thread(scheduler.run, lambda: done.append(clock.now))
+    wait_until(lambda: len(scheduler._waiting) == 1)
+
+    clock.advance(29)
+    time.sleep(0.05)
+    assert done == []
+    # One request refills every 30s
+    clock.advance(1)
+    third.join(5)
+    assert len(done) == 1
+
+
+def test_token_bucket_makes_callers_wait(clock):
+    scheduler = scheduler_on(clock, tokens_per_minute=1000)
+    scheduler.run(lambda: None, estimated_tokens=600)
+    done = []
+    second = in_thread(scheduler.run, lambda: done.append(clock.now), estimated_tokens=600)
+    wait_until(lambda: len(scheduler._waiting) == 1)
+
+    # 200 more tokens at 1000/min is 12s
+    clock.advance(11)
+    time.sleep(0.05)
+    assert done == []
+    clock.advance(1)
+    second.join(5)
+    assert len(done) == 1
+    assert scheduler.stats()['tokens_used'] == 1200
+
+
+def test_actual_usage_settles_the_estimate(clock):
+    scheduler = scheduler_on(clock, tokens_per_minute=1000)
+    scheduler.run(lambda: SimpleNamespace(usage=SimpleNamespace(total_tokens=100)), estimated_tokens=600)
+    assert scheduler.stats()['tokens_used'] == 100
+    assert scheduler.tokens.level == 900
+
+
+@pytest.mark.parametrize("error", [FakeAPIError(400), FakeAPIError(401), ValueError("bad request body")])
+def test_non_retryable_errors_propagate_immediately(clock, error):
+    scheduler = scheduler_on(clock, tokens_per_minute=1000)
+    request = failing(error)
+    with pytest.raises(type(error)):
+        scheduler.run(request, estimated_tokens=300)
+    assert request.calls == [0]
+    assert clock.sleeps == [] and scheduler.stats()['retries'] == 0
+    # The rejected request's tokens are given back
+    assert scheduler.tokens.level == 1000
+
+
+def test_retries_give_up_after_max_retries(clock):
+    scheduler = scheduler_on(clock, max_retries=2)
+    request = failing(*[FakeAPIError(500, {'retry-after': '1'}) for _ in range(3)])
+    with pytest.raises(FakeAPIError):
+        scheduler.run(request)
+    assert request.calls == [0, 1, 2]
+    assert clock.sleeps == [1.0, 1.0]
@@ -0,0 +1,140 @@
+from records_engine import RECORD_RULES, RecordsEngine
+from snapshot_store import SnapshotBoxScore, SnapshotPlayer, SnapshotTeam
+
+
+def team_game(home, home_score, away, away_score):
+    """A box score with empty lineups, for team-score records."""
+    return SnapshotBoxScore(SnapshotTeam(home), SnapshotTeam(away), home_score, away_score, [], [])
+
+
+def qb(name, passing_yards, passing_tds):
+    stats = {'passingYards': passing_yards, 'passingTouchdowns': passing_tds}
+    return SnapshotPlayer(name, 'QB', 'QB', 'QB', 20.0, {'QB': stats})
+
+
+def qb_game(home, away, passing_yards=250, passing_tds=1, away_tds=None):
+    """A game with the home team's QB ("<home> QB"), and the away QB's only if `away_tds` is given."""
+    away_lineup = [qb(f"{away} QB", 200, away_tds)] if away_tds is not None else []
+    return SnapshotBoxScore(SnapshotTeam(home), SnapshotTeam(away), 100.0, 90.0,
+                            [qb(f"{home} QB", passing_yards, passing_tds)], away_lineup)
+
+
+def engine():
+    return RecordsEngine(1, 2025, path=":memory:", min_history_weeks=0)
+
+
+def announced(broken):
+    return [message for messages in broken.values() for message in messages]
+
+
+def test_new_high_is_announced():
+    records = engine()
+    records.ingest_week(1, [team_game("A", 100, "B", 90)])
+    broken = records.ingest_week(2, [team_game("C", 120, "D", 80)])
+    assert any("C scored 120 points - highest ever" in m for m in announced(broken))
+    assert records.records()['highest_team_score']['week'] == 2
+
+
+def test_tying_the_record_is_not_announced():
+    records = engine()
+    records.ingest_week(1, [team_game("A", 100, "B", 90)])
+    records.ingest_week(2, [team_game("C", 120, "D", 80)])
+    broken = records.ingest_week(3, [team_game("E", 120, "F", 95)])
+    assert not any("highest ever" in m for m in announced(broken))
+    assert records.records()['highest_team_score']['holder'] == "C"
+
+
+def test_correction_keeps_the_earliest_holder_of_a_tied_record():
+    records = engine()
+    records.ingest_week(1, [qb_game("A", "B", passing_tds=2)])
+    records.ingest_week(2, [qb_game("C", "D", passing_tds=5, away_tds=3)])
+    week3 = [qb_game("E", "F", passing_tds=5)]
+    assert not any("threw 5 TDs" in m for m in announced(records.ingest_week(3, week3)))
+
+    # Correcting the other QB in week 2 makes the engine rebuild the record week 2 holds
+    records.ingest_week(2, [qb_game("C", "D", passing_tds=5, away_tds=2)])
+    record = records.records()['most_passing_tds']
+    assert (record['holder'], record['week'], record['previous_value']) == ("C QB", 2, 2)
+    assert not any("threw 5 TDs" in m for m in announced(records.ingest_week(3, week3)))
+
+
+def test_correction_lowering_the_record_rebuilds_it_from_history():
+    records = engine()
+    records.ingest_week(1, [team_game("A", 110, "B", 90)])
+    records.ingest_week(2, [team_game("C", 130, "D", 80)])
+    records.ingest_week(3, [team_game("E", 115, "F", 95)])
+
+    records.ingest_week(2, [team_game("C", 105, "D", 80)])
+    record = records.records()['highest_team_score']
+    assert (record['holder'], record['week'], record['value']) == ("E", 3, 115)
+    assert record['previous_value'] == 110
+    # Week 3 now holds a record it broke outright, so it is announced
+    assert any("E scored 115 points" in m for m in announced(records.ingest_week(3, [team_game("E", 115, "F", 95)])))
+
+
+def test_correction_raising_an_earlier_week_takes_the_record_back():
+    records = engine()
+    records.ingest_week(1, [qb_game("A", "B", passing_yards=300)])
+    records.ingest_week(2, [qb_game("C", "D", passing_yards=350)])
+
+    broken = records.ingest_week(1, [qb_game("A", "B", passing_yards=400)])
+    record = records.records()['most_passing_yards']
+    assert (record['week'], record['value'], record['previous_value']) == (1, 400, None)
+    # Nothing came before week 1, so there was no record to break
+    assert not any("threw for" in m for m in announced(broken))
+
+
+def test_unchanged_week_is_a_no_op():
+    records = engine()
+    records.ingest_week(1, [team_game("A", 100, "B", 90)])
+    before = records.records()
+    records.ingest_week(1, [team_game("A", 100, "B", 90)])
+    assert records.records() == before
+
+
+def test_announcements_wait_for_history():
+    records = RecordsEngine(1, 2025, path=":memory:", min_history_weeks=2)
+    records.ingest_week(1, [team_game("A", 100, "B", 90)])
+    assert records.ingest_week(2, [team_game("C", 120, "D", 80)]) == {}
+    assert announced(records.ingest_week(3, [team_game("E", 130, "F", 80)]))
+
+
+def test_announcements_wait_for_history_even_when_weeks_arrive_late():
+    records = RecordsEngine(1, 2025, path=":memory:", min_history_weeks=2)
+    records.ingest_week(1, [team_game("A", 100, "B", 90)])
+    assert records.ingest_week(3, [team_game("C", 120, "D", 80)]) == {}
+    # Week 2 filling in makes week 3 the third week, with two weeks behind it
+    records.ingest_week(2, [team_game("E", 95, "F", 85)])
+    assert any("C scored 120 points" in m for m in announced(records.ingest_week(3, [team_game("C", 120, "D", 80)])))
+
+
+def test_history_is_counted_for_files_from_before_the_weeks_table(tmp_path):
+    path = str(tmp_path / "records.sqlite")
+    records = RecordsEngine(1, 2025, path=path, min_history_weeks=2)
+    for week, score in ((1, 100), (2, 105), (3, 120)):
+        records.ingest_week(week, [team_game("A", score, "B", 90)])
+    records._db.execute("DROP TABLE weeks")
+    records.close()
+
+    reopened = RecordsEngine(1, 2025, path=path, min_history_weeks=2)
+    assert [reopened._history_weeks(week) for week in (1, 2, 3)] == [0, 1, 2]
+    assert announced(reopened.ingest_week(3, [team_game("A", 120, "B", 90)]))
+
+
+def test_best_lines_are_read_from_an_index_without_sorting():
+    records = engine()
+    records.ingest_week(1, [qb_game("A", "B"), team_game("C", 100, "D", 90)])
+    plans = []
+    execute = records._db.execute
+    class Explaining:
+        def execute(self, sql, params=()):
+            if "ORDER BY" in sql:
+                plans.append(" ".join(row[-1] for row in execute("EXPLAIN QUERY PLAN " + sql, params)))
+            return execute(sql, params)
+    records._db = Explaining()
+    for rule in RECORD_RULES:
+        if rule[4] == 'max':
+            records._best_line(rule)
+    records.leaderboard()
+    records.leaderboard(position='QB')
+    assert plans and not any("TEMP B-TREE" in plan for plan in plans)
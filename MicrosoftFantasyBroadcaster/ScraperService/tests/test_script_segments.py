@@ -0,0 +1,101 @@
+import pytest
+
+from script_segments import (
+    MAX_SEGMENT_SECONDS, SegmentParser, clean_text, manifest_entries, normalize_tags, segment_script, split_segments
+)
+
+
+def stream(text):
+    """Cleaned segments of `text` fed a character at a time, like a streamed completion."""
+    parser = SegmentParser()
+    segments = []
+    for char in text:
+        segments += parser.feed(char)
+    return [(speaker, clean_text(text)) for speaker, text in segments + parser.flush() if clean_text(text)]
+
+
+@pytest.mark.parametrize("loose", [
+    "[Jose] I agree", "[ jose ]: I agree", "(JOSE): I agree", "**Jose:** I agree", "Jose: I agree", "  - JOSE : I agree",
+])
+def test_loose_tags(loose):
+    assert split_segments(loose) == [('JOSE', "I agree")]
+    assert stream(loose) == [('JOSE', "I agree")]
+
+
+@pytest.mark.parametrize("doubled", [
+    "[JOSE]: Jose: I agree", "[JOSE]: **Jose:** I agree", "Jose: JOSE: I agree", "[Jose] [JOSE]: I agree",
+])
+def test_repeated_tags(doubled):
+    assert normalize_tags(doubled) == "[JOSE]: I agree"
+    assert split_segments(doubled) == [('JOSE', "I agree")]
+    assert stream(doubled) == [('JOSE', "I agree")]
+
+
+def test_trailing_bare_tag_is_not_read_out():
+    assert split_segments("[MATT]: Back to you. [JOSE]") == [('MATT', "Back to you.")]
+    assert stream("[MATT]: Back to you. [JOSE]") == [('MATT', "Back to you.")]
+
+
+def test_second_host_run_into_a_line():
+    script = "[MATT]: What a game. Jose: I agree!"
+    assert split_segments(script) == [('MATT', "What a game."), ('JOSE', "I agree!")]
+    assert stream(script) == split_segments(script)
+
+
+def test_another_host_named_after_a_tag_is_left_alone():
+    assert split_segments("[JOSE]: Matt: you called it") == [('JOSE', "Matt: you called it")]
+
+
+def test_untagged_text_goes_to_matt():
+    assert split_segments("Welcome back! [JOSE]: Thanks.") == [('MATT', "Welcome back!"), ('JOSE', "Thanks.")]
+
+
+@pytest.mark.parametrize("text, spoken", [
+    ("That was *insane* and *laughs* wow.", "That was insane and wow."),
+    ("*Laughs nervously* OK.", "OK."),
+    ("Well (clears throat) that hurt.", "Well that hurt."),
+    ("He scored (again) *twice*.", "He scored (again) twice."),
+    ("**Huge** _night_ for `Team 1`", "Huge night for Team 1"),
+    ("## Week 3 Recap", "Week 3 Recap"),
+    ("Intro done. ### The Games", "Intro done. The Games"),
+    ("The #1 seed fell to #8.", "The #1 seed fell to #8."),
+    ("Snake_Case FC beat my_team_name, __again__.", "Snake_Case FC beat my_team_name, again."),
+    ("Bodied & torched <3", "Bodied and torched 3"),
+    ("*sighs*", ""),
+])
+def test_clean_text(text, spoken):
+    assert clean_text(text) == spoken
+
+
+def test_segment_script_repairs():
+    script = (
+        "Welcome to the show!\n"
+        "[MATT]: *laughs*\n"
+        "[JOSE]: Jose: Team 1 was *cooking*.\n"
+        "[JOSE]: And Team 2 wasn't."
+    )
+    show = segment_script(script, "Week_1_Full_Recap")
+    assert [(s.speaker, s.text) for s in show.segments] == [
+        ('MATT', "Welcome to the show!"),
+        ('JOSE', "Team 1 was cooking. And Team 2 wasn't.")
+    ]
+    assert show.repairs == [
+        "normalized loose speaker tags", "untagged opening line given to MATT", "dropped an empty MATT line"
+    ]
+    assert [e['index'] for e in manifest_entries(show.segments)] == [0, 1]
+    assert show.duration == round(sum(s.duration for s in show.segments), 1)
+
+
+def test_long_turns_split_at_sentence_ends():
+    sentence = "Team 1 put up a monster score again this week. "
+    show = segment_script("[MATT]: " + sentence * 20, "Week_1_Full_Recap")
+    assert len(show.segments) > 1
+    assert all(s.duration <= MAX_SEGMENT_SECONDS for s in show.segments)
+    assert all(s.text.endswith("week.") for s in show.segments)
+    assert " ".join(s.text for s in show.segments) == (sentence * 20).strip()
+
+
+def test_segment_ids_follow_the_words():
+    first = segment_script("[MATT]: Hello there.", "Show").segments[0]
+    assert segment_script("[MATT]: Hello there.", "Show").segments[0].id == first.id
+    assert segment_script("[MATT]: Hello again.", "Show").segments[0].id != first.id
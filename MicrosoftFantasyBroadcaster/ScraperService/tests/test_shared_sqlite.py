@@ -0,0 +1,30 @@
+import sqlite3
+import threading
+
+from llm_cache import ResponseCache
+from records_engine import RecordsEngine
+
+
+def test_shared_files_use_wal(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    records = RecordsEngine(1, 2025, path=str(tmp_path / "records.sqlite"))
+    for db in (cache._db, records._db):
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_cache_waits_for_another_writer(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("a", "cached")
+
+    # Another worker process holding the write lock for a moment
+    other = sqlite3.connect(path, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("UPDATE responses SET last_used_at = 0")
+    release = threading.Timer(0.3, other.commit)
+    release.start()
+
+    assert cache.get("a") == "cached"
+    cache.put("b", "also cached")
+    release.join()
+    assert cache.get("b") == "also cached"
@@ -0,0 +1,41 @@
+from benchmarks.fake_league import FakeLeague
+from checkpoint_store import box_score_fingerprint
+from snapshot_store import SnapshotStore
+
+
+def test_snapshots_round_trip(tmp_path):
+    league = FakeLeague(teams=4, weeks=2)
+    store = SnapshotStore(1, 2025, path=str(tmp_path / "1_2025.snap"))
+    for week in (1, 2):
+        store.save_week(week, league.box_scores(week), current_week=2)
+
+    reopened = SnapshotStore(1, 2025, path=store.path)
+    assert reopened.weeks() == [1, 2] and reopened.current_week == 2
+    game = reopened.load_week(2)[0]
+    assert game.home_team.team_name == league.box_scores(2)[0].home_team.team_name
+    assert box_score_fingerprint(reopened.load_week(1)) == box_score_fingerprint(league.box_scores(1))
+
+
+def test_resaving_a_week_only_appends_changes(tmp_path):
+    league = FakeLeague(teams=4, weeks=1)
+    store = SnapshotStore(1, 2025, path=str(tmp_path / "1_2025.snap"))
+    store.save_week(1, league.box_scores(1))
+    size = (tmp_path / "1_2025.snap").stat().st_size
+    store.save_week(1, league.box_scores(1))
+    assert (tmp_path / "1_2025.snap").stat().st_size == size
+
+    league.box_scores(1)[0].home_lineup[0].points += 2
+    store.save_week(1, league.box_scores(1))
+    assert (tmp_path / "1_2025.snap").stat().st_size > size
+    assert store.load_week(1)[0].home_lineup[0].points == league.box_scores(1)[0].home_lineup[0].points
+
+
+def test_decoded_weeks_are_bounded(tmp_path):
+    league = FakeLeague(teams=4, weeks=6)
+    store = SnapshotStore(1, 2025, path=str(tmp_path / "1_2025.snap"), cache_weeks=2)
+    for week in range(1, 7):
+        store.save_week(week, league.box_scores(week))
+    for week in (1, 2, 1, 3):
+        store.load_week(week)
+    assert list(store._decoded) == [1, 3]
+    assert store.load_week(3) is store.load_week(3)
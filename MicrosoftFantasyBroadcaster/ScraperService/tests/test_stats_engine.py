@@ -0,0 +1,56 @@
+from benchmarks.fake_league import FakeLeague
+from stats_engine import StatsFrame
+
+# Frozen from FakeLeague(teams=4, weeks=2) week 1 (seed 7): the strings the
+# storyline prompts get, so a change to a rule, threshold or template shows up here
+WEEK_1_NOTABLE = {
+    0: ['🎯 Team 4 QB0: 5 passing TDs!', '🌟 Team 4 QB0: MONSTER game (36.7 pts)!',
+        '🔥 Team 4 RB1: 2 total TDs!', '🔥 Team 4 RB2: 2 total TDs!', '💯 Team 4 RB2: 101 rushing yards!',
+        '🎯 Team 4 TE5: 2 receiving TDs!', '💯 Team 4 TE6: 134 receiving yards!',
+        '🚀 Team 2 QB0: 380 passing yards!', '🔥 Team 2 RB1: 2 total TDs!', '💯 Team 2 RB1: 145 rushing yards!',
+        '🔥 Team 2 RB2: 3 total TDs!', '🎯 Team 2 WR3: 2 receiving TDs!', '💯 Team 2 WR3: 115 receiving yards!',
+        '🎯 Team 2 TE5: 3 receiving TDs!', '🔥 Team 2 RB6: 3 total TDs!', '💯 Team 2 RB6: 112 rushing yards!',
+        '🌟 Team 2 RB6: MONSTER game (32.8 pts)!'],
+    1: ['🚀 Team 3 QB0: 405 passing yards!', '🎯 Team 3 QB0: 5 passing TDs!', '🌟 Team 3 QB0: MONSTER game (39.2 pts)!',
+        '🔥 Team 3 RB1: 4 total TDs!', '🌟 Team 3 RB1: MONSTER game (35.0 pts)!', '🔥 Team 3 RB2: 2 total TDs!',
+        '💯 Team 3 WR3: 161 receiving yards!', '💯 Team 3 WR4: 165 receiving yards!', '🎯 Team 3 WR6: 2 receiving TDs!',
+        '🎯 Team 1 QB0: 5 passing TDs!', '🌟 Team 1 QB0: MONSTER game (36.18 pts)!', '🔥 Team 1 RB2: 2 total TDs!',
+        '💯 Team 1 RB2: 157 rushing yards!', '🌟 Team 1 RB2: MONSTER game (30.4 pts)!',
+        '🎯 Team 1 WR3: 3 receiving TDs!', '🎯 Team 1 WR4: 3 receiving TDs!', '💯 Team 1 WR4: 150 receiving yards!',
+        '🌟 Team 1 WR4: MONSTER game (33.0 pts)!', '🎯 Team 1 TE5: 2 receiving TDs!'],
+}
+
+WEEK_1_STORYLINES = {
+    0: ['🔥 Team 4: MONSTER SCORE (167.49 pts)!', '🔥 Team 2: MONSTER SCORE (190.01 pts)!'],
+    1: ['🔥 Team 3: MONSTER SCORE (170.82 pts)!', '🔥 Team 1: MONSTER SCORE (159.25 pts)!'],
+}
+
+
+def week(n):
+    return FakeLeague(teams=4, weeks=2).box_scores(n)
+
+
+def test_notable_and_storylines_match_the_frozen_output():
+    frame = StatsFrame(week(1))
+    assert frame.notable_by_game() == WEEK_1_NOTABLE
+    assert frame.storylines_by_game() == WEEK_1_STORYLINES
+    assert frame.top_performer_by_game() == {0: ('Team 4 QB0', 'Team 4', 36.7), 1: ('Team 3 QB0', 'Team 3', 39.2)}
+
+
+def test_leaderboard():
+    frame = StatsFrame(week(1))
+    assert frame.leaderboard(n=3) == [
+        ('Team 3 QB0', 'Team 3', 39.2), ('Team 4 QB0', 'Team 4', 36.7), ('Team 1 QB0', 'Team 1', 36.18)
+    ]
+    assert frame.leaderboard('passingYards', n=2, positions=('QB',)) == [
+        ('Team 3 QB0', 'Team 3', 405), ('Team 2 QB0', 'Team 2', 380)
+    ]
+
+
+def test_from_weeks_keys_games_by_week():
+    frame = StatsFrame.from_weeks({(1, 1): week(1), (1, 2): week(2)})
+    assert frame.game_keys == [((1, 1), 0), ((1, 1), 1), ((1, 2), 0), ((1, 2), 1)]
+    assert frame.leaderboard(n=2) == [('Team 3 QB0', 'Team 3', 39.2), ('Team 1 RB6', 'Team 1', 38.8)]
+    # Each week's notables are the same whether it's framed alone or with the season
+    season = frame.notable_by_game()
+    assert {gid: season[gid] for gid in (0, 1)} == WEEK_1_NOTABLE
@@ -0,0 +1,118 @@
+import os
+
+import storyline_generator
+from storyline_archive import StorylineArchive, import_legacy_storylines, legacy_matchup_key, prompt_hash
+from storyline_generator import StorylineGenerator
+
+
+def archive_at(tmp_path, **kwargs):
+    return StorylineArchive(1, 2025, path=str(tmp_path / "1_2025.arc"), **kwargs)
+
+
+def test_round_trip_across_reopens(tmp_path):
+    archive = archive_at(tmp_path, batch_size=2)
+    archive.put(1, "A vs B", "Week 1 story", "p1")
+    archive.put(1, "C vs D", "Another story", "p1")
+    archive.put(2, "A vs C", "Ünïcode story 🔥", "p2")
+    archive.close()
+
+    reopened = archive_at(tmp_path)
+    assert len(reopened) == 3 and reopened.weeks() == [1, 2]
+    assert reopened.get(2, "A vs C")['storyline'] == "Ünïcode story 🔥"
+    assert reopened.get(1, "A vs B", "p1")['week'] == 1
+    assert reopened.get(1, "A vs B", "other prompt") is None
+    assert [r['matchup'] for r in reopened.iter_records(1)] == ["A vs B", "C vs D"]
+    assert [r['week'] for r in reopened.iter_records()] == [1, 1, 2]
+
+
+def test_prompts_are_kept_apart_and_latest_wins(tmp_path):
+    archive = archive_at(tmp_path)
+    archive.put(1, "A vs B", "From the old prompt", "old")
+    archive.flush()
+    archive.put(1, "A vs B", "From the new prompt", "new")
+    archive.close()
+
+    reopened = archive_at(tmp_path)
+    assert reopened.get(1, "A vs B")['storyline'] == "From the new prompt"
+    assert reopened.get(1, "A vs B", "old")['storyline'] == "From the old prompt"
+    assert len(reopened) == 2
+
+
+def test_index_is_only_ever_appended(tmp_path):
+    archive = archive_at(tmp_path, batch_size=1)
+    archive.put(1, "A vs B", "First")
+    with open(archive.index_path, 'rb') as f:
+        first = f.read()
+    archive.put(1, "A vs B", "First")
+    archive.put(1, "A vs B", "Corrected")
+    with open(archive.index_path, 'rb') as f:
+        index = f.read()
+    assert index.startswith(first) and index.count(b"\n") == 2
+    assert archive_at(tmp_path).get(1, "A vs B")['storyline'] == "Corrected"
+
+
+def test_torn_index_line_is_dropped(tmp_path):
+    archive = archive_at(tmp_path, batch_size=1)
+    archive.put(1, "A vs B", "Kept")
+    with open(archive.index_path, 'a', encoding='utf-8') as f:
+        f.write('{"week":1,"matchup":"C vs')
+
+    reopened = archive_at(tmp_path, batch_size=1)
+    assert len(reopened) == 1
+    reopened.put(2, "C vs D", "After the crash")
+    assert archive_at(tmp_path).get(2, "C vs D")['storyline'] == "After the crash"
+
+
+def write_legacy(directory, week, matchup, storyline):
+    path = directory / f"week_{week}_{legacy_matchup_key(matchup)}.txt"
+    path.write_text(
+        f"Week {week} Matchup Recap (Azure Generated)\nGenerated: 2024-10-01 12:00:00\n" + "=" * 70 + "\n\n" + storyline,
+        encoding='utf-8'
+    )
+    return path
+
+
+def test_import_legacy_files(tmp_path):
+    legacy = tmp_path / "storylines"
+    legacy.mkdir()
+    plain = write_legacy(legacy, 3, "Team 1 vs Team 2", "Old story")
+    # Underscores and slashes the old writer's replacements made ambiguous
+    odd = write_legacy(legacy, 3, "Snake_Case FC vs Bills/Mafia", "Odd story")
+    (legacy / "notes.txt").write_text("not a storyline", encoding='utf-8')
+
+    archive = archive_at(tmp_path)
+    assert import_legacy_storylines(archive, str(legacy)) == 2
+    assert import_legacy_storylines(archive, str(legacy), remove=True) == 2
+    assert len(archive) == 2
+    assert archive.get(3, legacy_matchup_key("Team 1 vs Team 2"))['storyline'] == "Old story"
+    assert archive.get(3, legacy_matchup_key("Snake_Case FC vs Bills/Mafia"))['storyline'] == "Odd story"
+    assert not plain.exists() and not odd.exists()
+
+
+def test_import_keeps_files_that_dont_read_back(tmp_path, monkeypatch):
+    legacy = tmp_path / "storylines"
+    legacy.mkdir()
+    path = write_legacy(legacy, 1, "A vs B", "Story")
+    archive = archive_at(tmp_path)
+    monkeypatch.setattr(archive, 'get', lambda *args: None)
+    assert import_legacy_storylines(archive, str(legacy), remove=True) == 1
+    assert path.exists()
+
+
+def test_generated_storylines_are_archived_by_prompt(tmp_path, monkeypatch):
+    prompts = []
+    def chat_completion(client, deployment, prompt, system_message=None, **kwargs):
+        prompts.append((prompt, system_message))
+        return "Team 1 cooked."
+    monkeypatch.setattr(storyline_generator, 'chat_completion', chat_completion)
+    monkeypatch.setattr(storyline_generator, 'get_shared_client', lambda: None)
+    gen = StorylineGenerator.__new__(StorylineGenerator)
+    gen.deployment_name = "test"
+    stats = {'team_1': {'team_name': "Team 1", 'score': 120.0}, 'team_2': {'team_name': "Team 2", 'score': 90.0}}
+
+    # An empty archive is still the one written to
+    archive = archive_at(tmp_path)
+    assert gen.generate_storyline(stats, week=4, archive=archive) == "Team 1 cooked."
+    record = archive.get(4, "Team 1 vs Team 2")
+    assert record['storyline'] == "Team 1 cooked."
+    assert record['prompt_hash'] == prompt_hash(*prompts[0])